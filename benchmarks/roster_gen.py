@@ -0,0 +1,129 @@
+import random
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+from services.transformer import DAY_END_MIN, DAY_START_MIN, MAX_DATE_RANGE_DAYS, SLOT_MINUTES, WEEKDAYS
+
+BLOCKER_PRESETS: Dict[str, Dict[str, Any]] = {
+    "none": {},
+    "office": {"hours": {"start": "09:00", "end": "17:00"}, "lunch": {"start": "12:00", "end": "13:00"}},
+    "strict": {
+        "hours": {"start": "10:00", "end": "16:00"},
+        "lunch": {"start": "12:00", "end": "13:00"},
+        "weekdays_disallowed": [4],  # Friday (ISO days only)
+        "min_attendees": 2,
+    },
+}
+
+
+def _busy_runs(rng: random.Random, num_slots: int, density: float, max_run: int) -> List[List[int]]:
+    """Random [start, end) slot runs covering roughly density of a day."""
+    runs: List[List[int]] = []
+    covered = 0
+    target = int(num_slots * density)
+    while covered < target:
+        length = rng.randint(1, max_run)
+        start = rng.randrange(0, max(1, num_slots - length + 1))
+        runs.append([start, min(num_slots, start + length)])
+        covered += length
+    return runs
+
+
+def frontend_payload(
+    seed: int = 0,
+    attendees: int = 50,
+    days: int = 5,
+    busy_density: float = 0.3,
+    tentative_density: float = 0.1,
+    meeting_length_minutes: int = 60,
+    blockers: str = "none",
+    top_k: int = 5,
+    engine: Optional[str] = None,
+    slot_minutes: int = SLOT_MINUTES,
+) -> Dict[str, Any]:
+    """
+    Seeded frontend payload ({ availability: [...] }) like the one static/scripts/api.js sends.
+    Up to five days use the Monday-Friday week; longer runs get a date_range starting on a Monday.
+    Busy runs are up to two hours long whatever the grid, so finer grids only add resolution.
+    """
+    if not 1 <= days <= MAX_DATE_RANGE_DAYS:
+        raise ValueError(f"frontend payloads have 1-{MAX_DATE_RANGE_DAYS} days")
+    rng = random.Random(seed)
+    num_slots = (DAY_END_MIN - DAY_START_MIN) // slot_minutes
+    max_run = 8 * SLOT_MINUTES // slot_minutes
+    users = []
+    for i in range(attendees):
+        slots = []
+        for day in range(days):
+            for kind, density in (("busy", busy_density), ("tentative", tentative_density)):
+                for start, end in _busy_runs(rng, num_slots, density, max_run=max_run):
+                    slots.append({
+                        "day": day,
+                        "startMinute": DAY_START_MIN + start * slot_minutes,
+                        "endMinute": DAY_START_MIN + end * slot_minutes,
+                        "availabilityType": kind,
+                    })
+        users.append({"name": f"User {i}", "priority": rng.choice([1, 1, 1, 2, 3]), "timeSlots": slots})
+
+    payload = {
+        "availability": users,
+        "meeting_length_minutes": meeting_length_minutes,
+        "top_k": top_k,
+        "constraints": {"global_blockers": BLOCKER_PRESETS[blockers]},
+    }
+    if days > len(WEEKDAYS):
+        first = date(2025, 3, 3)
+        payload["date_range"] = {"start": first.isoformat(), "end": (first + timedelta(days=days - 1)).isoformat()}
+    if slot_minutes != SLOT_MINUTES:
+        payload["slot_minutes"] = slot_minutes
+    if engine:
+        payload["engine"] = engine
+    return payload
+
+
+def model_payload(
+    seed: int = 0,
+    attendees: int = 50,
+    days: int = 5,
+    slot_minutes: int = 15,
+    busy_density: float = 0.3,
+    tentative_density: float = 0.1,
+    meeting_length_minutes: int = 60,
+    blockers: str = "none",
+    top_k: int = 5,
+    form: str = "availability_matrix",
+) -> Dict[str, Any]:
+    """
+    Seeded raw model payload with any number of ISO days and slot granularity.
+    form is "availability_matrix" (dense rows) or "intervals" (sparse busy/tentative runs).
+    """
+    rng = random.Random(seed)
+    num_slots = (24 * 60) // slot_minutes
+    max_run = max(1, 120 // slot_minutes)
+    day_labels = [(date(2025, 3, 3) + timedelta(days=d)).isoformat() for d in range(days)]  # from a Monday
+    people = []
+    for i in range(attendees):
+        rows = [[2] * num_slots for _ in range(days)]
+        intervals = []
+        for d in range(days):
+            for value, density in ((0, busy_density), (1, tentative_density)):
+                for start, end in _busy_runs(rng, num_slots, density, max_run):
+                    rows[d][start:end] = [value] * (end - start)
+                    intervals.append({"day": d, "start": start, "end": end, "value": value})
+        person: Dict[str, Any] = {"name": f"User {i}", "priority": rng.choice([1, 1, 1, 2, 3])}
+        if form == "intervals":
+            person["intervals"] = intervals
+        else:
+            person["availability_matrix"] = rows
+        people.append(person)
+
+    return {
+        "slot_minutes": slot_minutes,
+        "meeting_length_minutes": meeting_length_minutes,
+        "days": day_labels,
+        "slots_per_day": num_slots,
+        "attendees": people,
+        "top_k": top_k,
+        "schedule": {"day_start": "00:00", "timezone": "America/New_York"},
+        "constraints": {"global_blockers": BLOCKER_PRESETS[blockers]},
+    }
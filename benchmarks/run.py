@@ -0,0 +1,338 @@
+"""
+Scheduler benchmark suite.
+
+    python -m benchmarks.run --out benchmarks/baseline.json         # record a baseline
+    python -m benchmarks.run --compare benchmarks/baseline.json     # compare against it
+
+Each case times the frontend validation, the transformation, model() per engine and the
+/call-model endpoint through a local test client, and fingerprints the ranked output so a
+comparison also catches result changes, not only slowdowns. The startup case times a fresh
+server process until its first response and weighs the pages as sent (run the asset build,
+python -m services.assets, first to measure what a deployment serves).
+"""
+import argparse
+import gc
+import hashlib
+import json
+import os
+import platform
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+from urllib.error import URLError
+from urllib.parse import urljoin
+from urllib.request import urlopen
+
+from benchmarks.roster_gen import frontend_payload, model_payload
+from model import ENGINES, model
+from services.schemas import FrontendPayload, parse
+from services.transformer import transform_frontend_to_model_payload
+
+DEFAULT_THRESHOLD = 0.2
+# Slowdowns smaller than this are timer/scheduler noise, whatever the ratio
+DEFAULT_MIN_DELTA_MS = 1.0
+
+# name -> (kind, generator kwargs); frontend cases also run the transformer and the endpoint
+CASES: Dict[str, Dict[str, Any]] = {
+    "fe-small": {"kind": "frontend", "attendees": 10},
+    "fe-medium": {"kind": "frontend", "attendees": 200, "blockers": "office"},
+    "fe-large": {"kind": "frontend", "attendees": 1000, "busy_density": 0.4, "meeting_length_minutes": 90},
+    "fe-quarter": {"kind": "frontend", "attendees": 500, "days": 90, "blockers": "strict"},
+    "fe-oncall-1min": {"kind": "frontend", "attendees": 12, "days": 28, "slot_minutes": 1, "blockers": "office"},
+    "dense-5min": {"kind": "model", "attendees": 100, "days": 5, "slot_minutes": 5, "blockers": "office"},
+    "dense-2wk": {"kind": "model", "attendees": 200, "days": 10, "blockers": "strict", "meeting_length_minutes": 45},
+    "sparse-2wk": {
+        "kind": "model", "attendees": 500, "days": 10, "form": "intervals",
+        "busy_density": 0.2, "tentative_density": 0.05, "meeting_length_minutes": 30,
+    },
+}
+QUICK_CASES = ("fe-small", "fe-medium", "dense-5min")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Pages weighed with everything they load, as a browser with and without compression fetches them
+PAGES = ("/", "/results")
+# Stylesheets, scripts, images and module imports referenced by HTML, CSS and JS
+_REFERENCE = re.compile(r'(?:href|src)="([^"]+)"|@import "([^"]+)"|\bfrom "([^"]+)"|\bimport "([^"]+)"')
+STARTUP_TIMEOUT_SECONDS = 60
+
+
+def _time(fn: Callable[[], Any], repeat: int, setup: Optional[Callable[[], Any]] = None) -> Dict[str, float]:
+    """
+    Run fn once to warm up, then repeat times (setup excluded), and summarize wall times in seconds.
+    The garbage collector is paused while timing, as timeit does.
+    """
+    if setup:
+        setup()
+    fn()
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return _summary(samples)
+
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    repeat = len(samples)
+    return {
+        "median": statistics.median(samples),
+        "min": min(samples),
+        "mean": statistics.fmean(samples),
+        "runs": repeat,
+    }
+
+
+def _fingerprint(result: Dict[str, Any]) -> str:
+    """Digest of the ranked suggestions; -0.0 and 0.0 are treated alike (engines differ in summation order)."""
+    canonical = json.dumps(result, sort_keys=True).replace("-0.0,", "0.0,")
+    return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+
+def _call_endpoint(client, body: bytes) -> Dict[str, Any]:
+    response = client.post("/call-model", content=body, headers={"Content-Type": "application/json"})
+    if response.status_code != 200:
+        raise RuntimeError(f"/call-model returned {response.status_code}: {response.text[:200]}")
+    return response.json()
+
+
+def run_case(name: str, spec: Dict[str, Any], seed: int, repeat: int, engines: List[str], client) -> Dict[str, Any]:
+    spec = dict(spec)
+    kind = spec.pop("kind")
+    timings: Dict[str, Dict[str, float]] = {}
+    fingerprints: Dict[str, str] = {}
+
+    if kind == "frontend":
+        data = frontend_payload(seed=seed, **spec)
+        # Parsing leaves the payload untouched, so it can be reused across runs
+        timings["validate"] = _time(lambda: parse(FrontendPayload, data), repeat)
+        timings["transform"] = _time(lambda: transform_frontend_to_model_payload(data), repeat)
+        payload = transform_frontend_to_model_payload(data)
+    else:
+        payload = model_payload(seed=seed, **spec)
+
+    for engine in engines:
+        query = {**payload, "engine": engine}
+        result: Dict[str, Any] = {}
+        timings[f"model[{engine}]"] = _time(lambda: result.update(model(query)), repeat)
+        fingerprints[engine] = _fingerprint(result)
+
+    if client is not None:
+        from services.result_cache import result_cache
+        from services.roster_cache import roster_cache
+
+        def cold():
+            roster_cache.clear()
+            result_cache.clear()
+
+        body = json.dumps(data if kind == "frontend" else payload).encode()
+        result = _call_endpoint(client, body)
+        fingerprints["endpoint"] = _fingerprint(result)
+        # Scored every time: "endpoint" compiles the roster too, "endpoint[cached]" reuses it
+        timings["endpoint"] = _time(lambda: _call_endpoint(client, body), repeat, setup=cold)
+        timings["endpoint[cached]"] = _time(lambda: _call_endpoint(client, body), repeat, setup=result_cache.clear)
+        timings["endpoint[result-cached]"] = _time(lambda: _call_endpoint(client, body), repeat)
+
+    return {"timings": timings, "fingerprints": fingerprints}
+
+
+def _first_response() -> float:
+    """Seconds from launching a server process (uvicorn main:app) until it answers GET /."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"], cwd=ROOT
+    )
+    try:
+        while True:
+            try:
+                with urlopen(f"http://127.0.0.1:{port}/") as response:
+                    response.read()
+                return time.perf_counter() - started
+            except (URLError, ConnectionError):
+                if server.poll() is not None or time.perf_counter() - started > STARTUP_TIMEOUT_SECONDS:
+                    raise RuntimeError("server did not start")
+                time.sleep(0.005)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def _page_weight(client, page: str, accept_encoding: str) -> int:
+    """Bytes sent for a page and everything it references, transitively, each fetched once."""
+    seen = set()
+    pending = [page]
+    total = 0
+    while pending:
+        url = pending.pop()
+        if url in seen:
+            continue
+        seen.add(url)
+        response = client.get(url, headers={"Accept-Encoding": accept_encoding})
+        if response.status_code != 200:
+            raise RuntimeError(f"{url} returned {response.status_code}")
+        total += response.num_bytes_downloaded
+        if response.headers.get("content-type", "").startswith(("text/", "application/javascript")):
+            for groups in _REFERENCE.findall(response.text):
+                ref = next(g for g in groups if g)
+                if ref.startswith(("/", ".")):
+                    pending.append(urljoin(url, ref))
+    return total
+
+
+def run_startup(repeat: int, client) -> Dict[str, Any]:
+    """Cold start to first response, and page weights with and without compression."""
+    timings = {"first-response": _summary([_first_response() for _ in range(repeat)])}
+    sizes = {}
+    for page in PAGES:
+        sizes[f"page[{page}]"] = _page_weight(client, page, "br, gzip")
+        sizes[f"raw[{page}]"] = _page_weight(client, page, "identity")
+    return {"timings": timings, "bytes": sizes, "fingerprints": {}}
+
+
+def run_suite(
+    cases: List[str], seed: int, repeat: int, engines: List[str], endpoint: bool, startup: bool = False
+) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    client_cm = None
+    client = None
+    if endpoint:
+        from fastapi.testclient import TestClient
+        import main
+        client_cm = TestClient(main.app)
+        client = client_cm.__enter__()  # runs the app lifespan (worker pool start-up)
+    try:
+        for name in cases:
+            print(f"  {name} ...", file=sys.stderr, flush=True)
+            results[name] = run_case(name, CASES[name], seed, repeat, engines, client)
+        if startup and client is not None:
+            print("  startup ...", file=sys.stderr, flush=True)
+            results["startup"] = run_startup(repeat, client)
+    finally:
+        if client_cm is not None:
+            client_cm.__exit__(None, None, None)
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": seed,
+            "repeat": repeat,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "cases": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float, min_delta_ms: float) -> List[str]:
+    """
+    Print a comparison table; return the list of regressions and output changes.
+    Best-of-runs (min) times are compared since they are the least sensitive to machine noise.
+    """
+    problems = []
+    print(f"{'case':<14} {'stage':<24} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, case in current["cases"].items():
+        base = baseline.get("cases", {}).get(name)
+        if base is None:
+            print(f"{name:<14} (not in baseline)")
+            continue
+        for stage, timing in case["timings"].items():
+            old = base["timings"].get(stage)
+            if old is None:
+                continue
+            ratio = timing["min"] / old["min"] if old["min"] else float("inf")
+            flag = ""
+            if ratio > 1 + threshold and (timing["min"] - old["min"]) * 1000 >= min_delta_ms:
+                flag = "  REGRESSION"
+                problems.append(f"{name} {stage}: {ratio:.2f}x slower")
+            print(
+                f"{name:<14} {stage:<24} {old['min'] * 1000:>8.2f}ms {timing['min'] * 1000:>8.2f}ms "
+                f"{(ratio - 1) * 100:>+7.1f}%{flag}"
+            )
+        for key, size in case.get("bytes", {}).items():
+            old = base.get("bytes", {}).get(key)
+            if old is None:
+                continue
+            flag = ""
+            if size > old * (1 + threshold):
+                flag = "  REGRESSION"
+                problems.append(f"{name} {key}: {size / old:.2f}x larger")
+            print(f"{name:<14} {key:<24} {old:>9}B {size:>9}B {(size / old - 1) * 100:>+7.1f}%{flag}")
+        for key, digest in case["fingerprints"].items():
+            old_digest = base["fingerprints"].get(key)
+            if old_digest is not None and old_digest != digest:
+                problems.append(f"{name} {key}: output changed")
+    return problems
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", default=",".join(CASES), help="comma-separated case names")
+    parser.add_argument("--quick", action="store_true", help=f"only run {', '.join(QUICK_CASES)}")
+    parser.add_argument("--engines", default=",".join(ENGINES), help="comma-separated engines to time")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, help="generator seed (default: the baseline's, else 0)")
+    parser.add_argument("--no-endpoint", action="store_true", help="skip the /call-model test client runs")
+    parser.add_argument("--no-startup", action="store_true", help="skip the cold start and page weight case")
+    parser.add_argument("--out", help="write results as a JSON baseline to this file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown before flagging a regression (0.2 = 20%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=DEFAULT_MIN_DELTA_MS,
+                        help="ignore slowdowns smaller than this many milliseconds")
+    args = parser.parse_args(argv)
+
+    cases = list(QUICK_CASES) if args.quick else [c for c in args.cases.split(",") if c]
+    unknown = [c for c in cases if c not in CASES]
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(unknown)}; choose from {', '.join(CASES)}")
+    engines = [e for e in args.engines.split(",") if e]
+    if any(e not in ENGINES for e in engines):
+        parser.error(f"engines must be among: {', '.join(ENGINES)}")
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    if args.seed is None:
+        # Compare like with like: same rosters as the baseline unless overridden
+        args.seed = baseline.get("meta", {}).get("seed", 0) if baseline else 0
+
+    current = run_suite(
+        cases, args.seed, args.repeat, engines, endpoint=not args.no_endpoint, startup=not (args.quick or args.no_startup)
+    )
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"wrote {args.out}", file=sys.stderr)
+
+    if baseline is None:
+        print(f"{'case':<14} {'stage':<24} {'min':>10} {'median':>10}")
+        for name, case in current["cases"].items():
+            for stage, timing in case["timings"].items():
+                print(f"{name:<14} {stage:<24} {timing['min'] * 1000:>8.2f}ms {timing['median'] * 1000:>8.2f}ms")
+            for key, size in case.get("bytes", {}).items():
+                print(f"{name:<14} {key:<24} {size:>9}B")
+        return 0
+
+    problems = compare(current, baseline, args.threshold, args.min_delta_ms)
+    for problem in problems:
+        print(f"FAIL {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,26 +1,99 @@
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Optional
+
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
+
+from services.codec import PACKED_CONTENT_TYPE, encode_response, read_payload, unpack_payload
+from model import merge_day_shards
+from services.batch import plan_chunks, plan_day_shards, run_scenarios, validate_batch
+from services.result_cache import etag_for, etag_matches, result_cache, result_key
+from services.roster_cache import prepare_payload, query_fields, roster_cache, run_cached_model, run_with_roster
+from services.schemas import FrontendOptions, FrontendPayload, FrontendRoster, ModelPayload, openapi_body, openapi_components
+from services import assets
+from services import jobs
+from services import metrics
+from services import rankings
+from services import sessions
+from services import workers
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    workers.start_pool()
+    yield
+    workers.shutdown_pool()
+
+
+app = FastAPI(title="MeetSync Backend", version="1.0.0", lifespan=lifespan)
+_fastapi_openapi = app.openapi
+
+
+def _openapi():
+    """FastAPI's schema plus the request models; routes read their bodies themselves, so they are added here."""
+    if app.openapi_schema is None:
+        schema = _fastapi_openapi()
+        schema.setdefault("components", {}).setdefault("schemas", {}).update(openapi_components())
+        app.openapi_schema = schema
+    return app.openapi_schema
+
+
+app.openapi = _openapi
+
+# Static files: the content-versioned tree first, then plain /static paths
+app.mount("/static", assets.StaticMount(), name="static")
+
+
+@app.middleware("http")
+async def timing(request: Request, call_next):
+    """
+    Per-request stage timings: reported in a Server-Timing header and folded into /metrics.
+    With profiling enabled (MEETSYNC_PROFILE_DIR), X-Profile: 1 samples the request's worker jobs.
+    """
+    trace = metrics.start_trace()
+    trace.profile = request.headers.get("x-profile") == "1"
+    started = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - started
+
+    response.headers["Server-Timing"] = trace.server_timing(elapsed)
+    if trace.profiles:
+        response.headers["X-Profile"] = ", ".join(trace.profiles)
+    route = getattr(request.scope.get("route"), "path", "other")
+    metrics.record_request(request.method, route, response.status_code, elapsed, trace)
+    return response
 
-from model import model
-from services.transformer import is_frontend_payload, transform_frontend_to_model_payload
-from templates import templates
 
-app = FastAPI(title="MeetSync Backend", version="1.0.0")
+def _page(request: Request, name: str) -> Response:
+    """
+    A shell page: pre-rendered and precompressed by the asset build (see services/assets.py), else
+    rendered from its template. Jinja is only imported in the second case.
+    """
+    page = assets.built_page(name, request.headers.get("accept-encoding"))
+    if page is None:
+        from templates import templates
+        return templates.TemplateResponse(request, assets.PAGES[name])
 
-# Static files
-app.mount("/static", StaticFiles(directory="static"), name="static")
+    body, encoding, etag = page
+    headers = {"ETag": etag, "Cache-Control": assets.REVALIDATE, "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return HTMLResponse(body, headers=headers)
 
 
 @app.get("/", response_class=HTMLResponse)
 async def main_page(request: Request):
-    return templates.TemplateResponse("main.html.jinja", {"request": request})
+    return _page(request, "main")
 
 
 @app.get("/results", response_class=HTMLResponse)
 async def results_page(request: Request):
-    return templates.TemplateResponse("results.html.jinja", {"request": request})
+    return _page(request, "results")
 
 
 @app.get("/health")
@@ -28,32 +101,349 @@ def health():
     return {"ok": True}
 
 
-@app.post("/call-model", response_class=JSONResponse)
+@app.get("/cache/stats")
+def cache_stats():
+    return {"roster": roster_cache.stats(), "results": result_cache.stats(), "rankings": rankings.stats()}
+
+
+@app.get("/workers/stats")
+def workers_stats():
+    return workers.stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Prometheus text format: request/stage latency histograms, scoring work counters, pool and cache gauges."""
+    gauges = {f"workers_{k}": v for k, v in workers.stats().items()}
+    gauges.update({f"roster_cache_{k}": v for k, v in roster_cache.stats().items()})
+    gauges.update({f"result_cache_{k}": v for k, v in result_cache.stats().items()})
+    gauges.update({f"rankings_{k}": v for k, v in rankings.stats().items()})
+    return PlainTextResponse(metrics.render_prometheus(gauges), media_type="text/plain; version=0.0.4")
+
+
+def _busy(exc: workers.Overloaded) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": str(exc.retry_after)})
+
+
+def _prepare(data: Any, media_type: str, body_key: str):
+    if media_type == PACKED_CONTENT_TYPE:
+        with metrics.stage("unpack"):
+            data = unpack_payload(data)
+    # Automatically transform frontend request → model payload; repeated rosters come from the cache
+    with metrics.stage("prepare"):
+        payload, roster, roster_key = prepare_payload(data, body_key)
+        key = result_key(payload, roster, roster_key)
+    return payload, roster, roster_key, key
+
+
+@app.post(
+    "/call-model", response_class=JSONResponse,
+    openapi_extra=openapi_body(FrontendPayload, ModelPayload, packed=True),
+)
 async def call_model(request: Request):
     """
     Primary backend entrypoint.
     Handles both raw model payloads and frontend payloads that need transformation.
+    Bodies may be gzip-compressed (Content-Encoding: gzip) and/or packed
+    (Content-Type: application/vnd.meetsync.packed+json, see services/codec.py).
+    Results are cached per normalized query and carry an ETag; If-None-Match gets 304.
     """
     try:
-        data = await request.json()
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid JSON body")
+        with metrics.stage("parse"):
+            data, media_type, body_key = await read_payload(request)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
 
     try:
-        # Automatically transform frontend request → model payload
-        payload = (
-            transform_frontend_to_model_payload(data)
-            if is_frontend_payload(data)
-            else data
+        # Unpacking, validation and compilation are CPU-bound too, so they stay off the event loop
+        payload, roster, roster_key, key = await run_in_threadpool(_prepare, data, media_type, body_key)
+        etag = etag_for(key)
+        # The ETag is a hash of the query, so a match needs neither the result nor any scoring
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        # Profiled requests are always scored, so there is something to sample
+        result = None if request.headers.get("x-profile") == "1" else result_cache.get(key)
+        if result is None:
+            # Scoring is CPU-bound: run it in the worker pool so the event loop keeps serving other requests.
+            # Long date ranges are split into day shards scored in parallel, then merged
+            # (recurrence and series rank across days, so they always run as one job).
+            across_days = "recurrence" in payload or "series" in payload
+            shards = [None] if across_days else plan_day_shards(roster, workers.worker_count())
+            query = query_fields(payload)
+            results = await run_with_roster(roster_key, roster, [
+                (run_cached_model, (query, shard)) for shard in shards
+            ], shards)
+            result = results[0] if len(shards) == 1 else merge_day_shards(payload, results)
+            result_cache.put(key, result)
+
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except workers.Overloaded as busy:
+        raise _busy(busy)
+    except workers.JobTimeout as timeout:
+        raise HTTPException(status_code=504, detail=str(timeout))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal error: {e}"
         )
-        result = model(payload)
+
+    with metrics.stage("encode"):
+        response = encode_response(result, media_type, request.headers.get("accept-encoding"))
+    response.headers["ETag"] = etag
+    return response
+
+
+@app.post(
+    "/jobs", response_class=JSONResponse, status_code=202,
+    openapi_extra=openapi_body(FrontendPayload, ModelPayload, packed=True),
+)
+async def submit_job(request: Request):
+    """
+    Start scoring a /call-model payload in the background and return its job_id right away.
+    Follow GET /jobs/{job_id}/events (Server-Sent Events) for progress and the running top-k.
+    """
+    try:
+        data, media_type, body_key = await read_payload(request)
+        if media_type == PACKED_CONTENT_TYPE:
+            data = await run_in_threadpool(unpack_payload, data)
+        job = await jobs.submit_job(data, body_key)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except workers.Overloaded as busy:
+        raise _busy(busy)
+    return JSONResponse(jobs.describe(job), status_code=202, headers={"Location": f"/jobs/{job['id']}"})
+
+
+def _job_or_404(job_id: str):
+    job = jobs.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    return job
+
+
+@app.get("/jobs/{job_id}", response_class=JSONResponse)
+async def get_job(job_id: str):
+    return JSONResponse(jobs.describe(_job_or_404(job_id)))
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Server-Sent Events: "progress" with the running top-k, then "done", "failed" or "cancelled"."""
+    return StreamingResponse(
+        jobs.events(_job_or_404(job_id)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.delete("/jobs/{job_id}", response_class=JSONResponse)
+async def cancel_job(job_id: str):
+    """Cancel an unfinished job, or forget a finished one."""
+    job = _job_or_404(job_id)
+    jobs.cancel_job(job)
+    return JSONResponse(jobs.describe(job))
+
+
+@app.post(
+    "/rankings", response_class=JSONResponse, status_code=201,
+    openapi_extra=openapi_body(FrontendPayload, ModelPayload, packed=True),
+)
+async def create_ranking(request: Request):
+    """
+    Score every window of a /call-model payload, keep the ranking for a while and return its first
+    top_k. Read on with GET /rankings/{ranking_id}?cursor=<next_cursor>, or stream the rest as NDJSON
+    from GET /rankings/{ranking_id}/stream.
+    """
+    try:
+        data, media_type, body_key = await read_payload(request)
+        if media_type == PACKED_CONTENT_TYPE:
+            data = await run_in_threadpool(unpack_payload, data)
+        # Rankings live in this process, so scoring runs in a thread rather than the worker pool
+        ranking = await workers.run_local(rankings.create_ranking, data, body_key)
+        first = await run_in_threadpool(rankings.page, ranking, 0)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except workers.Overloaded as busy:
+        raise _busy(busy)
+    except workers.JobTimeout as timeout:
+        raise HTTPException(status_code=504, detail=str(timeout))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal error: {e}")
+    return JSONResponse(first, status_code=201, headers={"Location": f"/rankings/{ranking['id']}"})
+
+
+def _ranking_or_404(ranking_id: str):
+    ranking = rankings.get_ranking(ranking_id)
+    if ranking is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired ranking")
+    return ranking
+
+
+@app.get("/rankings/{ranking_id}", response_class=JSONResponse)
+def get_ranking_page(ranking_id: str, cursor: Optional[str] = None, limit: Optional[int] = None):
+    """The page at cursor (default: the first), limit suggestions long (default: the query's top_k)."""
+    ranking = _ranking_or_404(ranking_id)
+    try:
+        return JSONResponse(rankings.page(ranking, rankings.parse_cursor(ranking, cursor), limit))
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+
+
+@app.get("/rankings/{ranking_id}/stream")
+def stream_ranking(ranking_id: str, cursor: Optional[str] = None):
+    """Every suggestion from cursor on, best first, as NDJSON (one JSON object per line)."""
+    ranking = _ranking_or_404(ranking_id)
+    try:
+        position = rankings.parse_cursor(ranking, cursor)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    return StreamingResponse(rankings.stream(ranking, position), media_type="application/x-ndjson")
+
+
+@app.delete("/rankings/{ranking_id}", response_class=JSONResponse)
+def delete_ranking(ranking_id: str):
+    if not rankings.delete_ranking(ranking_id):
+        raise HTTPException(status_code=404, detail="Unknown or expired ranking")
+    return JSONResponse({"ok": True})
+
+
+@app.post("/call-model/batch", response_class=JSONResponse)
+async def call_model_batch(request: Request):
+    """
+    Evaluate many scenarios against one roster.
+    Body: { roster: <frontend or model payload>, scenarios: [ {meeting_length_minutes, top_k, weights, ...}, ... ] }
+    The roster is validated and compiled once; scenarios are shallow overrides of its model payload.
+    Returns { results: [...] } in scenario order, each either { suggestions } or { error: "scenarios[i]: ..." }.
+    The roster may be packed when the body is sent as application/vnd.meetsync.packed+json.
+    """
+    try:
+        # The roster is only part of the body, so the body digest does not identify it
+        data, media_type, _ = await read_payload(request)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+
+    try:
+        roster_data, scenarios = validate_batch(data)
+        if media_type == PACKED_CONTENT_TYPE:
+            roster_data = await run_in_threadpool(unpack_payload, roster_data)
+        base, roster, roster_key = await run_in_threadpool(prepare_payload, roster_data)
+
+        chunks = plan_chunks(base, scenarios, workers.worker_count())
+        query = query_fields(base)
+        chunk_results = await run_with_roster(roster_key, roster, [
+            (run_scenarios, (query, [(i, scenarios[i]) for i in chunk])) for chunk in chunks
+        ])
 
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=str(ve))
+    except workers.Overloaded as busy:
+        raise _busy(busy)
+    except workers.JobTimeout as timeout:
+        raise HTTPException(status_code=504, detail=str(timeout))
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Internal error: {e}"
         )
 
+    results: list = [None] * len(scenarios)
+    for chunk, chunk_result in zip(chunks, chunk_results):
+        for i, result in zip(chunk, chunk_result):
+            results[i] = result
+    return encode_response({"results": results}, media_type, request.headers.get("accept-encoding"))
+
+
+async def _json_body(request: Request):
+    try:
+        return await request.json()
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+
+
+def _session_or_404(session_id: str):
+    session = sessions.get_session(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired session")
+    return session
+
+
+@app.post("/sessions", response_class=JSONResponse, openapi_extra=openapi_body(FrontendRoster))
+async def create_session(request: Request):
+    """
+    Create a stateful roster from a frontend payload ({ availability: [...] }).
+    Edits to single users then update the stored timelines incrementally.
+    """
+    data = await _json_body(request)
+    try:
+        session = await run_in_threadpool(sessions.create_session, data)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    return JSONResponse(sessions.describe(session))
+
+
+@app.get("/sessions/{session_id}", response_class=JSONResponse)
+def get_session(session_id: str):
+    return JSONResponse(sessions.describe(_session_or_404(session_id)))
+
+
+@app.delete("/sessions/{session_id}", response_class=JSONResponse)
+def delete_session(session_id: str):
+    if not sessions.delete_session(session_id):
+        raise HTTPException(status_code=404, detail="Unknown or expired session")
+    return JSONResponse({"ok": True})
+
+
+@app.post(
+    "/sessions/{session_id}/call-model", response_class=JSONResponse, openapi_extra=openapi_body(FrontendOptions)
+)
+async def call_session_model(session_id: str, request: Request):
+    """Same options as /call-model (meeting_length_minutes, top_k, weights, ...) without availability."""
+    session = _session_or_404(session_id)
+    data = await _json_body(request)
+    try:
+        # Session state lives in this process, so scoring runs in a thread rather than the worker pool
+        result = await workers.run_local(sessions.query_session, session, data)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except workers.Overloaded as busy:
+        raise _busy(busy)
+    except workers.JobTimeout as timeout:
+        raise HTTPException(status_code=504, detail=str(timeout))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal error: {e}")
     return JSONResponse(result)
+
+
+@app.post("/sessions/{session_id}/users", response_class=JSONResponse)
+async def add_session_user(session_id: str, request: Request):
+    session = _session_or_404(session_id)
+    data = await _json_body(request)
+    try:
+        # Edits wait on the session lock (held while the session is scored), so they run in a thread
+        affected = await run_in_threadpool(sessions.add_user, session, data)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    return JSONResponse({**sessions.describe(session), "affected_days": affected})
+
+
+@app.patch("/sessions/{session_id}/users/{name}", response_class=JSONResponse)
+async def update_session_user(session_id: str, name: str, request: Request):
+    """Body: { timeSlots?, priority? } for one existing user."""
+    session = _session_or_404(session_id)
+    data = await _json_body(request)
+    try:
+        affected = await run_in_threadpool(sessions.update_user, session, name, data)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    return JSONResponse({**sessions.describe(session), "affected_days": affected})
+
+
+@app.delete("/sessions/{session_id}/users/{name}", response_class=JSONResponse)
+def remove_session_user(session_id: str, name: str):
+    session = _session_or_404(session_id)
+    try:
+        affected = sessions.remove_user(session, name)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    return JSONResponse({**sessions.describe(session), "affected_days": affected})
@@ -1,9 +1,22 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterable, Tuple, Callable
+import heapq
 import math
 from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import chain, groupby
 import zoneinfo  # stdlib tz support (3.9+)
 
+from services.bitsets import DayBits, attendee_bits, bits_to_row, window_mask
+from services.metrics import count, stage
+
 DEFAULT_AVAIL_SCORES = {0: 0.0, 1: 0.5, 2: 1.0}
+ENGINES = ("python", "numpy", "intervals", "compressed")
+DEFAULT_ENGINE = "python"
+DEFAULT_SPARSE_ENGINE = "intervals"
+DEFAULT_TOP_K = 5
+MINUTES_PER_DAY = 24 * 60
+# Day labels understood by recurrence when days are not ISO dates; index = weekday (0=Mon)
+WEEKDAY_NAMES = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
 
 
 def _require_keys(obj: Dict[str, Any], keys: List[str], ctx: str):
@@ -25,68 +38,139 @@ def _window_sum(ps: List[float], start: int, length: int) -> float:
     return ps[start + length] - ps[start]
 
 
-def _coerce_priorities(attendees: List[Dict[str, Any]], default: float = 1.0):
-    """Ensure every attendee has a numeric priority; default to 1 if missing."""
-    for att in attendees:
-        att.setdefault("priority", default)
+def _with_priority(att: Dict[str, Any], default: float = 1.0) -> Dict[str, Any]:
+    """The attendee with a priority, defaulting to 1 if missing (a copy then; the caller's dict is left as is)."""
+    return att if "priority" in att else {**att, "priority": default}
+
+
+def _validate_intervals(intervals: List[Any], day_slot_counts: List[int], ctx: str):
+    for j, iv in enumerate(intervals):
+        if not isinstance(iv, dict):
+            raise ValueError(f"{ctx}[{j}] must be an object")
+        _require_keys(iv, ["day", "start", "end"], f"{ctx}[{j}]")
+        day, start, end = iv["day"], iv["start"], iv["end"]
+        if not all(isinstance(x, int) for x in (day, start, end)):
+            raise ValueError(f"{ctx}[{j}].day, start and end must be integers")
+        if iv.get("value", 0) not in (0, 1, 2):
+            raise ValueError(f"{ctx}[{j}].value must be 0 (busy), 1 (tentative) or 2 (available)")
+        if not 0 <= day < len(day_slot_counts):
+            raise ValueError(f"{ctx}[{j}].day must be in [0,{len(day_slot_counts) - 1}]")
+        if not 0 <= start < end <= day_slot_counts[day]:
+            raise ValueError(f"{ctx}[{j}] must satisfy 0 <= start < end <= {day_slot_counts[day]}")
+
+
+def _validate_bits(bits: Any, day_slot_counts: List[int], ctx: str):
+    if not isinstance(bits, dict):
+        raise ValueError(f"{ctx} must be an object")
+    _require_keys(bits, ["busy", "tentative"], ctx)
+    for key in ("busy", "tentative"):
+        if not isinstance(bits[key], list) or len(bits[key]) != len(day_slot_counts):
+            raise ValueError(f"{ctx}.{key} must have {len(day_slot_counts)} entries (one per day)")
+    for d, (busy, tentative) in enumerate(zip(bits["busy"], bits["tentative"])):
+        if not all(isinstance(x, int) and x >= 0 for x in (busy, tentative)):
+            raise ValueError(f"{ctx} day {d}: bitsets must be non-negative integers")
+        if max(busy.bit_length(), tentative.bit_length()) > day_slot_counts[d]:
+            raise ValueError(f"{ctx} day {d}: bitsets must fit in {day_slot_counts[d]} slots")
+        if busy & tentative:
+            raise ValueError(f"{ctx} day {d}: a slot cannot be both busy and tentative")
+
+
+@lru_cache(maxsize=1024)
+def _parse_iso_cached(s: str) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(s)  # YYYY-MM-DD
+    except ValueError:
+        return None
+
+
+def _parse_iso_day(day_label: Any) -> Optional[datetime]:
+    """Return the parsed date for ISO day labels, else None (e.g. "Monday", "day-1")."""
+    if not isinstance(day_label, str):
+        return None
+    return _parse_iso_cached(day_label)
 
 
 def _is_iso_date(s: str) -> bool:
+    return _parse_iso_day(s) is not None
+
+
+@lru_cache(maxsize=64)
+def _get_tzinfo(tz: str) -> Optional[zoneinfo.ZoneInfo]:
+    """Cached tz lookup; unknown or empty names fall back to naive (None)."""
+    if not tz:
+        return None
     try:
-        datetime.fromisoformat(s)  # YYYY-MM-DD
-        return True
+        return zoneinfo.ZoneInfo(tz)
     except Exception:
-        return False
+        return None
+
+
+@lru_cache(maxsize=256)
+def _parse_clock(value: str, allow_end_of_day: bool = False) -> int:
+    """Parse "HH:MM" into minutes since midnight ("24:00" only when allow_end_of_day)."""
+    try:
+        h, m = map(int, value.split(":"))
+    except Exception:
+        raise ValueError(f"Invalid time '{value}'; expected HH:MM")
+    if allow_end_of_day and (h, m) == (24, 0):
+        return MINUTES_PER_DAY
+    if not (0 <= h <= 23 and 0 <= m <= 59):
+        raise ValueError(f"Invalid time '{value}'; expected HH:MM between 00:00 and 23:59")
+    return h * 60 + m
 
 
 def _compute_day_timeline(
-    attendees: List[Dict[str, Any]],
-    day_idx: int,
+    rows: Iterable[List[int]],
+    weights: List[float],
     avail_scores: Dict[int, float]
 ) -> List[float]:
-    num_slots = len(attendees[0]["availability_matrix"][day_idx])
-    timeline = [0.0] * num_slots
-    for att in attendees:
-        w = float(att["priority"])
-        row = att["availability_matrix"][day_idx]
+    timeline = None
+    for w, row in zip(weights, rows):
+        if timeline is None:
+            timeline = [0.0] * len(row)
+        # Weighted score per cell value, once per attendee rather than once per cell
+        weighted = {v: w * float(score) for v, score in avail_scores.items()}
         for t, v in enumerate(row):
-            timeline[t] += w * float(avail_scores.get(v, 0.0))
+            timeline[t] += weighted.get(v, 0.0)
     return timeline
 
 
 def _analyze_window(
-    attendees: List[Dict[str, Any]],
-    day_idx: int,
+    day_bits: List[DayBits],
+    names: List[str],
+    weights: List[float],
     start: int,
     length: int,
     top_priority: float,
     hard_block: bool,
-    require_distinct_top: bool
+    distinct_top_ok: bool,
+    collect_names: bool = True
 ) -> Dict[str, Any]:
-    """Collect conflict/availability details and enforce optional hard-block logic."""
+    """
+    Collect conflict/availability details and enforce optional hard-block logic.
+    Each attendee-day is a (busy, tentative, other) bitset triple, so a conflict test is one mask AND
+    and tentative/available cell counts are popcounts.
+    With collect_names=False only conflict_count is filled (conflicts stays empty).
+    """
+    mask = window_mask(start, length)
     conflicts = []
+    conflict_count = 0
     unpreferred_cells = 0
     fully_available_attendees = 0
     total_full_avails = 0
 
-    # Only hard-block when there is exactly one person at the true top priority (if enabled)
-    distinct_top_ok = True
-    if require_distinct_top:
-        count_top = sum(1 for a in attendees if float(a["priority"]) == top_priority)
-        distinct_top_ok = (count_top == 1)
+    for a, (busy, tentative, other) in enumerate(day_bits):
+        has_zero = bool(busy & mask)
+        c1 = (tentative & mask).bit_count()
+        total_full_avails += length - ((busy | tentative | other) & mask).bit_count()
 
-    for att in attendees:
-        row = att["availability_matrix"][day_idx][start:start + length]
-        has_zero = any(v == 0 for v in row)
-        c2 = sum(1 for v in row if v == 2)
-        c1 = sum(1 for v in row if v == 1)
-        total_full_avails += c2
-
-        if has_zero and float(att["priority"]) == top_priority and hard_block and distinct_top_ok:
+        if has_zero and weights[a] == top_priority and hard_block and distinct_top_ok:
             return {"blocked": True}
 
         if has_zero:
-            conflicts.append(att["name"])
+            conflict_count += 1
+            if collect_names:
+                conflicts.append(names[a])
         if c1 > 0:
             unpreferred_cells += c1
         if c1 == 0 and not has_zero:
@@ -95,78 +179,161 @@ def _analyze_window(
     return {
         "blocked": False,
         "conflicts": conflicts,
+        "conflict_count": conflict_count,
         "unpreferred_cells": unpreferred_cells,
         "fully_available_attendees": fully_available_attendees,
         "total_full_avails": total_full_avails,
     }
 
 
-def _passes_global_blockers(
-    day_label: str,
-    start_idx: int,
-    L: int,
-    slot_minutes: int,
-    day_start: str,
-    tz: str,
-    blockers: Dict[str, Any]
-) -> bool:
+def _compile_blockers(blockers: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Enforce optional global blockers:
+    Parse optional global blockers once per request:
       blockers = {
         "hours": {"start":"08:00","end":"20:00"},  # inclusive start, exclusive end
         "lunch": {"start":"12:00","end":"13:00"},  # disallow any overlap
         "weekdays_disallowed": [5,6],             # 0=Mon ... 6=Sun (only meaningful if day_label is ISO)
       }
+    Clock values become minutes since midnight so per-window checks are integer comparisons.
     """
-    # If day_label is not ISO, we can still enforce hours/lunch relative to the day_start clock.
-    tzinfo = None
-    if tz:
-        try:
-            tzinfo = zoneinfo.ZoneInfo(tz)
-        except Exception:
-            tzinfo = None
-
-    # Anchor date: if ISO, use that date; else use an arbitrary reference day (1970-01-01).
-    if _is_iso_date(day_label):
-        base = datetime.fromisoformat(day_label)
-    else:
-        base = datetime(1970, 1, 1)  # purely for clock math
-
-    if tzinfo:
-        base = base.replace(tzinfo=tzinfo)
-
-    dh, dm = map(int, day_start.split(":"))
-    window_start = base.replace(hour=dh, minute=dm, second=0, microsecond=0) + timedelta(minutes=start_idx * slot_minutes)
-    window_end = window_start + timedelta(minutes=L * slot_minutes)
-
-    # weekday rule only if ISO date available
-    if blockers.get("weekdays_disallowed") and _is_iso_date(day_label):
-        if window_start.weekday() in blockers["weekdays_disallowed"]:
-            return False
+    compiled: Dict[str, Any] = {"hours": None, "lunch": None, "weekdays_disallowed": ()}
 
-    # Hours window
     if blockers.get("hours"):
         hs = blockers["hours"].get("start", "00:00")
         he = blockers["hours"].get("end", "24:00")
-        hs_h, hs_m = map(int, hs.split(":"))
-        he_h, he_m = map(int, he.split(":"))
-        day_open = window_start.replace(hour=hs_h, minute=hs_m)
-        day_close = window_start.replace(hour=he_h, minute=he_m)
-        if not (window_start >= day_open and window_end <= day_close):
-            print(start_idx, window_start, day_open, day_close, window_end)
-            return False
-            
-
-    # Lunch blackout
+        compiled["hours"] = (_parse_clock(hs), _parse_clock(he, allow_end_of_day=True))
+
     if blockers.get("lunch"):
-        ls_h, ls_m = map(int, blockers["lunch"]["start"].split(":"))
-        le_h, le_m = map(int, blockers["lunch"]["end"].split(":"))
-        lunch_start = window_start.replace(hour=ls_h, minute=ls_m)
-        lunch_end = window_start.replace(hour=le_h, minute=le_m)
-        if not (window_end <= lunch_start or window_start >= lunch_end):
-            return False
+        ls = blockers["lunch"].get("start", "00:00")
+        le = blockers["lunch"].get("end", "24:00")
+        compiled["lunch"] = (_parse_clock(ls), _parse_clock(le, allow_end_of_day=True))
+
+    if blockers.get("weekdays_disallowed"):
+        compiled["weekdays_disallowed"] = tuple(blockers["weekdays_disallowed"])
+
+    return compiled
+
+
+def _day_blocker_mask(
+    day_label: str,
+    num_starts: int,
+    L: int,
+    slot_minutes: int,
+    day_start: str,
+    compiled: Dict[str, Any]
+) -> List[bool]:
+    """
+    Return allowed[start] for every start index of one day.
+
+    All checks run on the local wall clock of the day: slot k starts at day_start + k * slot_minutes,
+    so business hours stay anchored to local time across DST transitions. Windows that run past
+    midnight are checked against the hours/lunch of the calendar day they start on.
+    Every engine calls this once per scored day, so it also counts the windows evaluated and
+    the ones each rule blocks (a window is counted under the first rule that rejects it).
+    """
+    with stage("blockers"):
+        base = _parse_iso_day(day_label)
+        offset = _parse_clock(day_start)
+        span = L * slot_minutes
+        hours = compiled["hours"]
+        lunch = compiled["lunch"]
+        weekdays = compiled["weekdays_disallowed"] if base is not None else ()
+        base_weekday = base.weekday() if base is not None else 0
+
+        mask = []
+        blocked_weekday = blocked_hours = blocked_lunch = 0
+        for start in range(num_starts):
+            ws = offset + start * slot_minutes
+            we = ws + span
+            day_offset, minute = divmod(ws, MINUTES_PER_DAY)
+            midnight = ws - minute
+
+            ok = True
+            if weekdays and (base_weekday + day_offset) % 7 in weekdays:
+                ok = False
+                blocked_weekday += 1
+            elif hours and not (ws >= midnight + hours[0] and we <= midnight + hours[1]):
+                ok = False
+                blocked_hours += 1
+            elif lunch and not (we <= midnight + lunch[0] or ws >= midnight + lunch[1]):
+                ok = False
+                blocked_lunch += 1
+            mask.append(ok)
+
+    count("windows_evaluated", num_starts)
+    count("windows_blocked_weekday", blocked_weekday)
+    count("windows_blocked_hours", blocked_hours)
+    count("windows_blocked_lunch", blocked_lunch)
+    return mask
+
+
+def _day_blocker_runs(
+    day_label: str,
+    num_starts: int,
+    L: int,
+    slot_minutes: int,
+    day_start: str,
+    compiled: Dict[str, Any]
+) -> List[Tuple[int, int]]:
+    """
+    _day_blocker_mask as sorted, disjoint runs [first, end) of allowed starts, solved per calendar day
+    in closed form, so the cost does not grow with the number of starts. Counts like the mask does.
+    """
+    with stage("blockers"):
+        base = _parse_iso_day(day_label)
+        offset = _parse_clock(day_start)
+        span = L * slot_minutes
+        hours = compiled["hours"]
+        lunch = compiled["lunch"]
+        weekdays = compiled["weekdays_disallowed"] if base is not None else ()
+        base_weekday = base.weekday() if base is not None else 0
+
+        def first_start_at(minute: int) -> int:
+            # First start whose window begins at or after minute (ceiling division)
+            return -((offset - minute) // slot_minutes)
 
-    return True
+        allowed: List[Tuple[int, int]] = []
+        blocked_weekday = blocked_hours = blocked_lunch = 0
+        lo, day_offset = 0, 0
+        while lo < num_starts:
+            midnight = day_offset * MINUTES_PER_DAY
+            hi = min(num_starts, first_start_at(midnight + MINUTES_PER_DAY))
+            if weekdays and (base_weekday + day_offset) % 7 in weekdays:
+                blocked_weekday += hi - lo
+            else:
+                first, end = lo, hi
+                if hours:
+                    first = max(lo, first_start_at(midnight + hours[0]))
+                    end = max(first, min(hi, first_start_at(midnight + hours[1] - span + 1)))
+                    blocked_hours += (hi - lo) - (end - first)
+                runs = [(first, end)]
+                if lunch:
+                    lunch_first = max(first, first_start_at(midnight + lunch[0] - span + 1))
+                    lunch_end = min(end, first_start_at(midnight + lunch[1]))
+                    if lunch_first < lunch_end:
+                        blocked_lunch += lunch_end - lunch_first
+                        runs = [(first, lunch_first), (lunch_end, end)]
+                allowed.extend(run for run in runs if run[0] < run[1])
+            lo, day_offset = hi, day_offset + 1
+
+    count("windows_evaluated", num_starts)
+    count("windows_blocked_weekday", blocked_weekday)
+    count("windows_blocked_hours", blocked_hours)
+    count("windows_blocked_lunch", blocked_lunch)
+    return allowed
+
+
+@lru_cache(maxsize=1024)
+def _day_anchor(day_label: str, day_start: str, tz: str) -> Optional[datetime]:
+    """Wall-clock datetime of slot 0 for an ISO day label (tz-aware when tz is valid), else None."""
+    base = _parse_iso_day(day_label)
+    if base is None:
+        return None
+    tzinfo = _get_tzinfo(tz)
+    if tzinfo:
+        base = base.replace(tzinfo=tzinfo)
+    h, m = divmod(_parse_clock(day_start), 60)
+    return base.replace(hour=h, minute=m, second=0, microsecond=0)
 
 
 def _slot_to_iso(
@@ -180,115 +347,739 @@ def _slot_to_iso(
     """
     Return start/end ISO strings if we have an ISO date; else return None for both.
     """
-    if not _is_iso_date(day_label):
+    anchor = _day_anchor(day_label, day_start, tz) if isinstance(day_label, str) else None
+    if anchor is None:
         return {"start_iso": None, "end_iso": None, "timezone": None}
 
-    tzinfo = None
-    if tz:
-        try:
-            tzinfo = zoneinfo.ZoneInfo(tz)
-        except Exception:
-            tzinfo = None
-
-    base = datetime.fromisoformat(day_label)
-    if tzinfo:
-        base = base.replace(tzinfo=tzinfo)
-
-    h, m = map(int, day_start.split(":"))
-    start_dt = base.replace(hour=h, minute=m, second=0, microsecond=0) + timedelta(minutes=start_idx * slot_minutes)
+    start_dt = anchor + timedelta(minutes=start_idx * slot_minutes)
     end_dt = start_dt + timedelta(minutes=L * slot_minutes)
     return {
         "start_iso": start_dt.isoformat(),
         "end_iso": end_dt.isoformat(),
-        "timezone": tz if tzinfo else None
+        "timezone": tz if _get_tzinfo(tz) else None
     }
 
 
-def model(data: dict) -> dict:
+# Compact ranking tuple: (-score, conflict_count, -fully_available, -coverage, start, day_idx).
+# Tuple order reproduces the public ranking (score desc, fewer conflicts, more fully-available
+# attendees, coverage desc, earlier start); day_idx last keeps the old stable-sort tie-break.
+Candidate = Tuple[float, int, int, float, int, int]
+
+
+def _window_candidate(
+    d_idx: int,
+    start: int,
+    score: float,
+    coverage: float,
+    conflict_count: int,
+    fully_available_attendees: int
+) -> Candidate:
+    # + 0.0 turns a -0.0 (a zero summed in another order) into 0.0, so every engine emits the same bytes
+    return (
+        -(round(score, 4) + 0.0), conflict_count, -fully_available_attendees, -(round(coverage, 4) + 0.0), start, d_idx
+    )
+
+
+def _select_top_k(candidates: Iterable[Candidate], top_k: int) -> List[Candidate]:
+    """Keep only the best top_k candidates (bounded heap, O(top_k) memory), best first."""
+    return heapq.nsmallest(top_k, candidates)
+
+
+def _make_suggestion(
+    day_label: str,
+    start: int,
+    L: int,
+    slot_minutes: int,
+    meeting_len_minutes: int,
+    score: float,
+    coverage: float,
+    conflicts: List[str],
+    fully_available_attendees: int,
+    day_start: str,
+    tz: str
+) -> Dict[str, Any]:
+    """Build the public suggestion record shared by every scoring engine."""
+    iso = _slot_to_iso(day_label, start, L, slot_minutes, day_start, tz)
+    return {
+        "day": day_label,
+        "start_slot_index": start,
+        "slot_minutes": slot_minutes,
+        "meeting_length_minutes": meeting_len_minutes,
+        "score": round(score, 4),
+        "coverage": round(coverage, 4),
+        "conflicts": conflicts,
+        "fully_available_attendees": fully_available_attendees,
+        "start_iso": iso["start_iso"],
+        "end_iso": iso["end_iso"],
+        "timezone": iso["timezone"]
+    }
+
+
+def _score_windows(
+    attendees: List[Dict[str, Any]],
+    days: List[str],
+    day_slot_counts: List[int],
+    L: int,
+    slot_minutes: int,
+    day_start: str,
+    blockers: Dict[str, Any],
+    avail_scores: Dict[int, float],
+    top_priority: float,
+    hard_block: bool,
+    require_distinct_top: bool,
+    unpref_penalty: float,
+    cache: Optional[Dict[str, Any]] = None,
+    day_indices: Optional[Iterable[int]] = None
+) -> Tuple[Iterable[Candidate], Callable[[int, int], List[str]]]:
     """
-    Backend scheduler/heuristic.
+    Reference (pure Python) engine: score every candidate window one at a time.
+    Returns a lazy stream of ranking candidates and a lookup for a window's conflict names.
+    Bitsets and per-day prefix sums are kept in cache (see compile_roster) for later queries.
+    When day_indices is given only those days are scored, in that order.
+    """
+    compiled_blockers = _compile_blockers(blockers)
+    min_att = blockers.get("min_attendees")
+    total_cells = len(attendees) * L if attendees else 1
+    names = [att["name"] for att in attendees]
+    weights = [float(att["priority"]) for att in attendees]
+    state = cache.get("python") if cache is not None else None
+    if state is None:
+        state = {"bits": [attendee_bits(att, len(days)) for att in attendees], "ps": {}}
+        if cache is not None:
+            cache["python"] = state
+    bits = state["bits"]
 
-    Required:
-      - slot_minutes: int
-      - meeting_length_minutes: int
-      - attendees: [{ name, priority?, availability_matrix: List[List[int]] }]
+    # Only hard-block when there is exactly one person at the true top priority (if enabled)
+    distinct_top_ok = True
+    if require_distinct_top:
+        distinct_top_ok = sum(1 for w in weights if w == top_priority) == 1
 
-    Optional:
-      - days: List[str]           # if omitted, inferred as ["day-1", ..., "day-N"]
-      - active_attendees: List[str]
-      - schedule: { day_start: "09:00", timezone: "America/New_York" }
-      - constraints: { global_blockers: { hours, lunch, weekdays_disallowed, min_attendees } }
-      - weights: {
-          avail_scores: {0|1|2 or "0"|"1"|"2": float},
-          unpreferred_penalty_per_person: float,
-          hard_block_for_high_priority: bool,
-          distinct_top_priority_only: bool
-        }
-      - top_k: int
+    def day_rows(d_idx: int) -> Iterable[List[int]]:
+        for att, att_bits in zip(attendees, bits):
+            if "availability_matrix" in att:
+                yield att["availability_matrix"][d_idx]
+            else:
+                yield bits_to_row(att_bits[d_idx][0], att_bits[d_idx][1], day_slot_counts[d_idx])
+
+    def candidates():
+        for d_idx in range(len(days)) if day_indices is None else day_indices:
+            day_label = days[d_idx]
+            if day_slot_counts[d_idx] < L:
+                continue
+
+            ps = state["ps"].get(d_idx)
+            if ps is None:
+                with stage("timeline"):
+                    ps = _prefix_sums(_compute_day_timeline(day_rows(d_idx), weights, avail_scores))
+                state["ps"][d_idx] = ps
+            num_starts = len(ps) - L
+            allowed = _day_blocker_mask(day_label, num_starts, L, slot_minutes, day_start, compiled_blockers)
+            day_bits = [att_bits[d_idx] for att_bits in bits]
+            blocked_priority = blocked_min_attendees = 0
+
+            for start in range(0, num_starts):
+                # Global blockers (time-window filters)
+                if not allowed[start]:
+                    continue
+
+                raw = float(_window_sum(ps, start, L))
+                details = _analyze_window(
+                    day_bits=day_bits,
+                    names=names,
+                    weights=weights,
+                    start=start,
+                    length=L,
+                    top_priority=top_priority,
+                    hard_block=hard_block,
+                    distinct_top_ok=distinct_top_ok,
+                    collect_names=False
+                )
+                if details.get("blocked"):
+                    blocked_priority += 1
+                    continue
+
+                # Optional min fully-available attendees
+                if isinstance(min_att, int) and details["fully_available_attendees"] < min_att:
+                    blocked_min_attendees += 1
+                    continue
+
+                score = raw - unpref_penalty * details["unpreferred_cells"]
+                coverage = details["total_full_avails"] / total_cells if total_cells else 0.0
+
+                yield _window_candidate(
+                    d_idx, start, score, coverage, details["conflict_count"], details["fully_available_attendees"]
+                )
+
+            count("windows_blocked_priority", blocked_priority)
+            count("windows_blocked_min_attendees", blocked_min_attendees)
+
+    def conflicts_for(d_idx: int, start: int) -> List[str]:
+        mask = window_mask(start, L)
+        return [names[a] for a, att_bits in enumerate(bits) if att_bits[d_idx][0] & mask]
+
+    return candidates(), conflicts_for
+
+
+def compile_roster(data: dict, validated: bool = False) -> Dict[str, Any]:
     """
-    _require_keys(data, ["slot_minutes", "meeting_length_minutes", "attendees"], "root")
+    Validate the attendee side of a model payload (attendees, days, slots per day) once.
 
-    slot_minutes = int(data["slot_minutes"])
-    meeting_len_minutes = int(data["meeting_length_minutes"])
-    attendees: List[Dict[str, Any]] = data["attendees"]
+    The returned roster can be handed to model(..., roster=roster) for any number of queries
+    (meeting length, weights, constraints, active_attendees, ...) over the same attendees.
+    Engines keep per-day timelines, prefix sums and packed arrays in roster["cache"], keyed by
+    the active attendee subset and avail_scores, so repeated queries skip that work.
+    validated: data was built by services.transformer (availability_bits attendees on one slot grid,
+    checked while parsing and painting them), so it is not checked again.
+    """
+    if validated:
+        return {
+            "attendees": list(data["attendees"]),
+            "days": data["days"],
+            "day_slot_counts": [data["slots_per_day"]] * len(data["days"]),
+            "sparse_form": "availability_bits",
+            "cache": {},
+        }
 
-    if slot_minutes <= 0:
-        raise ValueError("slot_minutes must be > 0")
-    if meeting_len_minutes <= 0:
-        raise ValueError("meeting_length_minutes must be > 0")
+    _require_keys(data, ["attendees"], "root")
+    attendees: List[Dict[str, Any]] = data["attendees"]
     if not isinstance(attendees, list) or not attendees:
         raise ValueError("attendees must be a non-empty list")
 
-    # Optional: filter to active attendees
-    active = set(data.get("active_attendees", []))
-    if active:
-        attendees = [a for a in attendees if a.get("name") in active]
-        if not attendees:
-            return {"suggestions": []}
-
-    # Validate attendees
+    # Validate attendees: each provides a dense availability_matrix, sparse intervals or bitsets
+    sparse_form = None
     for i, att in enumerate(attendees):
-        _require_keys(att, ["name", "availability_matrix"], f"attendees[{i}]")
-        if not isinstance(att["availability_matrix"], list) or not att["availability_matrix"]:
-            raise ValueError(f"attendees[{i}].availability_matrix must be a non-empty list of days")
+        _require_keys(att, ["name"], f"attendees[{i}]")
+        if "availability_matrix" in att:
+            if not isinstance(att["availability_matrix"], list) or not att["availability_matrix"]:
+                raise ValueError(f"attendees[{i}].availability_matrix must be a non-empty list of days")
+        elif "intervals" in att:
+            if not isinstance(att["intervals"], list):
+                raise ValueError(f"attendees[{i}].intervals must be a list")
+            sparse_form = sparse_form or "intervals"
+        elif "availability_bits" in att:
+            sparse_form = sparse_form or "availability_bits"
+        else:
+            raise ValueError(
+                f"Missing required field(s) in attendees[{i}]: availability_matrix, intervals or availability_bits"
+            )
+    dense = [att for att in attendees if "availability_matrix" in att]
 
     # Derive/infer days
     if "days" in data and isinstance(data["days"], list) and data["days"]:
         days: List[str] = data["days"]
-    else:
+    elif dense:
         # infer number of days from the first attendee
-        dcount = len(attendees[0]["availability_matrix"])
+        dcount = len(dense[0]["availability_matrix"])
         days = [f"day-{i+1}" for i in range(dcount)]
+    else:
+        raise ValueError(f"days is required when attendees use {sparse_form}")
 
     # Ensure each attendee has the same number of day rows
     for i, att in enumerate(attendees):
-        if len(att["availability_matrix"]) != len(days):
+        if "availability_matrix" in att and len(att["availability_matrix"]) != len(days):
             raise ValueError(f"attendees[{i}].availability_matrix must have {len(days)} rows (one per day)")
 
-    # Default priorities if omitted
-    _coerce_priorities(attendees, default=1.0)
+    # Default priorities if omitted; the roster gets its own list, as patch_roster edits it in place
+    attendees = [_with_priority(att) for att in attendees]
+
+    slots_per_day = data.get("slots_per_day")
+    if slots_per_day is not None and (not isinstance(slots_per_day, int) or slots_per_day <= 0):
+        raise ValueError("slots_per_day must be a positive integer")
+    if slots_per_day is None and not dense:
+        raise ValueError(f"slots_per_day is required when attendees use {sparse_form}")
 
     # Consistent slot counts per day
     day_slot_counts = []
     for d in range(len(days)):
-        slots_d = len(attendees[0]["availability_matrix"][d])
+        slots_d = len(dense[0]["availability_matrix"][d]) if dense else slots_per_day
         for i, att in enumerate(attendees):
-            if len(att["availability_matrix"][d]) != slots_d:
+            if "availability_matrix" in att and len(att["availability_matrix"][d]) != slots_d:
                 raise ValueError(f"All attendees must have the same number of slots on day index {d}.")
+        if sparse_form and slots_per_day is not None and slots_d != slots_per_day:
+            raise ValueError(f"slots_per_day ({slots_per_day}) does not match availability_matrix on day index {d}.")
         day_slot_counts.append(slots_d)
 
-    # Round meeting length up to slots; never error after coercion
-    L = math.ceil(meeting_len_minutes / slot_minutes)
-    if L <= 0:
-        L = 1
+    for i, att in enumerate(attendees):
+        if "availability_matrix" in att:
+            continue
+        if "intervals" in att:
+            _validate_intervals(att["intervals"], day_slot_counts, f"attendees[{i}].intervals")
+        else:
+            _validate_bits(att["availability_bits"], day_slot_counts, f"attendees[{i}].availability_bits")
+
+    return {
+        "attendees": attendees,
+        "days": days,
+        "day_slot_counts": day_slot_counts,
+        "sparse_form": sparse_form,
+        "cache": {},
+    }
+
+
+def slice_roster(roster: Dict[str, Any], day_indices: List[int]) -> Dict[str, Any]:
+    """
+    A compiled roster (see compile_roster) holding only the given days, in that order, with no
+    engine state. Days are scored independently, so model() over the slice gives the same
+    suggestions as model(..., day_indices=day_indices) over the whole roster.
+    """
+    position = {d: i for i, d in enumerate(day_indices)}
+    attendees = []
+    for att in roster["attendees"]:
+        if "availability_matrix" in att:
+            att = {**att, "availability_matrix": [att["availability_matrix"][d] for d in day_indices]}
+        elif "intervals" in att:
+            att = {**att, "intervals": [
+                {**iv, "day": position[iv["day"]]} for iv in att["intervals"] if iv["day"] in position
+            ]}
+        else:
+            bits = att["availability_bits"]
+            att = {**att, "availability_bits": {key: [bits[key][d] for d in day_indices] for key in ("busy", "tentative")}}
+        attendees.append(att)
+    return {
+        "attendees": attendees,
+        "days": [roster["days"][d] for d in day_indices],
+        "day_slot_counts": [roster["day_slot_counts"][d] for d in day_indices],
+        "sparse_form": roster["sparse_form"],
+        "cache": {},
+    }
+
+
+def _attendee_rows(att: Dict[str, Any], day_slot_counts: List[int]) -> List[List[int]]:
+    if "availability_matrix" in att:
+        return att["availability_matrix"]
+    return [
+        bits_to_row(busy, tentative, num_slots)
+        for (busy, tentative, _), num_slots in zip(attendee_bits(att, len(day_slot_counts)), day_slot_counts)
+    ]
+
+
+def _timeline_delta(
+    old_row: Optional[List[int]],
+    old_weight: float,
+    new_row: Optional[List[int]],
+    new_weight: float,
+    num_slots: int,
+    avail_scores: Dict[int, float]
+) -> List[float]:
+    """Change of one day's weighted timeline when one attendee's row/weight is replaced (None = absent)."""
+    delta = [0.0] * num_slots
+    for row, w in ((old_row, -old_weight), (new_row, new_weight)):
+        if row is None:
+            continue
+        weighted = {v: w * float(score) for v, score in avail_scores.items()}
+        for t, v in enumerate(row):
+            delta[t] += weighted.get(v, 0.0)
+    return delta
+
+
+def _shift_prefix_sums(ps: List[float], delta: List[float]) -> List[float]:
+    """Prefix sums of (timeline + delta), given the prefix sums of timeline."""
+    return [p + d for p, d in zip(ps, _prefix_sums(delta))]
+
+
+def _patch_python_state(
+    state: Dict[str, Any],
+    op: str,
+    pos: int,
+    old: Optional[Dict[str, Any]],
+    new: Optional[Dict[str, Any]],
+    day_slot_counts: List[int],
+    avail_scores: Dict[int, float]
+):
+    if op == "update":
+        state["bits"][pos] = attendee_bits(new, len(day_slot_counts))
+    elif op == "add":
+        state["bits"].insert(pos, attendee_bits(new, len(day_slot_counts)))
+    else:
+        del state["bits"][pos]
+
+    old_rows = _attendee_rows(old, day_slot_counts) if old else None
+    new_rows = _attendee_rows(new, day_slot_counts) if new else None
+    old_w = float(old["priority"]) if old else 0.0
+    new_w = float(new["priority"]) if new else 0.0
+    for d_idx, ps in state["ps"].items():
+        old_row = old_rows[d_idx] if old_rows else None
+        new_row = new_rows[d_idx] if new_rows else None
+        if old_row == new_row and old_w == new_w:
+            continue
+        delta = _timeline_delta(old_row, old_w, new_row, new_w, day_slot_counts[d_idx], avail_scores)
+        state["ps"][d_idx] = _shift_prefix_sums(ps, delta)
+
+
+def _patch_states(
+    states: Dict[str, Any],
+    op: str,
+    pos: int,
+    old: Optional[Dict[str, Any]],
+    new: Optional[Dict[str, Any]],
+    day_slot_counts: List[int],
+    avail_scores: Dict[int, float]
+):
+    """Patch every engine's cached state for one attendee edit at position pos of the subset."""
+    # Group quorum indexes are keyed by member positions; they are rebuilt lazily per day
+    states.pop("groups", None)
+    if "python" in states:
+        _patch_python_state(states["python"], op, pos, old, new, day_slot_counts, avail_scores)
+    if "intervals" in states:
+        from services.intervals import patch_intervals_state
+        patch_intervals_state(states["intervals"], op, pos, old, new, day_slot_counts, avail_scores)
+    if "compressed" in states:
+        from services.compressed import patch_compressed_state
+        patch_compressed_state(states["compressed"], op, pos, old, new, day_slot_counts)
+    if "numpy" in states:
+        from services.vectorized import patch_vectorized_state
+        patch_vectorized_state(states["numpy"], op, pos, old, new, day_slot_counts, avail_scores)
+
+
+def patch_roster(
+    roster: Dict[str, Any], op: str, index: int, attendee: Optional[Dict[str, Any]] = None, validated: bool = False
+) -> List[int]:
+    """
+    Apply one attendee edit to a compiled roster (see compile_roster) in place.
+      - op "update": replace attendees[index] with attendee
+      - op "add": append attendee
+      - op "remove": drop attendees[index]
+
+    Cached engine state is patched instead of rebuilt: per-day timelines/prefix sums get the old
+    attendee's contribution subtracted and the new one added, so the cost follows the edit, not
+    the roster size. Patched sums can differ from a fresh compile only by float summation order.
+    Returns the indices of the days whose rankings may have changed.
+    validated: attendee was built by services.transformer, so it is not checked again (see compile_roster).
+    """
+    if op not in ("update", "add", "remove"):
+        raise ValueError("op must be one of: update, add, remove")
+    attendees: List[Dict[str, Any]] = roster["attendees"]
+    day_slot_counts: List[int] = roster["day_slot_counts"]
+    if op != "add" and not 0 <= index < len(attendees):
+        raise ValueError(f"attendee index must be in [0,{len(attendees) - 1}]")
+    if op == "add":
+        index = len(attendees)
+    if op == "remove" and len(attendees) == 1:
+        raise ValueError("attendees must be a non-empty list")
+
+    if op != "remove":
+        if not validated:
+            _require_keys(attendee, ["name"], "attendee")
+            if "intervals" in attendee:
+                _validate_intervals(attendee["intervals"], day_slot_counts, "attendee.intervals")
+            elif "availability_bits" in attendee:
+                _validate_bits(attendee["availability_bits"], day_slot_counts, "attendee.availability_bits")
+            else:
+                raise ValueError("Missing required field(s) in attendee: intervals or availability_bits")
+        attendee = _with_priority(attendee)
+        roster["sparse_form"] = roster["sparse_form"] or ("intervals" if "intervals" in attendee else "availability_bits")
+    old = attendees[index] if op != "add" else None
+
+    # Days to re-rank: all of them when the weight changes (the available-cell base moves everywhere)
+    affected = list(range(len(day_slot_counts)))
+    if op == "update" and float(old["priority"]) == float(attendee["priority"]):
+        old_rows = _attendee_rows(old, day_slot_counts)
+        new_rows = _attendee_rows(attendee, day_slot_counts)
+        affected = [d for d in affected if old_rows[d] != new_rows[d]]
+
+    n_old = len(attendees)
+    patched: Dict[Any, Dict[str, Any]] = {}
+    for (subset, scores), states in roster["cache"].items():
+        if op == "update":
+            pos = subset.index(index) if index in subset else None
+            new_subset = subset
+        elif op == "remove":
+            pos = subset.index(index) if index in subset else None
+            new_subset = tuple(i - (i > index) for i in subset if i != index)
+        else:
+            # Only the whole-roster entry gains the new attendee; named subsets never listed it
+            pos = n_old if subset == tuple(range(n_old)) else None
+            new_subset = subset + (n_old,) if pos is not None else subset
+        if not new_subset:
+            continue
+        if pos is not None:
+            _patch_states(states, op, pos, old, attendee, day_slot_counts, dict(scores))
+        patched.setdefault((new_subset, scores), states)
+    roster["cache"] = patched
+
+    if op == "update":
+        attendees[index] = attendee
+    elif op == "add":
+        attendees.append(attendee)
+    else:
+        del attendees[index]
+    return affected
+
+
+def _rank_by_day(candidates: Iterable[Candidate], top_k: int) -> Dict[int, List[Candidate]]:
+    """Per-day top_k lists from a candidate stream that yields one day at a time."""
+    return {d_idx: heapq.nsmallest(top_k, group) for d_idx, group in groupby(candidates, key=lambda c: c[5])}
+
+
+def _meeting_lengths(length_range: Dict[str, int], slot_minutes: int) -> List[int]:
+    """Window lengths in slots for meeting_length_range: every length from min (rounded up) to max."""
+    lo, hi = length_range["min"], length_range["max"]
+    first = math.ceil(lo / slot_minutes)
+    return list(range(first, max(first, hi // slot_minutes) + 1))
+
+
+def _with_quorum(candidates: Iterable[Candidate], quorum_ok: Callable[[int, int], List[bool]], L: int) -> Iterable[Candidate]:
+    """Drop candidates whose attendee groups miss their quorum (see services.groups.quorum_filter)."""
+    d_idx = met = None
+    blocked = 0
+    for c in candidates:
+        if c[5] != d_idx:
+            d_idx = c[5]
+            met = quorum_ok(d_idx, L)
+        if met[c[4]]:
+            yield c
+        else:
+            blocked += 1
+    count("windows_blocked_quorum", blocked)
+
+
+def _with_length(candidates: Iterable[Candidate], L: int, bonus: float) -> Iterable[Candidate]:
+    """Tag candidates with their length in slots (ranked after day_idx) and add the length preference."""
+    for c in candidates:
+        yield (-round(bonus - c[0], 4),) + c[1:] + (L,)
+
+
+def _day_weekday(day_label: Any) -> Optional[int]:
+    """Weekday (0=Mon) of an ISO date or weekday-name day label, else None."""
+    base = _parse_iso_day(day_label)
+    if base is not None:
+        return base.weekday()
+    return WEEKDAY_NAMES.index(day_label) if day_label in WEEKDAY_NAMES else None
+
+
+def _recurring_days(recurrence: Dict[str, Any], days: List[str], shard: Iterable[int]) -> Tuple[str, List[int]]:
+    """
+    Label of a recurrence ({ frequency: "weekly", weekday: 0-6 } or { frequency: "weekdays" })
+    and the indices of the days in shard it falls on.
+    """
+    if recurrence["frequency"] == "weekly":
+        weekday = recurrence["weekday"]
+        label, on_days = WEEKDAY_NAMES[weekday], (weekday,)
+    else:
+        label, on_days = "Weekdays", (0, 1, 2, 3, 4)
+
+    occurrences = []
+    for d_idx in shard:
+        weekday = _day_weekday(days[d_idx])
+        if weekday is None:
+            raise ValueError("recurrence needs ISO date or weekday-name day labels")
+        if weekday in on_days:
+            occurrences.append(d_idx)
+    if not occurrences:
+        raise ValueError("recurrence does not fall on any of the days")
+    return label, occurrences
+
+
+def _series_options(series: Dict[str, Any]) -> Tuple[int, bool, int]:
+    """series ({ count, one_per_day?, min_gap_minutes? }) as (count, one_per_day, min_gap_minutes)."""
+    return series["count"], series.get("one_per_day", False), series.get("min_gap_minutes", 0)
+
+
+def _day_offsets(days: List[str]) -> List[int]:
+    """Minutes from the first day to each day: calendar distance for ISO labels, else one day per label."""
+    dates = [_parse_iso_day(day_label) for day_label in days]
+    if any(d is None for d in dates):
+        return [d_idx * MINUTES_PER_DAY for d_idx in range(len(days))]
+    return [(d - dates[0]).days * MINUTES_PER_DAY for d in dates]
+
+
+def _make_recurring_suggestion(
+    label: str,
+    start: int,
+    L: int,
+    slot_minutes: int,
+    meeting_len_minutes: int,
+    score: float,
+    total_conflicts: int,
+    worst_fully: int,
+    worst_coverage: float,
+    occurrences: List[Dict[str, Any]],
+    day_start: str
+) -> Dict[str, Any]:
+    """Public record of a recurring slot: aggregates first, then one _make_suggestion per occurrence."""
+    conflicts = list(dict.fromkeys(name for occ in occurrences for name in occ["conflicts"]))
+    h, m = divmod((_parse_clock(day_start) + start * slot_minutes) % MINUTES_PER_DAY, 60)
+    return {
+        "day": label,
+        "time_of_day": f"{h:02d}:{m:02d}",
+        "start_slot_index": start,
+        "slot_minutes": slot_minutes,
+        "meeting_length_minutes": meeting_len_minutes,
+        "score": round(score, 4),
+        "coverage": round(sum(occ["coverage"] for occ in occurrences) / len(occurrences), 4),
+        "worst_case_coverage": round(worst_coverage, 4),
+        "conflicts": conflicts,
+        "total_conflicts": total_conflicts,
+        "fully_available_attendees": worst_fully,
+        "occurrences": occurrences,
+    }
+
+
+def _weight(weights: Dict[str, Any], key: str, default: Any) -> Any:
+    """A weights field, or default when it is missing or null."""
+    value = weights.get(key)
+    return default if value is None else value
+
+
+def normalize_query(data: dict, roster: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The per-query fields of a model payload (everything but the attendee side) with model()'s
+    defaults filled in, so payloads that model() treats alike normalize to equal dicts.
+    Used to key cached results (see services.result_cache).
+    """
+    weights = data.get("weights", {})
+    avail_scores_cfg = weights.get("avail_scores")
+    if isinstance(avail_scores_cfg, dict):
+        avail_scores = {int(k): float(v) for k, v in avail_scores_cfg.items()}
+    else:
+        avail_scores = DEFAULT_AVAIL_SCORES
+    schedule_cfg = data.get("schedule") or {}
+
+    query = {k: v for k, v in data.items() if k not in ("attendees", "days", "slots_per_day")}
+    if "meeting_length_range" in data:
+        query.pop("meeting_length_minutes", None)
+    query.update(
+        schedule={
+            "day_start": schedule_cfg.get("day_start", "00:00"),
+            "timezone": schedule_cfg.get("timezone", "America/New_York"),
+        },
+        weights={
+            **weights,
+            "avail_scores": sorted(avail_scores.items()),
+            "hard_block_for_high_priority": bool(_weight(weights, "hard_block_for_high_priority", True)),
+            "distinct_top_priority_only": bool(_weight(weights, "distinct_top_priority_only", True)),
+            "unpreferred_penalty_per_person": float(_weight(weights, "unpreferred_penalty_per_person", 0.0)),
+            "length_preference_per_minute": float(_weight(weights, "length_preference_per_minute", 0.0)),
+        },
+        constraints=data.get("constraints", {}),
+        active_attendees=sorted(set(data.get("active_attendees") or []), key=str),
+        top_k=int(data.get("top_k", DEFAULT_TOP_K)),
+        engine=data.get("engine") or (DEFAULT_SPARSE_ENGINE if roster["sparse_form"] else DEFAULT_ENGINE),
+    )
+    return query
+
+
+def merge_day_shards(data: dict, results: List[dict]) -> dict:
+    """
+    Combine model() results for contiguous day shards, given in day order, into the result of one
+    model() call over all of them. Each shard holds its own top_k, so the global top_k is among them;
+    the sort is stable, so ties still go to the earlier day as in a single call.
+    """
+    top_k = int(data.get("top_k", DEFAULT_TOP_K))
+    return {"suggestions": heapq.nsmallest(
+        top_k,
+        chain.from_iterable(result["suggestions"] for result in results),
+        key=lambda s: (
+            -s["score"], len(s["conflicts"]), -s["fully_available_attendees"], -s["coverage"], s["start_slot_index"]
+        ),
+    )}
+
+
+def model(
+    data: dict,
+    roster: Optional[Dict[str, Any]] = None,
+    day_ranking: Optional[Dict[int, List[Candidate]]] = None,
+    day_indices: Optional[List[int]] = None,
+    ranking: Optional[Dict[str, Any]] = None
+) -> dict:
+    """
+    Backend scheduler/heuristic.
+    Requests are validated against services.schemas.ModelQuery first; for direct callers only
+    slot_minutes and the meeting length are checked here. The attendee side is checked by compile_roster.
+
+    Required:
+      - slot_minutes: int
+      - meeting_length_minutes: int
+      - attendees: [{ name, priority?, availability_matrix: List[List[int]] }]
+          or, sparse: [{ name, priority?, intervals: [{ day, start, end, value? }] }]
+          (slot indices, end exclusive; value 0=busy (default), 1=tentative; uncovered slots are 2)
+          or, bit-packed: [{ name, priority?, availability_bits: { busy: [int], tentative: [int] } }]
+          (one int per day; bit t set = slot t busy/tentative; everything else is 2)
+
+    Optional:
+      - days: List[str]           # if omitted, inferred as ["day-1", ..., "day-N"]; required for sparse forms
+      - slots_per_day: int        # required when no attendee has an availability_matrix
+      - active_attendees: List[str]
+      - schedule: { day_start: "09:00", timezone: "America/New_York" }
+      - constraints: { global_blockers: { hours, lunch, weekdays_disallowed, min_attendees } }
+      - constraints.groups: [{ name, members: [attendee names], min_available?: int | min_percent?: float }]
+          # every group needs that many members (default: all of them) without a busy slot in the window
+      - weights: {
+          avail_scores: {0|1|2 or "0"|"1"|"2": float},
+          unpreferred_penalty_per_person: float,
+          hard_block_for_high_priority: bool,
+          distinct_top_priority_only: bool
+        }
+      - meeting_length_range: { min: int, max: int }
+          # minutes; replaces meeting_length_minutes and ranks every length from min to max (in whole
+          # slots) together, each suggestion reporting its own meeting_length_minutes
+      - weights.length_preference_per_minute: float
+          # added to a window's score per minute of its length (negative = prefer shorter meetings)
+      - recurrence: { frequency: "weekly", weekday: 0-6 } | { frequency: "weekdays" }
+          # rank a time of day across every matching day (ISO or weekday-name labels) instead of
+          # single windows: a slot must be allowed on every occurrence and is ranked by its mean score,
+          # with per-occurrence details (see _make_recurring_suggestion)
+      - series: { count: int, one_per_day?: bool, min_gap_minutes?: int }
+          # book count non-overlapping windows with the highest total score instead of top_k
+          # alternatives; suggestions come in time order and the result adds total_score
+      - top_k: int
+      - engine: "python" | "numpy" | "intervals" | "compressed"
+          # python/numpy produce identical output; intervals (default for sparse/bit-packed input)
+          # sweeps interval endpoints instead of scanning slot grids; compressed works on the distinct
+          # segment boundaries only, so its cost does not grow with the slot resolution
+
+    roster: optional result of compile_roster(data) to reuse across queries; when given, the
+    attendee fields of data (attendees, days, slots_per_day) are not re-validated.
+    day_ranking: optional per-day top_k store for repeated identical queries against an evolving
+    roster (see patch_roster); days already in it are not re-scored and missing days are filled in.
+    It is not used for recurrence and series queries, which rank across days.
+    day_indices: optional ascending subset of days to rank (one shard of a long date range, see
+    merge_day_shards); suggestions then come only from those days.
+    ranking: optional dict that receives every window, not only the top_k: "heap" (all candidates,
+    heapified, so they can be popped in rank order), "total" and "suggest" (candidate -> suggestion).
+    Used to page through the full ranking (see services.rankings); not for recurrence or series.
+    The result then has no suggestions.
+    """
+    length_range = data.get("meeting_length_range")
+    slot_minutes = int(data["slot_minutes"])
+    if slot_minutes <= 0:
+        raise ValueError("slot_minutes must be > 0")
+
+    if length_range is None:
+        meeting_len_minutes = int(data["meeting_length_minutes"])
+        if meeting_len_minutes <= 0:
+            raise ValueError("meeting_length_minutes must be > 0")
+        # Round meeting length up to slots; never error after coercion
+        L = math.ceil(meeting_len_minutes / slot_minutes)
+        if L <= 0:
+            L = 1
+        lengths = [L]
+    else:
+        lengths = _meeting_lengths(length_range, slot_minutes)
+
+    if roster is None:
+        with stage("compile"):
+            roster = compile_roster(data)
+    attendees: List[Dict[str, Any]] = roster["attendees"]
+    days: List[str] = roster["days"]
+    day_slot_counts: List[int] = roster["day_slot_counts"]
+
+    # Optional: filter to active attendees
+    subset = range(len(attendees))
+    active = set(data.get("active_attendees") or [])
+    if active:
+        subset = [i for i, a in enumerate(attendees) if a.get("name") in active]
+        if not subset:
+            return {"suggestions": []}
+        attendees = [attendees[i] for i in subset]
 
     # Config blocks
-    schedule_cfg = data.get("schedule", {})
+    schedule_cfg = data.get("schedule") or {}
     day_start = schedule_cfg.get("day_start", "00:00")
     timezone = schedule_cfg.get("timezone", "America/New_York")
 
     constraints = data.get("constraints", {})
-    blockers = constraints.get("global_blockers", {})
+    blockers = constraints.get("global_blockers") or {}
 
     weights = data.get("weights", {})
     avail_scores_cfg = weights.get("avail_scores")
@@ -297,73 +1088,147 @@ def model(data: dict) -> dict:
     else:
         avail_scores = DEFAULT_AVAIL_SCORES
 
-    hard_block = bool(weights.get("hard_block_for_high_priority", True))
-    require_distinct_top = bool(weights.get("distinct_top_priority_only", True))  # default True per your task
-    unpref_penalty = float(weights.get("unpreferred_penalty_per_person", 0.0))
-    top_k = int(data.get("top_k", 5))
+    hard_block = bool(_weight(weights, "hard_block_for_high_priority", True))
+    require_distinct_top = bool(_weight(weights, "distinct_top_priority_only", True))  # default True per your task
+    unpref_penalty = float(_weight(weights, "unpreferred_penalty_per_person", 0.0))
+    length_preference = float(_weight(weights, "length_preference_per_minute", 0.0))
+    top_k = int(data.get("top_k", DEFAULT_TOP_K))
+    engine = data.get("engine") or (DEFAULT_SPARSE_ENGINE if roster["sparse_form"] else DEFAULT_ENGINE)
 
     top_priority = max(float(att["priority"]) for att in attendees)
+    cache = roster["cache"].setdefault((tuple(subset), tuple(sorted(avail_scores.items()))), {})
 
-    suggestions: List[Dict[str, Any]] = []
+    quorum_ok = None
+    if constraints.get("groups"):
+        from services.groups import compile_groups, quorum_filter
+        rules = compile_groups(constraints["groups"], [att["name"] for att in roster["attendees"]], subset)
+        if rules:
+            quorum_ok = quorum_filter(rules, attendees, day_slot_counts, cache)
 
-    for d_idx, day_label in enumerate(days):
-        if day_slot_counts[d_idx] < L:
-            continue
+    engine_args = dict(
+        attendees=attendees,
+        days=days,
+        day_slot_counts=day_slot_counts,
+        slot_minutes=slot_minutes,
+        day_start=day_start,
+        blockers=blockers,
+        avail_scores=avail_scores,
+        top_priority=top_priority,
+        hard_block=hard_block,
+        require_distinct_top=require_distinct_top,
+        unpref_penalty=unpref_penalty,
+        cache=cache,
+    )
+    shard = range(len(days)) if day_indices is None else day_indices
+    scored_days = shard
+    recurrence = data.get("recurrence")
+    series = data.get("series")
+    if ranking is not None and (recurrence is not None or series is not None):
+        raise ValueError("full rankings are not available for recurrence or series queries")
+    if series is not None:
+        series_count, one_per_day, min_gap = _series_options(series)
+        day_ranking = None
+    if recurrence is not None:
+        recurrence_label, scored_days = _recurring_days(recurrence, days, shard)
+        day_ranking = None
+        engine_args["day_indices"] = scored_days
+    elif day_ranking is not None or day_indices is not None:
+        if day_ranking is not None:
+            scored_days = [d for d in shard if d not in day_ranking]
+        engine_args["day_indices"] = scored_days
+    count("cells_processed", len(attendees) * sum(
+        day_slot_counts[d] for L in lengths for d in scored_days if day_slot_counts[d] >= L
+    ))
 
-        timeline = _compute_day_timeline(attendees, d_idx, avail_scores)
-        ps = _prefix_sums(timeline)
+    if engine == "numpy":
+        # Imported lazily so numpy is only loaded when the vectorized engine is requested
+        from services.vectorized import score_windows_vectorized as score_windows
+    elif engine == "intervals":
+        from services.intervals import score_windows_intervals as score_windows
+    elif engine == "compressed":
+        from services.compressed import score_windows_compressed as score_windows
+        if recurrence is None and series is None and quorum_ok is None and ranking is None:
+            # Plain top-k needs only the top_k best windows of each piece (see score_windows_compressed)
+            engine_args["limit"] = top_k
+    else:
+        score_windows = _score_windows
 
-        for start in range(0, len(timeline) - L + 1):
-            # Global blockers (time-window filters)
-            if not _passes_global_blockers(day_label, start, L, slot_minutes, day_start, timezone, blockers):
-                continue
+    # "scan" is scoring plus ranking; timeline and blocker work inside it are timed separately
+    with stage("scan"):
+        # One engine pass per length, started only when the previous one is consumed; all of them
+        # share the length-independent state (timelines, prefix sums, cumulative counts) in the cache
+        conflicts_by_length: Dict[int, Callable[[int, int], List[str]]] = {}
+
+        def length_streams() -> Iterable[Iterable[Candidate]]:
+            for L in lengths:
+                candidates, conflicts_by_length[L] = score_windows(L=L, **engine_args)
+                if quorum_ok is not None:
+                    candidates = _with_quorum(candidates, quorum_ok, L)
+                if length_range is not None:
+                    candidates = _with_length(candidates, L, length_preference * L * slot_minutes)
+                yield candidates
 
-            raw = float(_window_sum(ps, start, L))
-            details = _analyze_window(
-                attendees=attendees,
-                day_idx=d_idx,
-                start=start,
-                length=L,
-                top_priority=top_priority,
-                hard_block=hard_block,
-                require_distinct_top=require_distinct_top
+        streams = length_streams()
+
+        # Rank without materializing every window; details are built only for the survivors
+        if recurrence is not None:
+            # Imported lazily like the numpy engine: occurrences are stacked on a day axis and reduced at once
+            from services.recurring import rank_recurring, stack_occurrences
+            occurrence_details = {}
+            ranked = []
+            for L, candidates in zip(lengths, streams):
+                best, occurrence_details[L] = rank_recurring(stack_occurrences(candidates, scored_days), L, top_k)
+                ranked = heapq.nsmallest(top_k, chain(ranked, best))
+        elif series is not None:
+            from services.series import pack_series
+            ranked = pack_series(
+                chain.from_iterable(streams), _day_offsets(days), _parse_clock(day_start), slot_minutes,
+                lengths[0], series_count, one_per_day, min_gap
             )
-            if details.get("blocked"):
-                continue
+        elif ranking is not None:
+            # Heapify is linear; the order beyond the first page is only paid for as it is read
+            heap = list(chain.from_iterable(streams))
+            heapq.heapify(heap)
+        elif day_ranking is None:
+            ranked = _select_top_k(chain.from_iterable(streams), top_k)
+        else:
+            day_ranking.update({d: [] for d in scored_days})
+            for candidates in streams:
+                for d_idx, best in _rank_by_day(candidates, top_k).items():
+                    day_ranking[d_idx] = heapq.nsmallest(top_k, chain(day_ranking[d_idx], best))
+            ranked = heapq.nsmallest(top_k, chain.from_iterable(day_ranking[d] for d in shard))
 
-            # Optional min fully-available attendees
-            min_att = blockers.get("min_attendees")
-            if isinstance(min_att, int) and details["fully_available_attendees"] < min_att:
-                continue
+    with stage("suggest"):
+        suggestions = []
+        if recurrence is not None:
+            for neg_score, total_conflicts, neg_fully, neg_coverage, start, L in ranked:
+                minutes = L * slot_minutes if length_range is not None else meeting_len_minutes
+                occurrences = [
+                    _make_suggestion(
+                        days[d_idx], start, L, slot_minutes, minutes, score, coverage,
+                        conflicts_by_length[L](d_idx, start), fully, day_start, timezone
+                    )
+                    for d_idx, (score, coverage, fully) in zip(scored_days, occurrence_details[L][start])
+                ]
+                suggestions.append(_make_recurring_suggestion(
+                    recurrence_label, start, L, slot_minutes, minutes, -neg_score, total_conflicts,
+                    -neg_fully, -neg_coverage, occurrences, day_start
+                ))
+            return {"suggestions": suggestions}
+
+        def suggest(candidate: Candidate) -> Dict[str, Any]:
+            neg_score, _, neg_fully, neg_coverage, start, d_idx, *tagged = candidate
+            L = tagged[0] if tagged else lengths[0]
+            return _make_suggestion(
+                days[d_idx], start, L, slot_minutes, L * slot_minutes if tagged else meeting_len_minutes,
+                -neg_score, -neg_coverage, conflicts_by_length[L](d_idx, start), -neg_fully, day_start, timezone
+            )
 
-            score = raw - unpref_penalty * details["unpreferred_cells"]
-            total_cells = len(attendees) * L if attendees else 1
-            coverage = details["total_full_avails"] / total_cells if total_cells else 0.0
-
-            iso = _slot_to_iso(day_label, start, L, slot_minutes, day_start, timezone)
-
-            suggestions.append({
-                "day": day_label,
-                "start_slot_index": start,
-                "slot_minutes": slot_minutes,
-                "meeting_length_minutes": meeting_len_minutes,
-                "score": round(score, 4),
-                "coverage": round(coverage, 4),
-                "conflicts": details["conflicts"],
-                "fully_available_attendees": details["fully_available_attendees"],
-                "start_iso": iso["start_iso"],
-                "end_iso": iso["end_iso"],
-                "timezone": iso["timezone"]
-            })
-
-    def sort_key(r):
-        return (
-            -r["score"],
-            len(r["conflicts"]),
-            -r["fully_available_attendees"],
-            -r["coverage"],
-            r["start_slot_index"],
-        )
-
-    suggestions.sort(key=sort_key)
-    return {"suggestions": suggestions[:top_k]}
+        if ranking is not None:
+            # Pages are built from the heap as they are read (see services.rankings)
+            ranking.update(heap=heap, total=len(heap), suggest=suggest)
+            return {"suggestions": []}
+        suggestions = [suggest(candidate) for candidate in ranked]
+    if series is not None:
+        return {"suggestions": suggestions, "total_score": round(sum(s["score"] for s in suggestions), 4)}
+    return {"suggestions": suggestions}
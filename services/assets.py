@@ -0,0 +1,270 @@
+"""
+Static asset build and delivery.
+
+    python -m services.assets                # build into ./build (or $MEETSYNC_BUILD_DIR)
+
+The build copies static/ with gzip (and, when the brotli package is installed, brotli) variants of
+every text file, and pre-renders the HTML shell pages, which take no per-request data. Asset URLs
+carry a hash of the static tree (/static/<version>/...), so built assets are served as immutable.
+Without a build the app still works: assets are served as is, with revalidation, and pages are
+rendered per request.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+import sys
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.routing import Mount, Router
+from starlette.staticfiles import NotModifiedResponse
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip variants are built
+    brotli = None
+
+from services.codec import accepts_encoding
+
+STATIC_DIR = "static"
+# Where the build is written and read from
+BUILD_DIR_ENV = "MEETSYNC_BUILD_DIR"
+DEFAULT_BUILD_DIR = "build"
+# Jinja bytecode cache; defaults to <build dir>/jinja
+JINJA_CACHE_DIR_ENV = "MEETSYNC_JINJA_CACHE_DIR"
+MANIFEST = "manifest.json"
+# Pre-rendered shell pages: name -> template
+PAGES = {"main": "main.html.jinja", "results": "results.html.jinja"}
+# Only text formats are worth compressing (images are already compressed)
+COMPRESSIBLE = (".js", ".css", ".html", ".svg", ".json", ".txt")
+# Content codings in order of preference, with the file suffix of their variant
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+
+def build_dir() -> str:
+    return os.environ.get(BUILD_DIR_ENV) or DEFAULT_BUILD_DIR
+
+
+def jinja_cache_dir() -> str:
+    return os.environ.get(JINJA_CACHE_DIR_ENV) or os.path.join(build_dir(), "jinja")
+
+
+def _static_files(directory: str) -> List[str]:
+    """Relative paths of the files under directory, sorted so the tree hashes the same everywhere."""
+    paths = []
+    for root, _, files in os.walk(directory):
+        paths.extend(os.path.relpath(os.path.join(root, name), directory) for name in files)
+    return sorted(path.replace(os.sep, "/") for path in paths)
+
+
+def tree_version(directory: str = STATIC_DIR) -> str:
+    """Content hash of a directory tree (file names and bytes)."""
+    digest = hashlib.sha256()
+    for path in _static_files(directory):
+        digest.update(path.encode() + b"\0")
+        with open(os.path.join(directory, path), "rb") as f:
+            digest.update(f.read())
+        digest.update(b"\0")
+    return digest.hexdigest()[:12]
+
+
+@lru_cache(maxsize=1)
+def manifest() -> Optional[Dict[str, Any]]:
+    """The build's manifest, or None when the app runs from an unbuilt checkout."""
+    try:
+        with open(os.path.join(build_dir(), MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+@lru_cache(maxsize=1)
+def version() -> str:
+    built = manifest()
+    return built["version"] if built is not None else tree_version()
+
+
+def asset_url(path: str) -> str:
+    """URL of a file under static/ (the Jinja asset() global)."""
+    return f"/static/{version()}/{path}"
+
+
+def _pick_encoding(accept_encoding: Optional[str], available) -> Optional[str]:
+    for encoding, _ in ENCODINGS:
+        if encoding in available and accepts_encoding(accept_encoding, encoding):
+            return encoding
+    return None
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles that sends a file's .br or .gz sibling when the client accepts that coding, and a
+    Cache-Control header on every file.
+    """
+
+    def __init__(self, *, cache_control: str, **kwargs):
+        super().__init__(**kwargs)
+        self.cache_control = cache_control
+
+    def file_response(
+        self, full_path: str, stat_result: os.stat_result, scope, status_code: int = 200
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        headers = {"Cache-Control": self.cache_control, "Vary": "Accept-Encoding"}
+        path = str(full_path)
+        media_type = mimetypes.guess_type(path)[0] or "text/plain"
+        available = {}
+        for encoding, suffix in ENCODINGS:
+            try:
+                available[encoding] = (path + suffix, os.stat(path + suffix))
+            except OSError:
+                pass
+        encoding = _pick_encoding(request_headers.get("accept-encoding"), available)
+        if encoding is not None:
+            path, stat_result = available[encoding]
+            headers["Content-Encoding"] = encoding
+
+        response = FileResponse(path, status_code, headers=headers, media_type=media_type, stat_result=stat_result)
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+def static_apps() -> List[Tuple[str, str, StaticFiles]]:
+    """
+    (path, name, app) mounts for static files under /static, most specific first: the versioned tree
+    (immutable once built) and the plain paths for older pages and hand-written URLs.
+    """
+    built = manifest() is not None
+    versioned_dir = os.path.join(build_dir(), "static") if built else STATIC_DIR
+    return [
+        (f"/{version()}", "assets", PrecompressedStaticFiles(
+            directory=versioned_dir, cache_control=IMMUTABLE if built else REVALIDATE,
+        )),
+        ("", "plain", PrecompressedStaticFiles(directory=STATIC_DIR, cache_control=REVALIDATE)),
+    ]
+
+
+class StaticMount:
+    """
+    ASGI app for /static that sets up its mounts (see static_apps) on the first request, so the
+    static tree is only hashed once an asset is served, not when the app is imported.
+    """
+
+    def __init__(self) -> None:
+        self.router: Optional[Router] = None
+
+    async def __call__(self, scope, receive, send) -> None:
+        if self.router is None:
+            self.router = Router(routes=[Mount(path, app=app, name=name) for path, name, app in static_apps()])
+        await self.router(scope, receive, send)
+
+
+@lru_cache(maxsize=None)
+def _page_bodies(name: str) -> Optional[Dict[Optional[str], bytes]]:
+    built = manifest()
+    if built is None or name not in built.get("pages", {}):
+        return None
+    bodies: Dict[Optional[str], bytes] = {}
+    base = os.path.join(build_dir(), "pages", f"{name}.html")
+    for encoding, suffix in ((None, ""),) + ENCODINGS:
+        try:
+            with open(base + suffix, "rb") as f:
+                bodies[encoding] = f.read()
+        except FileNotFoundError:
+            pass
+    return bodies
+
+
+def built_page(name: str, accept_encoding: Optional[str]) -> Optional[Tuple[bytes, Optional[str], str]]:
+    """(body, content coding, etag) of a pre-rendered page, or None when there is no build."""
+    bodies = _page_bodies(name)
+    if bodies is None:
+        return None
+    encoding = _pick_encoding(accept_encoding, bodies)
+    return bodies[encoding], encoding, manifest()["pages"][name]["etag"]
+
+
+def _compress(data: bytes) -> Dict[str, bytes]:
+    """Variants smaller than data, by content coding (deterministic, so rebuilds are byte-identical)."""
+    variants = {"gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(data, quality=11)
+    return {encoding: body for encoding, body in variants.items() if len(body) < len(data)}
+
+
+def _write(path: str, data: bytes, compress: bool) -> Dict[str, int]:
+    """Write data and its compressed variants; returns the size of each (identity included)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    sizes = {"identity": len(data)}
+    variants = _compress(data) if compress else {}
+    for encoding, suffix in ENCODINGS:
+        if encoding in variants:
+            with open(path + suffix, "wb") as f:
+                f.write(variants[encoding])
+            sizes[encoding] = len(variants[encoding])
+    with open(path, "wb") as f:
+        f.write(data)
+    return sizes
+
+
+def build(out_dir: str) -> Dict[str, Any]:
+    """Write the static tree, pre-rendered pages and manifest to out_dir; returns the manifest."""
+    for sub in ("static", "pages"):
+        shutil.rmtree(os.path.join(out_dir, sub), ignore_errors=True)
+    stale = os.path.join(out_dir, MANIFEST)
+    if os.path.exists(stale):
+        os.remove(stale)
+
+    result: Dict[str, Any] = {"version": tree_version(), "files": {}, "pages": {}}
+    for path in _static_files(STATIC_DIR):
+        with open(os.path.join(STATIC_DIR, path), "rb") as f:
+            data = f.read()
+        result["files"][path] = _write(os.path.join(out_dir, "static", path), data, path.endswith(COMPRESSIBLE))
+
+    # Rendered with the new build's URLs; loading the templates also fills the Jinja bytecode cache
+    from templates import templates
+    for name, template in PAGES.items():
+        html = templates.env.get_template(template).render(asset=lambda path: f"/static/{result['version']}/{path}")
+        data = html.encode()
+        sizes = _write(os.path.join(out_dir, "pages", f"{name}.html"), data, True)
+        result["pages"][name] = {**sizes, "etag": f'W/"{hashlib.sha256(data).hexdigest()[:16]}"'}
+
+    # Written last: a build is only picked up once it is complete
+    with open(stale, "w") as f:
+        json.dump(result, f, indent=2)
+    manifest.cache_clear()
+    version.cache_clear()
+    _page_bodies.cache_clear()
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default=build_dir(), help="build directory (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    # The templates' bytecode cache goes with the build unless it has its own directory
+    os.environ[BUILD_DIR_ENV] = args.out
+    result = build(args.out)
+    total = {"identity": 0, "gzip": 0, "br": 0}
+    for sizes in list(result["files"].values()) + list(result["pages"].values()):
+        for encoding in total:
+            total[encoding] += sizes.get(encoding, sizes["identity"])
+    print(f"built {args.out} version {result['version']}: {len(result['files'])} files, {len(result['pages'])} pages")
+    print(", ".join(f"{encoding} {size / 1024:.1f} KiB" for encoding, size in total.items() if encoding != "br" or brotli))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+from model import model
+from services.roster_cache import settle_worker_roster, worker_roster
+from services.schemas import ModelQuery, parse
+
+MAX_BATCH_SCENARIOS = 100
+# Scenarios may override query fields only; the roster itself is shared by every scenario
+ROSTER_KEYS = ("attendees", "days", "slots_per_day", "slot_minutes", "availability", "date_range")
+# A single request is split into day shards only when each shard gets at least this many attendee x slot cells
+MIN_SHARD_CELLS = 500_000
+
+
+def validate_batch(data: Any) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Split a batch body into its roster payload and scenario overrides."""
+    if not isinstance(data, dict):
+        raise ValueError("batch body must be an object")
+    roster = data.get("roster")
+    scenarios = data.get("scenarios")
+    if not isinstance(roster, dict):
+        raise ValueError("roster must be an object")
+    if not isinstance(scenarios, list) or not scenarios:
+        raise ValueError("scenarios must be a non-empty array")
+    if len(scenarios) > MAX_BATCH_SCENARIOS:
+        raise ValueError(f"scenarios cannot have more than {MAX_BATCH_SCENARIOS} entries")
+    for i, scenario in enumerate(scenarios):
+        if not isinstance(scenario, dict):
+            raise ValueError(f"scenarios[{i}] must be an object")
+        for key in ROSTER_KEYS:
+            if key in scenario:
+                raise ValueError(f"scenarios[{i}] cannot override roster field '{key}'")
+    return roster, scenarios
+
+
+def _share_key(base: Dict[str, Any], scenario: Dict[str, Any]) -> str:
+    """Scenarios with the same key reuse the same cached timelines (see model.compile_roster)."""
+    merged = {**base, **scenario}
+    weights = merged.get("weights") or {}
+    scores = weights.get("avail_scores") if isinstance(weights, dict) else None
+    return repr((merged.get("active_attendees"), scores))
+
+
+def plan_chunks(base: Dict[str, Any], scenarios: List[Dict[str, Any]], workers: int) -> List[List[int]]:
+    """
+    Group scenario indices so scenarios sharing timelines run in the same process,
+    splitting big groups so the batch still spreads across all workers.
+    """
+    groups: Dict[str, List[int]] = {}
+    for i, scenario in enumerate(scenarios):
+        groups.setdefault(_share_key(base, scenario), []).append(i)
+    size = max(1, math.ceil(len(scenarios) / workers))
+    return [idx[j:j + size] for idx in groups.values() for j in range(0, len(idx), size)]
+
+
+def run_scenarios(
+    key: str, roster: Optional[Dict[str, Any]], base: Dict[str, Any], scenarios: List[Tuple[int, Dict[str, Any]]]
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Run each (index, scenario) pair (shallow overrides on base) against one compiled roster, in order,
+    in a worker process; None when the worker does not have the roster yet (see
+    roster_cache.run_with_roster). A failing scenario gets { error } naming its index.
+    """
+    local = worker_roster(key, roster)
+    if local is None:
+        return None
+    results = []
+    for i, scenario in scenarios:
+        try:
+            payload = {**base, **scenario}
+            parse(ModelQuery, payload)
+            results.append(model(payload, roster=local))
+        except ValueError as ve:
+            results.append({"error": f"scenarios[{i}]: {ve}"})
+    settle_worker_roster(key)
+    return results
+
+
+def plan_day_shards(roster: Dict[str, Any], workers: int) -> List[List[int]]:
+    """
+    Split a roster's days into contiguous, ascending shards of about equal size, one per worker,
+    when the request is big enough to be worth it (see MIN_SHARD_CELLS); otherwise a single shard.
+    Days are scored independently, so shard results merge exactly (model.merge_day_shards).
+    """
+    num_days = len(roster["days"])
+    cells = len(roster["attendees"]) * sum(roster["day_slot_counts"])
+    shards = max(1, min(workers, num_days, cells // MIN_SHARD_CELLS))
+    return [list(range(i * num_days // shards, (i + 1) * num_days // shards)) for i in range(shards)]
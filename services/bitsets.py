@@ -0,0 +1,67 @@
+from typing import Any, Dict, Iterator, List, Tuple
+
+# Bit t of a day's bitset stands for slot t. Cells in neither busy nor tentative are available (2).
+# "other" only comes from dense rows holding codes outside 0/1/2; it is always 0 for sparse input.
+DayBits = Tuple[int, int, int]  # (busy, tentative, other)
+
+
+def window_mask(start: int, length: int) -> int:
+    return ((1 << length) - 1) << start
+
+
+def paint(busy: int, tentative: int, start: int, end: int, value: int) -> Tuple[int, int]:
+    """Write value over slots [start, end) of one day; later writes win, like the dense matrix."""
+    mask = window_mask(start, end - start)
+    busy &= ~mask
+    tentative &= ~mask
+    if value == 0:
+        busy |= mask
+    elif value == 1:
+        tentative |= mask
+    return busy, tentative
+
+
+def row_to_bits(row: List[Any]) -> DayBits:
+    busy = tentative = other = 0
+    for t, v in enumerate(row):
+        if v == 0:
+            busy |= 1 << t
+        elif v == 1:
+            tentative |= 1 << t
+        elif v != 2:
+            other |= 1 << t
+    return busy, tentative, other
+
+
+def runs(bits: int) -> Iterator[Tuple[int, int]]:
+    """Yield (start, end) for every run of consecutive set bits, lowest first."""
+    while bits:
+        low = (bits & -bits).bit_length() - 1
+        shifted = bits >> low
+        length = (~shifted & (shifted + 1)).bit_length() - 1
+        yield low, low + length
+        bits &= ~window_mask(low, length)
+
+
+def bits_to_row(busy: int, tentative: int, num_slots: int) -> List[int]:
+    row = [2] * num_slots
+    for start, end in runs(busy):
+        row[start:end] = [0] * (end - start)
+    for start, end in runs(tentative):
+        row[start:end] = [1] * (end - start)
+    return row
+
+
+def attendee_bits(attendee: Dict[str, Any], num_days: int) -> List[DayBits]:
+    """Per-day (busy, tentative, other) bitsets from any supported attendee form."""
+    if "availability_matrix" in attendee:
+        return [row_to_bits(row) for row in attendee["availability_matrix"]]
+    if "availability_bits" in attendee:
+        bits = attendee["availability_bits"]
+        return [(busy, tentative, 0) for busy, tentative in zip(bits["busy"], bits["tentative"])]
+    busy = [0] * num_days
+    tentative = [0] * num_days
+    for iv in attendee["intervals"]:
+        d = iv["day"]
+        busy[d], tentative[d] = paint(busy[d], tentative[d], iv["start"], iv["end"], iv.get("value", 0))
+    return [(b, t, 0) for b, t in zip(busy, tentative)]
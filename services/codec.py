@@ -0,0 +1,222 @@
+import base64
+import binascii
+import gzip
+import hashlib
+import json
+import zlib
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+JSON_CONTENT_TYPE = "application/json"
+# Model payload whose attendees carry "cells": base64 of 2 bits per slot (see unpack_cells);
+# responses in it send lists of objects as columns and rows (see pack_rows)
+PACKED_CONTENT_TYPE = "application/vnd.meetsync.packed+json"
+# Upper bound on a decompressed request body, so a small gzip body cannot expand without limit
+MAX_BODY_BYTES = 64 * 1024 * 1024
+# Responses smaller than this are not worth compressing
+MIN_GZIP_BYTES = 1024
+
+
+@lru_cache(maxsize=64)
+def _deinterleave_masks(num_cells: int) -> List[Tuple[int, int]]:
+    """
+    (shift, mask) steps that gather the even bits of a 2*num_cells-bit integer into its low
+    num_cells bits (the usual Morton-decode shifts, widened until one block covers every cell).
+    """
+    total = 2 * num_cells
+    steps = [(0, ((1 << total) - 1) // 3)]  # 0b...0101: keep only the even bits
+    shift = 1
+    while shift < num_cells:
+        block = 4 * shift  # after this step, each block of 4*shift bits holds 2*shift gathered bits
+        reps = total // block + 1
+        low = (1 << (2 * shift)) - 1
+        steps.append((shift, low * (((1 << (block * reps)) - 1) // ((1 << block) - 1))))
+        shift *= 2
+    return steps
+
+
+def _gather_even_bits(x: int, num_cells: int) -> int:
+    """Bit i of the result is bit 2*i of x, for i < num_cells."""
+    for shift, mask in _deinterleave_masks(num_cells):
+        x = (x | (x >> shift)) & mask
+    return x & ((1 << num_cells) - 1)
+
+
+def unpack_cells(encoded: str, day_slot_counts: List[int], ctx: str) -> Dict[str, List[int]]:
+    """
+    Decode base64 2-bit cells into availability_bits without building per-slot lists.
+    Cells are day-major (all slots of day 0, then day 1, ...); cell i is bits 2i..2i+1 of the
+    little-endian integer, with values 0 = busy, 1 = tentative, 2 = available (3 is invalid).
+    """
+    if not isinstance(encoded, str):
+        raise ValueError(f"{ctx}.cells must be a base64 string")
+    try:
+        raw = base64.b64decode(encoded, validate=True)
+    except (binascii.Error, ValueError):
+        raise ValueError(f"{ctx}.cells is not valid base64")
+    num_cells = sum(day_slot_counts)
+    if len(raw) != (num_cells + 3) // 4:
+        raise ValueError(f"{ctx}.cells must hold {num_cells} cells ({(num_cells + 3) // 4} bytes)")
+
+    packed = int.from_bytes(raw, "little")
+    if packed >> (2 * num_cells):
+        raise ValueError(f"{ctx}.cells must have zero padding bits after its {num_cells} cells")
+    lo = _gather_even_bits(packed, num_cells)
+    hi = _gather_even_bits(packed >> 1, num_cells)
+    if lo & hi:
+        raise ValueError(f"{ctx}.cells values must be 0 (busy), 1 (tentative) or 2 (available)")
+    everything = (1 << num_cells) - 1
+    busy_all = everything & ~(lo | hi)
+    tentative_all = lo
+
+    busy, tentative = [], []
+    offset = 0
+    for num_slots in day_slot_counts:
+        day_mask = (1 << num_slots) - 1
+        busy.append((busy_all >> offset) & day_mask)
+        tentative.append((tentative_all >> offset) & day_mask)
+        offset += num_slots
+    return {"busy": busy, "tentative": tentative}
+
+
+def pack_cells(rows: List[List[int]]) -> str:
+    """Encode per-day rows of 0/1/2 cells in the packed format (for clients and tests)."""
+    packed = 0
+    i = 0
+    for row in rows:
+        for v in row:
+            if v not in (0, 1, 2):
+                raise ValueError("cells must be 0 (busy), 1 (tentative) or 2 (available)")
+            packed |= v << (2 * i)
+            i += 1
+    return base64.b64encode(packed.to_bytes((i + 3) // 4, "little")).decode()
+
+
+def unpack_payload(data: Any) -> Dict[str, Any]:
+    """Turn a packed model payload into a regular one whose attendees use availability_bits."""
+    if not isinstance(data, dict):
+        raise ValueError("Request body must be an object")
+    days, slots_per_day, attendees = data.get("days"), data.get("slots_per_day"), data.get("attendees")
+    if not isinstance(days, list) or not days:
+        raise ValueError("days is required for packed payloads")
+    if not isinstance(slots_per_day, int) or slots_per_day <= 0:
+        raise ValueError("slots_per_day must be a positive integer")
+    if not isinstance(attendees, list):
+        raise ValueError("attendees must be a non-empty list")
+
+    day_slot_counts = [slots_per_day] * len(days)
+    unpacked = []
+    for i, att in enumerate(attendees):
+        if not isinstance(att, dict) or "cells" not in att:
+            raise ValueError(f"Missing required field(s) in attendees[{i}]: cells")
+        bits = unpack_cells(att["cells"], day_slot_counts, f"attendees[{i}]")
+        unpacked.append({**{k: v for k, v in att.items() if k != "cells"}, "availability_bits": bits})
+    return {**data, "attendees": unpacked}
+
+
+def _gunzip(body: bytes) -> bytes:
+    inflater = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+    try:
+        out = inflater.decompress(body, MAX_BODY_BYTES)
+    except zlib.error:
+        raise ValueError("Invalid gzip body")
+    if inflater.unconsumed_tail:
+        raise ValueError(f"Decompressed body exceeds {MAX_BODY_BYTES} bytes")
+    # A truncated stream never reaches its end; bytes after the end are not part of the body
+    if not inflater.eof or inflater.unused_data:
+        raise ValueError("Invalid gzip body")
+    return out
+
+
+async def read_payload(request: Request) -> Tuple[Any, str, str]:
+    """
+    Parse a request body as JSON or packed JSON (by Content-Type), gzip-compressed or not
+    (by Content-Encoding). Returns the parsed body, the media type to answer with and a digest
+    of the decoded bytes and media type (see roster_cache.prepare_payload);
+    packed bodies still need unpack_payload on their model payload.
+    """
+    body = await request.body()
+    if request.headers.get("content-encoding", "").strip().lower() == "gzip":
+        body = _gunzip(body)
+    media_type = request.headers.get("content-type", JSON_CONTENT_TYPE).split(";")[0].strip().lower()
+    media_type = PACKED_CONTENT_TYPE if media_type == PACKED_CONTENT_TYPE else JSON_CONTENT_TYPE
+    try:
+        data = json.loads(body)
+    except ValueError:
+        raise ValueError("Invalid JSON body")
+    # The same bytes mean a different payload as plain and as packed JSON
+    digest = hashlib.blake2b(media_type.encode() + b"\0", digest_size=16)
+    digest.update(body)
+    return data, media_type, digest.hexdigest()
+
+
+def pack_rows(value: Any) -> Any:
+    """
+    Packed form of a response: every list of objects that all have the same keys becomes
+    {"columns": [...], "rows": [[...], ...]}, recursively, so repeated keys are sent once.
+    """
+    if isinstance(value, dict):
+        return {k: pack_rows(v) for k, v in value.items()}
+    if not isinstance(value, list):
+        return value
+    if value and all(isinstance(v, dict) for v in value):
+        columns = list(value[0])
+        if all(list(v) == columns for v in value):
+            return {"columns": columns, "rows": [[pack_rows(v[k]) for k in columns] for v in value]}
+    return [pack_rows(v) for v in value]
+
+
+def unpack_rows(value: Any) -> Any:
+    """Inverse of pack_rows (for clients and tests)."""
+    if isinstance(value, list):
+        return [unpack_rows(v) for v in value]
+    if not isinstance(value, dict):
+        return value
+    if list(value) == ["columns", "rows"]:
+        return [dict(zip(value["columns"], (unpack_rows(v) for v in row))) for row in value["rows"]]
+    return {k: unpack_rows(v) for k, v in value.items()}
+
+
+def encoding_weights(accept_encoding: Optional[str]) -> Dict[str, float]:
+    """Content coding -> q value from an Accept-Encoding header (q defaults to 1; malformed q is 0)."""
+    weights = {}
+    for part in (accept_encoding or "").split(","):
+        coding, *params = part.split(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, raw = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(raw)
+                except ValueError:
+                    q = 0.0
+        weights[coding] = q
+    return weights
+
+
+def accepts_encoding(accept_encoding: Optional[str], coding: str) -> bool:
+    """Whether a content coding is acceptable, named or through "*" (q=0 refuses it)."""
+    weights = encoding_weights(accept_encoding)
+    return weights.get(coding, weights.get("*", 0.0)) > 0
+
+
+def encode_response(result: Any, media_type: str, accept_encoding: Optional[str]) -> Response:
+    """
+    Response in the request's media type (packed requests get pack_rows JSON), gzip-compressed when
+    the client accepts it.
+    """
+    if media_type == PACKED_CONTENT_TYPE:
+        result = pack_rows(result)
+    # Same serialization as JSONResponse
+    body = json.dumps(result, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+    headers = {"Vary": "Accept-Encoding"}
+    if len(body) >= MIN_GZIP_BYTES and accepts_encoding(accept_encoding, "gzip"):
+        body = gzip.compress(body, compresslevel=6)
+        headers["Content-Encoding"] = "gzip"
+    return Response(content=body, media_type=media_type, headers=headers)
@@ -0,0 +1,327 @@
+from bisect import bisect_left, bisect_right, insort
+from itertools import accumulate, islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from model import Candidate, _compile_blockers, _day_blocker_runs, _window_candidate
+from services.intervals import AVAILABLE, NOT_FULLY_AVAILABLE, Segment, build_segments
+from services.metrics import count, stage
+
+# (last_ends, first_begins, gaps) for one day: sorted ends of every attendee's last segment and begins of
+# their first one, and (length, end, next_begin) of the stretches between consecutive segments
+BoundaryIndex = Tuple[List[int], List[int], List[Tuple[int, int, int]]]
+
+
+def _compress_day(
+    day_segments: List[List[Segment]],
+    weights: List[float],
+    num_slots: int,
+    avail_scores: Dict[int, float]
+) -> Dict[str, Any]:
+    """
+    One day on compressed coordinates: coords holds 0, num_slots and every segment boundary, and
+    between coords[j] and coords[j + 1] the weighted timeline (timeline[j]) and the tentative and
+    non-available counts are constant. Prefix sums are kept at the coords only.
+    """
+    coords = sorted({0, num_slots}.union(*({b, e} for segments in day_segments for b, e, _ in segments)))
+    at = {c: j for j, c in enumerate(coords)}
+    available_score = float(avail_scores.get(AVAILABLE, 0.0))
+    score_delta = [0.0] * len(coords)
+    tentative_delta = [0] * len(coords)
+    unavailable_delta = [0] * len(coords)
+    for w, segments in zip(weights, day_segments):
+        weighted = {v: w * (float(score) - available_score) for v, score in avail_scores.items()}
+        for b, e, v in segments:
+            delta = weighted.get(v, -w * available_score)
+            score_delta[at[b]] += delta
+            score_delta[at[e]] -= delta
+            unavailable_delta[at[b]] += 1
+            unavailable_delta[at[e]] -= 1
+            if v == 1:
+                tentative_delta[at[b]] += 1
+                tentative_delta[at[e]] -= 1
+
+    base = sum(weights) * available_score
+    timeline = [base + x for x in accumulate(score_delta)]
+    tentative = list(accumulate(tentative_delta))
+    unavailable = list(accumulate(unavailable_delta))
+    widths = [e - b for b, e in zip(coords, coords[1:])]
+    return {
+        "coords": coords,
+        "timeline": timeline,
+        "tentative": tentative,
+        "unavailable": unavailable,
+        "ps": [0.0, *accumulate(x * n for x, n in zip(timeline, widths))],
+        "tentative_ps": [0, *accumulate(x * n for x, n in zip(tentative, widths))],
+        "unavailable_ps": [0, *accumulate(x * n for x, n in zip(unavailable, widths))],
+    }
+
+
+def _boundary_indexes(day_segments: Iterable[List[Segment]]) -> Tuple[BoundaryIndex, BoundaryIndex]:
+    """
+    Like intervals._overlap_indexes, for busy and for busy or tentative segments, but as sorted
+    boundary lists instead of per-slot arrays (see _overlap_at).
+    """
+    indexes = tuple(([], [], []) for _ in range(2))
+    for segments in day_segments:
+        for values, index in zip(((0,), NOT_FULLY_AVAILABLE), indexes):
+            last_ends, first_begins, gaps = index
+            prev_end = None
+            for b, e, v in segments:
+                if v not in values:
+                    continue
+                if prev_end is None:
+                    first_begins.append(b)
+                elif b > prev_end:
+                    gaps.append((b - prev_end, prev_end, b))
+                prev_end = e
+            if prev_end is not None:
+                last_ends.append(prev_end)
+    for last_ends, first_begins, _ in indexes:
+        last_ends.sort()
+        first_begins.sort()
+    return indexes
+
+
+def _overlap_at(index: BoundaryIndex, L: int, starts: List[int]) -> List[int]:
+    """
+    Attendees with a segment inside [s, s + L) for each of the ascending starts: those whose span
+    from first to last segment the window meets, minus those it fits in one gap of.
+    """
+    last_ends, first_begins, gaps = index
+    # +1 where a window first fits in a gap, -1 where it no longer does
+    edges = sorted(
+        edge for length, end, next_begin in gaps if length >= L for edge in ((end, 1), (next_begin - L + 1, -1))
+    )
+    counts = []
+    in_gap = i = 0
+    for s in starts:
+        while i < len(edges) and edges[i][0] <= s:
+            in_gap += edges[i][1]
+            i += 1
+        counts.append(bisect_left(first_begins, s + L) - bisect_right(last_ends, s) - in_gap)
+    return counts
+
+
+def _first_where(lo: int, hi: int, pred: Callable[[int], bool]) -> int:
+    """First s in [lo, hi) with pred(s), for pred false then true over the range; hi if none."""
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if pred(mid):
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+
+def _best_first(lo: int, hi: int, keys: List[Callable[[int], Any]]) -> Iterator[int]:
+    """
+    Starts in [lo, hi) in ascending (keys[0](s), keys[1](s), ..., s) order, lazily, given keys that are
+    each monotone in s over the range: runs of equal key are found by binary search and ordered
+    by the remaining keys.
+    """
+    if not keys:
+        yield from range(lo, hi)
+        return
+    key, rest = keys[0], keys[1:]
+    while lo < hi:
+        first, last = key(lo), key(hi - 1)
+        if first <= last:
+            run_end = _first_where(lo, hi, lambda s: key(s) > first)
+            yield from _best_first(lo, run_end, rest)
+            lo = run_end
+        else:
+            run_start = _first_where(lo, hi, lambda s: key(s) <= last)
+            yield from _best_first(run_start, hi, rest)
+            hi = run_start
+
+
+def _window_fn(day: Dict[str, Any], lo: int, L: int, unpref_penalty: float, total_cells: int) -> Callable[[int], Tuple[float, float]]:
+    """
+    (score, coverage) of the window at s for the starts of the piece beginning at lo, whose first
+    and last slots stay within one coordinate interval each.
+    """
+    coords = day["coords"]
+    j0 = bisect_right(coords, lo) - 1
+    j1 = bisect_right(coords, lo + L - 1) - 1
+    c0, c1 = coords[j0], coords[j1]
+    ps, timeline = day["ps"], day["timeline"]
+    tentative_ps, tentative = day["tentative_ps"], day["tentative"]
+    unavailable_ps, unavailable = day["unavailable_ps"], day["unavailable"]
+
+    def window(s: int) -> Tuple[float, float]:
+        raw = (ps[j1] + timeline[j1] * (s + L - c1)) - (ps[j0] + timeline[j0] * (s - c0))
+        unpreferred_cells = (tentative_ps[j1] + tentative[j1] * (s + L - c1)) - (tentative_ps[j0] + tentative[j0] * (s - c0))
+        unavailable_cells = (unavailable_ps[j1] + unavailable[j1] * (s + L - c1)) - (
+            unavailable_ps[j0] + unavailable[j0] * (s - c0)
+        )
+        coverage = (total_cells - unavailable_cells) / total_cells if total_cells else 0.0
+        return raw - unpref_penalty * unpreferred_cells, coverage
+
+    return window
+
+
+def patch_compressed_state(
+    state: Dict[str, Any],
+    op: str,
+    pos: int,
+    old: Optional[Dict[str, Any]],
+    new: Optional[Dict[str, Any]],
+    day_slot_counts: List[int]
+):
+    """Patch cached segments for one attendee edit and drop the days it changes (see model.patch_roster)."""
+    num_days = len(day_slot_counts)
+    old_segments = build_segments(old, num_days) if old else None
+    new_segments = build_segments(new, num_days) if new else None
+    if op == "update":
+        state["segments"][pos] = new_segments
+    elif op == "add":
+        state["segments"].insert(pos, new_segments)
+    else:
+        del state["segments"][pos]
+
+    same_weight = old is not None and new is not None and float(old["priority"]) == float(new["priority"])
+    for d_idx in list(state["days"]):
+        if not same_weight or old_segments[d_idx] != new_segments[d_idx]:
+            del state["days"][d_idx]
+
+
+def score_windows_compressed(
+    attendees: List[Dict[str, Any]],
+    days: List[str],
+    day_slot_counts: List[int],
+    L: int,
+    slot_minutes: int,
+    day_start: str,
+    blockers: Dict[str, Any],
+    avail_scores: Dict[int, float],
+    top_priority: float,
+    hard_block: bool,
+    require_distinct_top: bool,
+    unpref_penalty: float,
+    cache: Optional[Dict[str, Any]] = None,
+    day_indices: Optional[Iterable[int]] = None,
+    limit: Optional[int] = None
+) -> Tuple[Iterable[Candidate], Callable[[int, int], List[str]]]:
+    """
+    Engine on compressed coordinates: time is cut only at segment boundaries and blocker edges.
+
+    For a window start s, the slot-constant quantities (timeline under its first and last slot,
+    conflict and availability counts, blockers) change only where s or s + L - 1 crosses a
+    boundary, so the starts split into pieces on which the counts are constant and the score and
+    coverage are linear in s. Counts are evaluated once per piece, so the work per day follows the
+    number of boundaries, not the slot resolution.
+
+    Every start is still yielded unless limit is given: then only the limit best starts of each
+    piece (found by binary search on the monotone score and coverage), which keeps any overall or
+    per-day top-limit intact. model() passes it only for plain top-k ranking. Scores can differ
+    from the slot-grid engines only by float summation order.
+    """
+    state = cache.setdefault("compressed", {}) if cache is not None else {}
+    if "segments" not in state:
+        state["segments"] = [build_segments(att, len(days)) for att in attendees]
+        state["days"] = {}
+    segments = state["segments"]
+    weights = [float(att["priority"]) for att in attendees]
+    names = [att["name"] for att in attendees]
+
+    is_top = [w == top_priority for w in weights]
+    distinct_top_ok = not require_distinct_top or sum(is_top) == 1
+    enforce_hard_block = hard_block and distinct_top_ok
+
+    compiled_blockers = _compile_blockers(blockers)
+    min_att = blockers.get("min_attendees")
+    total_cells = len(attendees) * L if attendees else 1
+
+    def candidates():
+        for d_idx in range(len(days)) if day_indices is None else day_indices:
+            num_slots = day_slot_counts[d_idx]
+            num_starts = num_slots - L + 1
+            if num_starts <= 0:
+                continue
+
+            day = state["days"].get(d_idx)
+            if day is None:
+                with stage("timeline"):
+                    day_segments = [att_segments[d_idx] for att_segments in segments]
+                    day = state["days"][d_idx] = _compress_day(day_segments, weights, num_slots, avail_scores)
+                    day["busy"], day["not_available"] = _boundary_indexes(day_segments)
+            if enforce_hard_block and "top_busy" not in day:
+                day["top_busy"] = _boundary_indexes(
+                    att_segments[d_idx] for a, att_segments in enumerate(segments) if is_top[a]
+                )[0]
+            coords = day["coords"]
+
+            # Pieces of starts: cut where the first slot (s) or the last slot (s + L - 1) meets a boundary
+            allowed = _day_blocker_runs(days[d_idx], num_starts, L, slot_minutes, day_start, compiled_blockers)
+            if not allowed:
+                continue
+            edges = {s for c in coords for s in (c, c - L + 1)}.union(*allowed)
+            cuts = sorted(s for s in edges if 0 < s < num_starts)
+            pieces = []
+            runs = iter(allowed)
+            first, end = next(runs)
+            for lo, hi in zip([0] + cuts, cuts + [num_starts]):
+                while lo >= end:
+                    first, end = next(runs, (num_starts, num_starts))
+                if first <= lo < end:
+                    pieces.append((lo, hi))
+            starts = [lo for lo, _ in pieces]
+            conflicts = _overlap_at(day["busy"], L, starts)
+            not_fully = _overlap_at(day["not_available"], L, starts)
+            top_conflicts = _overlap_at(day["top_busy"], L, starts) if enforce_hard_block else [0] * len(pieces)
+
+            blocked_priority = blocked_min_attendees = 0
+            scorable = []
+            for (lo, hi), conflict_count, not_fully_count, top_count in zip(pieces, conflicts, not_fully, top_conflicts):
+                if top_count:
+                    blocked_priority += hi - lo
+                    continue
+                fully = len(attendees) - not_fully_count
+                if isinstance(min_att, int) and fully < min_att:
+                    blocked_min_attendees += hi - lo
+                    continue
+                window = _window_fn(day, lo, L, unpref_penalty, total_cells)
+                scorable.append((lo, hi, conflict_count, fully, window))
+
+            if limit is None:
+                for lo, hi, conflict_count, fully, window in scorable:
+                    for s in range(lo, hi):
+                        yield _window_candidate(d_idx, s, *window(s), conflict_count, fully)
+            else:
+                # Best pieces first, by a bound no window of the piece beats (score and coverage are
+                # linear, so they peak at an end); once the day's best limit windows so far beat a
+                # piece's bound, no later piece can contribute
+                bounded = []
+                for lo, hi, conflict_count, fully, window in scorable:
+                    (first_score, first_coverage), (last_score, last_coverage) = window(lo), window(hi - 1)
+                    bound = _window_candidate(
+                        d_idx, lo, max(first_score, last_score), max(first_coverage, last_coverage), conflict_count, fully
+                    )
+                    bounded.append((bound, lo, hi, window))
+                bounded.sort(key=lambda piece: piece[0])
+                kept: List[Candidate] = []
+                for bound, lo, hi, window in bounded:
+                    if len(kept) >= limit and (not kept or bound >= kept[-1]):
+                        break
+                    keys = [lambda s, w=window: -(round(w(s)[0], 4) + 0.0), lambda s, w=window: -(round(w(s)[1], 4) + 0.0)]
+                    for s in islice(_best_first(lo, hi, keys), limit):
+                        candidate = _window_candidate(d_idx, s, *window(s), bound[1], -bound[2])
+                        if len(kept) >= limit and candidate >= kept[-1]:
+                            break
+                        yield candidate
+                        insort(kept, candidate)
+                        del kept[limit:]
+
+            count("windows_blocked_priority", blocked_priority)
+            count("windows_blocked_min_attendees", blocked_min_attendees)
+
+    def conflicts_for(d_idx: int, start: int) -> List[str]:
+        result = []
+        for a, day_segments in enumerate(segments):
+            busy = [(b, e) for b, e, v in day_segments[d_idx] if v == 0]
+            i = bisect_right([e for _, e in busy], start)
+            if i < len(busy) and busy[i][0] < start + L:
+                result.append(names[a])
+        return result
+
+    return candidates(), conflicts_for
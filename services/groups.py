@@ -0,0 +1,80 @@
+import math
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from services.bitsets import attendee_bits, runs
+from services.intervals import _overlap_counts, _overlap_indexes
+
+# (member positions among the active attendees, members that must be available)
+GroupRule = Tuple[Tuple[int, ...], int]
+
+
+def compile_groups(groups: List[Dict[str, Any]], names: List[str], subset: Sequence[int]) -> List[GroupRule]:
+    """
+    Turn constraints.groups, [{ name, members: [attendee names], min_available? | min_percent? }],
+    into quorum rules over the active attendees (subset holds their roster indices). Without a minimum
+    every member is required. Members outside active_attendees are left out of the group.
+    The groups' shape was validated with the request (services.schemas.Group); member names are
+    checked here, against the roster, and match attendee names exactly (case-sensitive).
+    """
+    roster_index = {name: i for i, name in enumerate(names)}
+    position = {i: pos for pos, i in enumerate(subset)}
+    rules: List[GroupRule] = []
+    for g, group in enumerate(groups):
+        members = group["members"]
+        for member in members:
+            if member not in roster_index:
+                raise ValueError(f"constraints.groups[{g}].members: unknown attendee '{member}'")
+        active = tuple(sorted({position[roster_index[m]] for m in members if roster_index[m] in position}))
+
+        min_available = group.get("min_available")
+        min_percent = group.get("min_percent")
+        if min_available is not None:
+            if min_available > len(active):
+                raise ValueError(f"constraints.groups[{g}]: min_available exceeds its {len(active)} active members")
+            need = min_available
+        elif min_percent is not None:
+            need = math.ceil(min_percent * len(active) / 100)
+        else:
+            need = len(active)
+        if need:
+            rules.append((active, need))
+    return rules
+
+
+def quorum_filter(
+    rules: List[GroupRule],
+    attendees: List[Dict[str, Any]],
+    day_slot_counts: List[int],
+    cache: Dict[str, Any]
+) -> Callable[[int, int], List[bool]]:
+    """
+    Return ok(d_idx, L) -> met[start]: whether every group has enough members available (no busy
+    slot in the window; tentative counts as available) for each start of one day.
+    Per group and day, an overlap index of the members' busy runs is built once and kept in cache;
+    from it the busy-member counts of one meeting length are one pass, also kept, so the check per
+    window is O(1) whatever the group size.
+    """
+    state = cache.setdefault("groups", {"busy": {}, "indexes": {}, "counts": {}})
+
+    def busy_bits(pos: int) -> List[int]:
+        bits = state["busy"].get(pos)
+        if bits is None:
+            bits = state["busy"][pos] = [day[0] for day in attendee_bits(attendees[pos], len(day_slot_counts))]
+        return bits
+
+    def ok(d_idx: int, L: int) -> List[bool]:
+        num_starts = day_slot_counts[d_idx] - L + 1
+        met = [True] * num_starts
+        for members, need in rules:
+            busy_counts = state["counts"].get((members, d_idx, L))
+            if busy_counts is None:
+                index = state["indexes"].get((members, d_idx))
+                if index is None:
+                    segments = ([(s, e, 0) for s, e in runs(busy_bits(pos)[d_idx])] for pos in members)
+                    index = state["indexes"][(members, d_idx)] = _overlap_indexes(segments, day_slot_counts[d_idx])[0]
+                busy_counts = state["counts"][(members, d_idx, L)] = _overlap_counts(index, L, num_starts)
+            most_busy = len(members) - need
+            met = [m and busy <= most_busy for m, busy in zip(met, busy_counts)]
+        return met
+
+    return ok
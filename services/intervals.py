@@ -0,0 +1,361 @@
+import heapq
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from model import Candidate, _compile_blockers, _day_blocker_mask, _window_candidate
+from services.metrics import count, stage
+from services.bitsets import runs
+
+AVAILABLE = 2
+# Values that keep an attendee from being fully available in a window. Dense rows may hold other codes
+# (like bitsets' "other" cells): those only change the score and coverage, as in the python engine.
+NOT_FULLY_AVAILABLE = (0, 1)
+
+# (start_slot, end_slot, value) with end exclusive; segments of one attendee-day are sorted and disjoint
+Segment = Tuple[int, int, Any]
+# (ends_after, begins_from, gaps) for one day, see _overlap_indexes
+OverlapIndex = Tuple[List[int], List[int], List[Tuple[int, int, int]]]
+
+
+def _paint(intervals: List[Tuple[int, int, Any]]) -> List[Segment]:
+    """
+    Resolve possibly overlapping intervals into sorted, disjoint, non-available segments.
+    Later intervals win where they overlap, matching how the dense matrix is written.
+    """
+    if not intervals:
+        return []
+    order = sorted(range(len(intervals)), key=lambda i: intervals[i][0])
+    bounds = sorted({p for s, e, _ in intervals for p in (s, e)})
+
+    segments: List[Segment] = []
+    active: List[Tuple[int, int, Any]] = []  # heap of (-input_index, end, value)
+    nxt = 0
+    for left, right in zip(bounds, bounds[1:]):
+        while nxt < len(order) and intervals[order[nxt]][0] <= left:
+            i = order[nxt]
+            heapq.heappush(active, (-i, intervals[i][1], intervals[i][2]))
+            nxt += 1
+        while active and active[0][1] <= left:
+            heapq.heappop(active)
+        if not active:
+            continue
+        value = active[0][2]
+        if value == AVAILABLE:
+            continue
+        if segments and segments[-1][1] == left and segments[-1][2] == value:
+            segments[-1] = (segments[-1][0], right, value)
+        else:
+            segments.append((left, right, value))
+    return segments
+
+
+def _row_segments(row: List[Any]) -> List[Segment]:
+    """Run-length encode the non-available cells of one dense row."""
+    segments: List[Segment] = []
+    start = 0
+    n = len(row)
+    for t in range(1, n + 1):
+        if t == n or row[t] != row[start]:
+            if row[start] != AVAILABLE:
+                segments.append((start, t, row[start]))
+            start = t
+    return segments
+
+
+def _bits_segments(busy: int, tentative: int) -> List[Segment]:
+    return sorted([(s, e, 0) for s, e in runs(busy)] + [(s, e, 1) for s, e in runs(tentative)])
+
+
+def build_segments(attendee: Dict[str, Any], num_days: int) -> List[List[Segment]]:
+    """Per-day segment lists for one attendee, from intervals, bitsets or a dense availability_matrix."""
+    if "availability_matrix" in attendee:
+        return [_row_segments(row) for row in attendee["availability_matrix"]]
+    if "availability_bits" in attendee:
+        bits = attendee["availability_bits"]
+        return [_bits_segments(busy, tentative) for busy, tentative in zip(bits["busy"], bits["tentative"])]
+    per_day: List[List[Tuple[int, int, Any]]] = [[] for _ in range(num_days)]
+    for iv in attendee["intervals"]:
+        per_day[iv["day"]].append((iv["start"], iv["end"], iv.get("value", 0)))
+    return [_paint(ivs) for ivs in per_day]
+
+
+def _suffix_counts(counts: List[int]) -> List[int]:
+    """out[x] = sum(counts[x:])"""
+    return list(accumulate(reversed(counts)))[::-1]
+
+
+def _overlap_indexes(day_segments: Iterable[List[Segment]], num_slots: int) -> Tuple[OverlapIndex, OverlapIndex]:
+    """
+    Length-independent indexes for counting, for any window [s, s + L), the attendees with a busy
+    segment inside it and the attendees with a busy or tentative segment inside it (see _overlap_counts).
+    Each index holds, for one day,
+      ends_after[s]  = attendees whose last such segment ends after slot s,
+      begins_from[x] = attendees whose first such segment begins at or after slot x,
+      gaps           = (length, end, next_begin) of every stretch between two consecutive such segments
+                       of one attendee.
+    """
+    last_ends = [[0] * (num_slots + 1) for _ in range(2)]
+    first_begins = [[0] * (num_slots + 1) for _ in range(2)]
+    busy_gaps: List[Tuple[int, int, int]] = []
+    gaps: List[Tuple[int, int, int]] = []
+    for segments in day_segments:
+        if not segments:
+            continue
+        busy_first = busy_end = None
+        first = prev_end = None
+        for b, e, v in segments:
+            if v not in NOT_FULLY_AVAILABLE:
+                continue
+            if prev_end is None:
+                first = b
+            elif b > prev_end:
+                gaps.append((b - prev_end, prev_end, b))
+            prev_end = e
+            if v == 0:
+                if busy_end is None:
+                    busy_first = b
+                elif b > busy_end:
+                    busy_gaps.append((b - busy_end, busy_end, b))
+                busy_end = e
+        if prev_end is None:
+            continue
+        last_ends[1][prev_end] += 1
+        first_begins[1][first] += 1
+        if busy_end is not None:
+            last_ends[0][busy_end] += 1
+            first_begins[0][busy_first] += 1
+    return tuple(
+        (_suffix_counts(ends)[1:] + [0], _suffix_counts(begins), kind_gaps)
+        for ends, begins, kind_gaps in zip(last_ends, first_begins, (busy_gaps, gaps))
+    )
+
+
+def _overlap_counts(index: OverlapIndex, L: int, num_starts: int) -> List[int]:
+    """
+    Attendees overlapping each window [s, s + L), s < num_starts, from an _overlap_indexes index.
+    An attendee overlaps unless the window misses the span from their first to last segment, or lies
+    within one gap of it (only gaps of at least L slots can hold a window).
+    """
+    ends_after, begins_from, gaps = index
+    inside = [0] * (num_starts + 1)
+    for length, end, next_begin in gaps:
+        if length >= L:
+            inside[end] += 1
+            inside[next_begin - L + 1] -= 1
+    return [
+        ends_after[s] - begins_from[s + L] - in_gap
+        for s, in_gap in zip(range(num_starts), accumulate(inside))
+    ]
+
+
+def _day_prefix_sums(
+    segments: List[List[List[Segment]]],
+    weights: List[float],
+    d_idx: int,
+    num_slots: int,
+    avail_scores: Dict[int, float]
+) -> Tuple[List[float], List[int], List[int]]:
+    """Prefix sums of the weighted timeline, tentative cells and non-available cells for one day."""
+    available_score = float(avail_scores.get(AVAILABLE, 0.0))
+    score_delta = [0.0] * (num_slots + 1)
+    tentative_delta = [0] * (num_slots + 1)
+    unavailable_delta = [0] * (num_slots + 1)
+    for a, day_segments in enumerate(segments):
+        w = weights[a]
+        for b, e, v in day_segments[d_idx]:
+            delta = w * (float(avail_scores.get(v, 0.0)) - available_score)
+            score_delta[b] += delta
+            score_delta[e] -= delta
+            unavailable_delta[b] += 1
+            unavailable_delta[e] -= 1
+            if v == 1:
+                tentative_delta[b] += 1
+                tentative_delta[e] -= 1
+
+    base = sum(weights) * available_score
+    timeline = [base + x for x in accumulate(score_delta[:num_slots])]
+    ps = [0.0, *accumulate(timeline)]
+    tentative_ps = [0, *accumulate(accumulate(tentative_delta[:num_slots]))]
+    unavailable_ps = [0, *accumulate(accumulate(unavailable_delta[:num_slots]))]
+    return ps, tentative_ps, unavailable_ps
+
+
+def _segment_deltas(
+    day_segments: List[Segment],
+    weight: float,
+    num_slots: int,
+    avail_scores: Dict[int, float]
+) -> Tuple[List[float], List[int], List[int]]:
+    """One attendee's per-cell contribution to a day's timeline, tentative and non-available counts."""
+    available_score = float(avail_scores.get(AVAILABLE, 0.0))
+    score_delta = [0.0] * (num_slots + 1)
+    tentative_delta = [0] * (num_slots + 1)
+    unavailable_delta = [0] * (num_slots + 1)
+    for b, e, v in day_segments:
+        delta = weight * (float(avail_scores.get(v, 0.0)) - available_score)
+        score_delta[b] += delta
+        score_delta[e] -= delta
+        unavailable_delta[b] += 1
+        unavailable_delta[e] -= 1
+        if v == 1:
+            tentative_delta[b] += 1
+            tentative_delta[e] -= 1
+    base = weight * available_score
+    return (
+        [base + x for x in accumulate(score_delta[:num_slots])],
+        list(accumulate(tentative_delta[:num_slots])),
+        list(accumulate(unavailable_delta[:num_slots])),
+    )
+
+
+def patch_intervals_state(
+    state: Dict[str, Any],
+    op: str,
+    pos: int,
+    old: Optional[Dict[str, Any]],
+    new: Optional[Dict[str, Any]],
+    day_slot_counts: List[int],
+    avail_scores: Dict[int, float]
+):
+    """Patch cached segments and per-day prefix sums for one attendee edit (see model.patch_roster)."""
+    num_days = len(day_slot_counts)
+    old_segments = build_segments(old, num_days) if old else None
+    new_segments = build_segments(new, num_days) if new else None
+    if op == "update":
+        state["segments"][pos] = new_segments
+    elif op == "add":
+        state["segments"].insert(pos, new_segments)
+    else:
+        del state["segments"][pos]
+
+    old_w = float(old["priority"]) if old else 0.0
+    new_w = float(new["priority"]) if new else 0.0
+    for d_idx, overlaps in state["overlaps"].items():
+        if old_w != new_w:
+            # The set of top-priority attendees may have changed
+            overlaps.pop("top_busy", None)
+        if (old_segments[d_idx] if old_segments else None) != (new_segments[d_idx] if new_segments else None):
+            overlaps.clear()
+    for d_idx, sums in state["ps"].items():
+        num_slots = day_slot_counts[d_idx]
+        old_day = old_segments[d_idx] if old_segments else None
+        new_day = new_segments[d_idx] if new_segments else None
+        if old_day == new_day and old_w == new_w:
+            continue
+        deltas = [[0] * num_slots for _ in range(3)]
+        for day_segments, w, sign in ((old_day, old_w, -1), (new_day, new_w, 1)):
+            if day_segments is None:
+                continue
+            for total, part in zip(deltas, _segment_deltas(day_segments, w, num_slots, avail_scores)):
+                for t, x in enumerate(part):
+                    total[t] += sign * x
+        state["ps"][d_idx] = tuple(
+            [p + d for p, d in zip(prefix, [0, *accumulate(delta)])] for prefix, delta in zip(sums, deltas)
+        )
+
+
+def score_windows_intervals(
+    attendees: List[Dict[str, Any]],
+    days: List[str],
+    day_slot_counts: List[int],
+    L: int,
+    slot_minutes: int,
+    day_start: str,
+    blockers: Dict[str, Any],
+    avail_scores: Dict[int, float],
+    top_priority: float,
+    hard_block: bool,
+    require_distinct_top: bool,
+    unpref_penalty: float,
+    cache: Optional[Dict[str, Any]] = None,
+    day_indices: Optional[Iterable[int]] = None
+) -> Tuple[Iterable[Candidate], Callable[[int, int], List[str]]]:
+    """
+    Sweep-line engine over busy/tentative interval endpoints.
+
+    Per day, timeline deltas and cell counts are difference arrays over segment endpoints and the
+    per-window conflict / not-fully-available counts are difference arrays over start indices, so the
+    work is O(segments + slots) per day instead of O(attendees x slots). Scores can differ from the
+    slot-grid engines only by float summation order. Segments and per-day prefix sums do not depend on
+    the meeting length and are kept in cache (see model.compile_roster).
+    """
+    state = cache.setdefault("intervals", {}) if cache is not None else {}
+    if "segments" not in state:
+        state["segments"] = [build_segments(att, len(days)) for att in attendees]
+        state["ps"] = {}
+        state["overlaps"] = {}
+    segments = state["segments"]
+    weights = [float(att["priority"]) for att in attendees]
+    names = [att["name"] for att in attendees]
+
+    is_top = [w == top_priority for w in weights]
+    distinct_top_ok = not require_distinct_top or sum(is_top) == 1
+    enforce_hard_block = hard_block and distinct_top_ok
+
+    compiled_blockers = _compile_blockers(blockers)
+    min_att = blockers.get("min_attendees")
+    total_cells = len(attendees) * L if attendees else 1
+
+    def candidates():
+        for d_idx in range(len(days)) if day_indices is None else day_indices:
+            day_label = days[d_idx]
+            num_slots = day_slot_counts[d_idx]
+            num_starts = num_slots - L + 1
+            if num_starts <= 0:
+                continue
+
+            if d_idx not in state["ps"]:
+                with stage("timeline"):
+                    state["ps"][d_idx] = _day_prefix_sums(segments, weights, d_idx, num_slots, avail_scores)
+            ps, tentative_ps, unavailable_ps = state["ps"][d_idx]
+
+            # Like the prefix sums, the overlap indexes do not depend on L: every meeting length reuses them
+            overlaps = state["overlaps"].setdefault(d_idx, {})
+            if "busy" not in overlaps:
+                with stage("timeline"):
+                    day_segments = (att_segments[d_idx] for att_segments in segments)
+                    overlaps["busy"], overlaps["not_available"] = _overlap_indexes(day_segments, num_slots)
+            conflicts = _overlap_counts(overlaps["busy"], L, num_starts)
+            not_fully = _overlap_counts(overlaps["not_available"], L, num_starts)
+            if enforce_hard_block:
+                if "top_busy" not in overlaps:
+                    top_segments = (att_segments[d_idx] for a, att_segments in enumerate(segments) if is_top[a])
+                    overlaps["top_busy"] = _overlap_indexes(top_segments, num_slots)[0]
+                top_conflicts = _overlap_counts(overlaps["top_busy"], L, num_starts)
+            else:
+                top_conflicts = [0] * num_starts
+            allowed = _day_blocker_mask(day_label, num_starts, L, slot_minutes, day_start, compiled_blockers)
+
+            blocked_priority = blocked_min_attendees = 0
+            for start in range(num_starts):
+                if not allowed[start]:
+                    continue
+                if top_conflicts[start]:
+                    blocked_priority += 1
+                    continue
+                fully = len(attendees) - not_fully[start]
+                if isinstance(min_att, int) and fully < min_att:
+                    blocked_min_attendees += 1
+                    continue
+
+                raw = ps[start + L] - ps[start]
+                unpreferred_cells = tentative_ps[start + L] - tentative_ps[start]
+                full_cells = total_cells - (unavailable_ps[start + L] - unavailable_ps[start])
+                score = raw - unpref_penalty * unpreferred_cells
+                coverage = full_cells / total_cells if total_cells else 0.0
+                yield _window_candidate(d_idx, start, score, coverage, conflicts[start], fully)
+
+            count("windows_blocked_priority", blocked_priority)
+            count("windows_blocked_min_attendees", blocked_min_attendees)
+
+    def conflicts_for(d_idx: int, start: int) -> List[str]:
+        result = []
+        for a, day_segments in enumerate(segments):
+            busy = [(b, e) for b, e, v in day_segments[d_idx] if v == 0]
+            i = bisect_right([e for _, e in busy], start)
+            if i < len(busy) and busy[i][0] < start + L:
+                result.append(names[a])
+        return result
+
+    return candidates(), conflicts_for
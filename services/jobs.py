@@ -0,0 +1,202 @@
+import asyncio
+import json
+import os
+import secrets
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from model import merge_day_shards
+from services import workers
+from services.batch import plan_day_shards
+from services.result_cache import result_cache, result_key
+from services.roster_cache import prepare_payload, query_fields, run_cached_model, shipped_roster
+
+# Seconds a finished job (and its result) stays retrievable
+RESULT_TTL_ENV = "MEETSYNC_JOB_RESULT_TTL"
+DEFAULT_RESULT_TTL_SECONDS = 10 * 60
+# Seconds a job may spend queued plus running; jobs exist for searches too long for one request
+TIMEOUT_ENV = "MEETSYNC_ASYNC_JOB_TIMEOUT"
+DEFAULT_TIMEOUT_SECONDS = 10 * 60
+# Finished jobs kept at most; unfinished ones are bounded by admission (each needs a slot to start)
+MAX_JOBS = 256
+# Day shards per worker, so progress advances several times even on a small pool
+SHARDS_PER_WORKER = 4
+# Seconds between SSE keep-alive comments while nothing changes (proxies drop idle streams)
+KEEPALIVE_SECONDS = 15
+
+FINISHED = ("done", "failed", "cancelled")
+
+# Jobs live in the event loop's thread (created and advanced by async handlers and tasks), so no lock
+_jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+
+def _env_seconds(name: str, default: float) -> float:
+    raw = os.environ.get(name)
+    try:
+        return float(raw) if raw else default
+    except ValueError:
+        raise ValueError(f"{name} must be a number")
+
+
+def _expire(now: float):
+    for job_id in [job_id for job_id, job in _jobs.items() if job["status"] in FINISHED and job["expires"] <= now]:
+        del _jobs[job_id]
+    finished = [job_id for job_id, job in _jobs.items() if job["status"] in FINISHED]
+    for job_id in finished[:max(0, len(_jobs) - MAX_JOBS)]:
+        del _jobs[job_id]
+
+
+def _notify(job: Dict[str, Any]):
+    # Wake every event stream waiting on the job; later waits use a fresh event
+    job["changed"].set()
+    job["changed"] = asyncio.Event()
+
+
+def _finish(job: Dict[str, Any], status: str, error: Optional[str] = None):
+    job["status"] = status
+    job["error"] = error
+    job["expires"] = time.monotonic() + _env_seconds(RESULT_TTL_ENV, DEFAULT_RESULT_TTL_SECONDS)
+    if status == "done":
+        job["days_done"] = job["days_total"]
+    _notify(job)
+
+
+async def submit_job(data: Dict[str, Any], body_key: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Validate a /call-model payload and start scoring it in the background.
+    The days are split into more shards than workers, and the running top-k is merged as each one
+    finishes. body_key is the request body's digest (see roster_cache.prepare_payload).
+    Raises ValueError for a bad payload and workers.Overloaded when the pool is full.
+    """
+    payload, roster, roster_key = await run_in_threadpool(prepare_payload, data, body_key)
+    key = result_key(payload, roster, roster_key)
+    job = {
+        "id": secrets.token_urlsafe(16),
+        "status": "queued",
+        "days_total": len(roster["days"]),
+        "days_done": 0,
+        "result": None,
+        "error": None,
+        "expires": None,
+        "changed": asyncio.Event(),
+        "task": None,
+    }
+    cached = result_cache.get(key)
+    if cached is not None:
+        job["result"] = cached
+        _finish(job, "done")
+    else:
+        # Recurrence and series rank across days, so they always run as one job
+        across_days = "recurrence" in payload or "series" in payload
+        shards = [None] if across_days else plan_day_shards(roster, SHARDS_PER_WORKER * workers.worker_count())
+        # Workers are sent the roster key only (see roster_cache.run_with_roster)
+        query = query_fields(payload)
+        tasks = [(run_cached_model, (roster_key, None, query, shard)) for shard in shards]
+        # The first shard is admitted right away, so a full pool is reported to the client;
+        # the rest are admitted as slots free up (see workers.stream_jobs)
+        started = workers.start_jobs(tasks[:1])
+        job["task"] = asyncio.get_running_loop().create_task(
+            _run(job, payload, (roster_key, roster), key, shards, tasks, started)
+        )
+
+    _expire(time.monotonic())
+    _jobs[job["id"]] = job
+    return job
+
+
+async def _run(
+    job: Dict[str, Any],
+    payload: Dict[str, Any],
+    roster: Tuple[str, Dict[str, Any]],
+    key: str,
+    shards: List[Any],
+    tasks: List[workers.Job],
+    started: List[Future],
+):
+    job["status"] = "running"
+    _notify(job)
+    results: Dict[int, Dict[str, Any]] = {}
+    roster_key, compiled = roster
+    positions = list(range(len(shards)))  # shard of each task; resent shards are appended
+    try:
+        timeout = _env_seconds(TIMEOUT_ENV, DEFAULT_TIMEOUT_SECONDS)
+        async for index, result in workers.stream_jobs(tasks, timeout, started):
+            position = positions[index]
+            if result is None:
+                # The worker did not have the roster yet, so it is sent along (just the shard's days) this time
+                shipped = shipped_roster(compiled, shards[position])
+                tasks.append((run_cached_model, (roster_key, shipped, query_fields(payload), shards[position])))
+                positions.append(position)
+                continue
+            results[position] = result
+            if len(shards) == 1:
+                job["result"] = result
+            else:
+                # Finished shards merged in day order, so ties go to the earlier day as in a full run
+                job["result"] = merge_day_shards(payload, [results[i] for i in sorted(results)])
+            job["days_done"] += job["days_total"] if shards[position] is None else len(shards[position])
+            _notify(job)
+        result_cache.put(key, job["result"])
+        _finish(job, "done")
+    except asyncio.CancelledError:
+        if job["status"] not in FINISHED:
+            _finish(job, "cancelled")
+    except (ValueError, workers.Overloaded, workers.JobTimeout) as e:
+        _finish(job, "failed", str(e))
+    except Exception as e:
+        _finish(job, "failed", f"Internal error: {e}")
+    finally:
+        # Also covers a task cancelled before it first ran
+        for future in started:
+            future.cancel()
+
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    _expire(time.monotonic())
+    return _jobs.get(job_id)
+
+
+def cancel_job(job: Dict[str, Any]) -> None:
+    """Stop an unfinished job (shards not started yet are dropped); a finished one is forgotten."""
+    if job["status"] in FINISHED:
+        _jobs.pop(job["id"], None)
+        return
+    _finish(job, "cancelled")
+    job["task"].cancel()
+
+
+def describe(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Status, progress and the current top-k (final once status is done)."""
+    state = {
+        "job_id": job["id"],
+        "status": job["status"],
+        "progress": round(100 * job["days_done"] / job["days_total"], 1),
+        "result": job["result"],
+    }
+    if job["error"] is not None:
+        state["error"] = job["error"]
+    return state
+
+
+async def events(job: Dict[str, Any]) -> AsyncIterator[str]:
+    """
+    Server-Sent Events for a job: a "progress" event with describe() output whenever it changes
+    (updates in between are coalesced), then one final "done", "failed" or "cancelled" event.
+    """
+    while True:
+        changed = job["changed"]
+        state = describe(job)
+        name = job["status"] if job["status"] in FINISHED else "progress"
+        yield f"event: {name}\ndata: {json.dumps(state, ensure_ascii=False, separators=(',', ':'))}\n\n"
+        if name != "progress":
+            return
+        while True:
+            try:
+                await asyncio.wait_for(changed.wait(), KEEPALIVE_SECONDS)
+                break
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
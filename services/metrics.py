@@ -0,0 +1,211 @@
+import contextvars
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Latency histogram buckets, in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Sampling profiler: directory for collapsed-stack files; profiling is off unless this is set
+PROFILE_DIR_ENV = "MEETSYNC_PROFILE_DIR"
+# With profiling on, jobs slower than this are saved even without an X-Profile request header
+PROFILE_SLOW_MS_ENV = "MEETSYNC_PROFILE_SLOW_MS"
+PROFILE_INTERVAL_SECONDS = 0.005
+
+
+class Trace:
+    """
+    Per-request stage timings and counters.
+
+    Stages are exclusive: time spent in a nested stage is not also charged to the enclosing one,
+    so the stages of a request add up to (at most) its total time.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.counters: Counter = Counter()
+        self._stack: List[List[Any]] = []  # [name, resumed_at]
+        # Set by the request (X-Profile: 1) to sample its worker jobs; saved profile file names
+        self.profile = False
+        self.profiles: List[str] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        now = time.perf_counter()
+        if self._stack:
+            parent = self._stack[-1]
+            self.stages[parent[0]] = self.stages.get(parent[0], 0.0) + now - parent[1]
+        frame = [name, now]
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            self._stack.pop()
+            self.stages[name] = self.stages.get(name, 0.0) + now - frame[1]
+            if self._stack:
+                self._stack[-1][1] = now
+
+    def merge(self, other: Dict[str, Any]):
+        """Add the stages/counters exported by another trace (e.g. from a worker process)."""
+        for name, seconds in other.get("stages", {}).items():
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+        self.counters.update(other.get("counters", {}))
+
+    def export(self) -> Dict[str, Any]:
+        return {"stages": dict(self.stages), "counters": dict(self.counters)}
+
+    def server_timing(self, total: Optional[float] = None) -> str:
+        parts = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.stages.items()]
+        if total is not None:
+            parts.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(parts)
+
+
+_current: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("meetsync_trace", default=None)
+
+
+def start_trace() -> Trace:
+    trace = Trace()
+    _current.set(trace)
+    return trace
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a block into the current request's trace; a no-op outside of a traced request."""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    with trace.stage(name):
+        yield
+
+
+def count(name: str, n: int = 1):
+    trace = _current.get()
+    if trace is not None and n:
+        trace.counters[name] += n
+
+
+class Histogram:
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.buckets[i] += 1
+        self.total += value
+        self.count += 1
+
+
+_lock = threading.Lock()
+_request_latency: Dict[Tuple[str, str, str], Histogram] = {}  # (method, route, status)
+_stage_latency: Dict[str, Histogram] = {}
+_totals: Counter = Counter()
+
+
+def record_request(method: str, route: str, status: int, seconds: float, trace: Optional[Trace]):
+    with _lock:
+        _request_latency.setdefault((method, route, str(status)), Histogram()).observe(seconds)
+        if trace is not None:
+            for name, stage_seconds in trace.stages.items():
+                _stage_latency.setdefault(name, Histogram()).observe(stage_seconds)
+            _totals.update(trace.counters)
+
+
+def _labels(**labels: str) -> str:
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
+
+
+def _render_histogram(lines: List[str], name: str, labels: Dict[str, str], hist: Histogram):
+    for bound, n in zip(BUCKETS, hist.buckets):
+        lines.append(f"{name}_bucket{_labels(**labels, le=repr(bound))} {n}")
+    lines.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {hist.count}")
+    lines.append(f"{name}_sum{_labels(**labels)} {hist.total}")
+    lines.append(f"{name}_count{_labels(**labels)} {hist.count}")
+
+
+def render_prometheus(gauges: Dict[str, float]) -> str:
+    """Prometheus text exposition of request/stage histograms, work counters and the given gauges."""
+    lines: List[str] = []
+    with _lock:
+        lines += ["# HELP meetsync_request_seconds Request latency.", "# TYPE meetsync_request_seconds histogram"]
+        for (method, route, status), hist in sorted(_request_latency.items()):
+            _render_histogram(lines, "meetsync_request_seconds", {"method": method, "route": route, "status": status}, hist)
+        lines += ["# HELP meetsync_stage_seconds Time per request spent in each stage.",
+                  "# TYPE meetsync_stage_seconds histogram"]
+        for name, hist in sorted(_stage_latency.items()):
+            _render_histogram(lines, "meetsync_stage_seconds", {"stage": name}, hist)
+        for name, value in sorted(_totals.items()):
+            lines += [f"# TYPE meetsync_{name}_total counter", f"meetsync_{name}_total {value}"]
+    for name, value in sorted(gauges.items()):
+        lines += [f"# TYPE meetsync_{name} gauge", f"meetsync_{name} {value}"]
+    return "\n".join(lines) + "\n"
+
+
+class StackSampler:
+    """
+    Minimal sampling profiler: a daemon thread records the target thread's Python stack every
+    interval and aggregates them in collapsed-stack form (one "a;b;c count" line per stack),
+    which flamegraph tools read directly.
+    """
+
+    def __init__(self, interval: float = PROFILE_INTERVAL_SECONDS):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._target = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> str:
+        self._stop.set()
+        self._thread.join()
+        return "".join(f"{stack} {n}\n" for stack, n in self.samples.most_common())
+
+
+def profiling_enabled() -> bool:
+    return bool(os.environ.get(PROFILE_DIR_ENV))
+
+
+def slow_threshold() -> Optional[float]:
+    raw = os.environ.get(PROFILE_SLOW_MS_ENV)
+    return float(raw) / 1000 if raw else None
+
+
+def save_profile(folded: str, label: str) -> Optional[str]:
+    """Write collapsed stacks under MEETSYNC_PROFILE_DIR; returns the file name."""
+    directory = os.environ.get(PROFILE_DIR_ENV)
+    if not directory or not folded:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{label}.folded"
+    with open(os.path.join(directory, name), "w") as f:
+        f.write(folded)
+    return name
@@ -0,0 +1,161 @@
+import heapq
+import json
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional
+
+from model import DEFAULT_TOP_K, model
+from services.roster_cache import prepare_payload
+
+# Seconds a ranking stays pageable after it was last read
+TTL_ENV = "MEETSYNC_RANKING_TTL"
+DEFAULT_TTL_SECONDS = 5 * 60
+# Windows kept across all rankings (roughly 200 bytes each); least recently read rankings go first
+MAX_WINDOWS_ENV = "MEETSYNC_RANKING_MAX_WINDOWS"
+DEFAULT_MAX_WINDOWS = 500_000
+# Largest page a cursor request may ask for; streams have no limit
+MAX_PAGE_SIZE = 1000
+# Windows popped per lock acquisition while streaming, so concurrent readers of one ranking interleave
+STREAM_CHUNK = 256
+
+_rankings: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def _env_number(name: str, default: float) -> float:
+    raw = os.environ.get(name)
+    try:
+        return float(raw) if raw else default
+    except ValueError:
+        raise ValueError(f"{name} must be a number")
+
+
+def ttl_seconds() -> float:
+    return _env_number(TTL_ENV, DEFAULT_TTL_SECONDS)
+
+
+def max_windows() -> int:
+    return int(_env_number(MAX_WINDOWS_ENV, DEFAULT_MAX_WINDOWS))
+
+
+def _expire(now: float, incoming: int = 0):
+    # Oldest-read first, so expiry and the window budget both drop from the front
+    budget = max_windows() - incoming
+    windows = sum(r["total"] for r in _rankings.values())
+    while _rankings:
+        ranking_id, ranking = next(iter(_rankings.items()))
+        if now - ranking["touched"] < ttl_seconds() and windows <= budget:
+            break
+        windows -= ranking["total"]
+        del _rankings[ranking_id]
+
+
+def create_ranking(data: Dict[str, Any], body_key: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Score every window of a /call-model payload and keep them, heapified, for paging (pages hold
+    top_k suggestions unless a limit is given). Scoring runs in the calling thread, not the worker
+    pool: the engine state that names each window's conflicts has to stay in this process.
+    """
+    payload, roster, _ = prepare_payload(data, body_key)
+    # The ranking keeps its own engine state: the cached roster is shared by concurrent requests
+    # and sized by the roster cache, and this state lives as long as the ranking does
+    roster = {**roster, "cache": {}}
+    ranking = {
+        "id": secrets.token_urlsafe(16),
+        "heap": [],
+        "total": 0,
+        "suggest": None,
+        "ranked": [],
+        "page_size": None,
+        "lock": threading.Lock(),
+        "touched": time.monotonic(),
+    }
+    model(payload, roster=roster, ranking=ranking)
+    if ranking["total"] > max_windows():
+        raise ValueError(
+            f"the query has {ranking['total']} windows, more than a ranking may keep ({MAX_WINDOWS_ENV}={max_windows()})"
+        )
+    ranking["page_size"] = max(1, int(payload.get("top_k", DEFAULT_TOP_K)))
+    with _lock:
+        _expire(ranking["touched"], ranking["total"])
+        _rankings[ranking["id"]] = ranking
+    return ranking
+
+
+def get_ranking(ranking_id: str) -> Optional[Dict[str, Any]]:
+    with _lock:
+        now = time.monotonic()
+        _expire(now)
+        ranking = _rankings.get(ranking_id)
+        if ranking is not None:
+            ranking["touched"] = now
+            _rankings.move_to_end(ranking_id)
+        return ranking
+
+
+def delete_ranking(ranking_id: str) -> bool:
+    with _lock:
+        return _rankings.pop(ranking_id, None) is not None
+
+
+def parse_cursor(ranking: Dict[str, Any], cursor: Optional[str]) -> int:
+    """Position a cursor stands for (a missing cursor is the start)."""
+    if cursor is None:
+        return 0
+    if not cursor.isdigit() or int(cursor) > ranking["total"]:
+        raise ValueError("Invalid cursor")
+    return int(cursor)
+
+
+def _ranked(ranking: Dict[str, Any], start: int, end: int) -> List[Any]:
+    """Candidates ranked start to end; the heap is only popped as far as anyone has read."""
+    with ranking["lock"]:
+        heap, ranked = ranking["heap"], ranking["ranked"]
+        while len(ranked) < end and heap:
+            ranked.append(heapq.heappop(heap))
+        return ranked[start:end]
+
+
+def page(ranking: Dict[str, Any], position: int, limit: Optional[int] = None) -> Dict[str, Any]:
+    """limit suggestions (default: the query's top_k) from position, and the cursor of the next page."""
+    limit = ranking["page_size"] if limit is None else limit
+    if not 0 < limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be in [1,{MAX_PAGE_SIZE}]")
+    end = min(position + limit, ranking["total"])
+    suggestions = [ranking["suggest"](c) for c in _ranked(ranking, position, end)]
+    return describe(ranking, suggestions, end)
+
+
+def describe(ranking: Dict[str, Any], suggestions: List[Dict[str, Any]], end: int) -> Dict[str, Any]:
+    return {
+        "ranking_id": ranking["id"],
+        "total": ranking["total"],
+        "suggestions": suggestions,
+        "next_cursor": str(end) if end < ranking["total"] else None,
+        "expires_in_seconds": ttl_seconds(),
+    }
+
+
+def stream(ranking: Dict[str, Any], position: int = 0) -> Iterator[bytes]:
+    """NDJSON: one suggestion per line, in rank order from position, each built only when written."""
+    while position < ranking["total"]:
+        end = min(position + STREAM_CHUNK, ranking["total"])
+        lines = [
+            json.dumps(ranking["suggest"](c), ensure_ascii=False, separators=(",", ":"))
+            for c in _ranked(ranking, position, end)
+        ]
+        yield ("\n".join(lines) + "\n").encode()
+        position = end
+
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        return {
+            "entries": len(_rankings),
+            "windows": sum(r["total"] for r in _rankings.values()),
+            "max_windows": max_windows(),
+            "ttl_seconds": ttl_seconds(),
+        }
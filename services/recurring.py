@@ -0,0 +1,75 @@
+import heapq
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+# Ranking tuple for a recurring slot, aggregated over its occurrences in the same order as model.Candidate:
+# (-mean_score, total_conflicts, -worst_fully_available, -worst_coverage, start, length_in_slots)
+RecurringCandidate = Tuple[float, int, int, float, int, int]
+# Per occurrence (score, coverage, fully_available_attendees) of one recurring slot
+Occurrences = List[Tuple[float, float, int]]
+
+
+def stack_occurrences(candidates: Iterable[Sequence[float]], occurrences: List[int]) -> Dict[str, np.ndarray]:
+    """
+    Stack one meeting length's window candidates (model.Candidate tuples for the occurrence days)
+    into occurrence x start arrays: score, conflicts, fully_available and coverage.
+    Windows the engine did not yield (blocked on that day) have a NaN score.
+    """
+    rows = np.array(list(candidates), dtype=np.float64)
+    num_starts = int(rows[:, 4].max()) + 1 if len(rows) else 0
+    shape = (len(occurrences), num_starts)
+    stack = {
+        "score": np.full(shape, np.nan),
+        "conflicts": np.zeros(shape, dtype=np.int64),
+        "fully_available": np.zeros(shape, dtype=np.int64),
+        "coverage": np.zeros(shape),
+    }
+    if not len(rows):
+        return stack
+
+    row_of_day = np.full(max(occurrences) + 1, -1, dtype=np.intp)
+    row_of_day[occurrences] = np.arange(len(occurrences))
+    at = (row_of_day[rows[:, 5].astype(np.intp)], rows[:, 4].astype(np.intp))
+    # Candidates store the descending fields negated
+    stack["score"][at] = -rows[:, 0]
+    stack["conflicts"][at] = rows[:, 1]
+    stack["fully_available"][at] = -rows[:, 2]
+    stack["coverage"][at] = -rows[:, 3]
+    return stack
+
+
+def rank_recurring(
+    stack: Dict[str, np.ndarray],
+    L: int,
+    top_k: int
+) -> Tuple[List[RecurringCandidate], Dict[int, Occurrences]]:
+    """
+    Best top_k recurring slots of one length from stack_occurrences output, and the per-occurrence
+    details of those slots. A slot qualifies only if its window is allowed on every occurrence;
+    it is ranked by mean score, then total conflicts, worst-case fully available attendees and
+    worst-case coverage, then earlier start.
+    """
+    score = stack["score"]
+    starts = np.flatnonzero(~np.isnan(score).any(axis=0))
+    if not len(starts):
+        return [], {}
+    mean_score = score[:, starts].mean(axis=0)
+    total_conflicts = stack["conflicts"][:, starts].sum(axis=0)
+    worst_fully = stack["fully_available"][:, starts].min(axis=0)
+    worst_coverage = stack["coverage"][:, starts].min(axis=0)
+
+    best = heapq.nsmallest(top_k, (
+        (-(round(mean, 4) + 0.0), conflicts, -fully, -(round(coverage, 4) + 0.0), start, L)
+        for mean, conflicts, fully, coverage, start in zip(
+            mean_score.tolist(), total_conflicts.tolist(), worst_fully.tolist(),
+            worst_coverage.tolist(), starts.tolist()
+        )
+    ))
+    details = {
+        c[4]: list(zip(
+            score[:, c[4]].tolist(), stack["coverage"][:, c[4]].tolist(), stack["fully_available"][:, c[4]].tolist()
+        ))
+        for c in best
+    }
+    return best, details
@@ -0,0 +1,133 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from model import normalize_query
+from services.roster_cache import _sizeof, roster_key
+
+# Memory bound for cached results, in megabytes (0 disables the cache)
+CACHE_MB_ENV = "MEETSYNC_RESULT_CACHE_MB"
+DEFAULT_CACHE_MB = 16
+# Seconds a cached result is served before it is recomputed
+TTL_ENV = "MEETSYNC_RESULT_CACHE_TTL"
+DEFAULT_TTL_SECONDS = 300
+
+
+def result_key(payload: Dict[str, Any], roster: Dict[str, Any], key: str) -> str:
+    """
+    Canonical hash of a query: the roster's content key plus its normalized per-query fields
+    (see model.normalize_query), so key order and spelled-out defaults do not matter.
+    """
+    return roster_key({"roster": key, "query": normalize_query(payload, roster)})
+
+
+def etag_for(key: str) -> str:
+    # Weak: the same result may be sent gzip-compressed or not
+    return f'W/"{key}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header lists etag exactly. "*" is not honoured: it asks whether any
+    representation exists, which says nothing about whether the client's copy is current.
+    """
+    if not if_none_match:
+        return False
+    return etag in (tag.strip() for tag in if_none_match.split(","))
+
+
+class ResultCache:
+    """
+    LRU cache of model() results keyed by result_key, bounded by max_bytes and by a time to live.
+    model() is a pure function of the roster and the query, so a hit is exactly what a recompute
+    would return.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry["expires"] <= time.monotonic():
+                self._drop(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["result"]
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        size = _sizeof(result, set())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = {"result": result, "bytes": size, "expires": time.monotonic() + self.ttl_seconds}
+            self._bytes += size
+            self._expire()
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop(self, key: str) -> None:
+        self._bytes -= self._entries.pop(key)["bytes"]
+
+    def _expire(self) -> None:
+        # Entries share one TTL, so insertion order is expiry order; recently used ones may sit
+        # behind expired ones, so only the oldest run of expired entries is dropped here
+        now = time.monotonic()
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry["expires"] > now:
+                break
+            self._drop(key)
+            self.expirations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+def _env_number(name: str, default: float) -> float:
+    raw = os.environ.get(name)
+    try:
+        return float(raw) if raw else default
+    except ValueError:
+        raise ValueError(f"{name} must be a number")
+
+
+result_cache = ResultCache(
+    int(_env_number(CACHE_MB_ENV, DEFAULT_CACHE_MB) * 1024 * 1024),
+    _env_number(TTL_ENV, DEFAULT_TTL_SECONDS),
+)
@@ -0,0 +1,288 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from model import compile_roster, model, slice_roster
+from services import workers
+from services.metrics import stage
+from services.schemas import ModelQuery, parse
+from services.transformer import is_frontend_payload, transform_frontend_options, transform_frontend_to_model_payload
+
+# Memory bound for compiled rosters, in megabytes
+CACHE_MB_ENV = "MEETSYNC_ROSTER_CACHE_MB"
+DEFAULT_CACHE_MB = 64
+
+# Request body digests remembered per roster cache (see prepare_payload)
+MAX_BODY_ALIASES = 1024
+
+# Fields of a raw model / frontend payload that make up the roster; everything else is per-query
+MODEL_ROSTER_KEYS = ("attendees", "days", "slots_per_day")
+FRONTEND_ROSTER_KEYS = ("availability", "date_range", "slot_minutes")
+
+
+def roster_key(roster_fields: Dict[str, Any]) -> str:
+    """Canonical content hash of the attendee side of a payload (key order and whitespace do not matter)."""
+    canonical = json.dumps(roster_fields, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+
+
+def _sizeof(obj: Any, seen: set) -> int:
+    """Approximate deep size in bytes of dicts/lists/tuples of scalars and numpy arrays."""
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    nbytes = getattr(obj, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_sizeof(k, seen) + _sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(_sizeof(v, seen) for v in obj)
+    return size
+
+
+def _shape(obj: Any) -> int:
+    """Number of dict entries in a nested dict; changes whenever an engine adds cached state."""
+    if not isinstance(obj, dict):
+        return 0
+    return len(obj) + sum(_shape(v) for v in obj.values())
+
+
+class RosterCache:
+    """
+    LRU cache of compiled rosters (see model.compile_roster) keyed by roster_key.
+    Entry sizes include the engine state that model() adds to roster["cache"] after insertion,
+    so callers report use with settle() and the cache evicts down to max_bytes.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Request body digest -> roster key, so a repeated body skips the canonical hash
+        self._aliases: "OrderedDict[str, str]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["roster"]
+
+    def lookup(self, body_key: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """(roster key, roster) for a request body seen before whose roster is still cached."""
+        with self._lock:
+            key = self._aliases.get(body_key)
+            entry = self._entries.get(key) if key is not None else None
+            if entry is None:
+                return None
+            self._aliases.move_to_end(body_key)
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return key, entry["roster"]
+
+    def alias(self, body_key: str, key: str) -> None:
+        with self._lock:
+            self._aliases[body_key] = key
+            self._aliases.move_to_end(body_key)
+            while len(self._aliases) > MAX_BODY_ALIASES:
+                self._aliases.popitem(last=False)
+
+    def put(self, key: str, roster: Dict[str, Any]) -> None:
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old["bytes"]
+            base = _sizeof(roster["attendees"], set())
+            entry = {"roster": roster, "base": base, "shape": 0, "bytes": base}
+            self._entries[key] = entry
+            self._bytes += base
+            self._measure(entry)
+            self._evict()
+
+    def settle(self, key: str) -> None:
+        """Re-measure an entry after model() may have grown its engine cache, then enforce the bound."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._measure(entry):
+                self._evict()
+
+    def _measure(self, entry: Dict[str, Any]) -> bool:
+        cache = entry["roster"]["cache"]
+        shape = _shape(cache)
+        if shape == entry["shape"]:
+            return False
+        size = entry["base"] + _sizeof(cache, set())
+        self._bytes += size - entry["bytes"]
+        entry["shape"], entry["bytes"] = shape, size
+        return True
+
+    def _evict(self) -> None:
+        # The most recently used entry is kept even if it alone exceeds the bound
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry["bytes"]
+            self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._aliases.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def _max_bytes() -> int:
+    raw = os.environ.get(CACHE_MB_ENV)
+    try:
+        mb = float(raw) if raw else DEFAULT_CACHE_MB
+    except ValueError:
+        raise ValueError(f"{CACHE_MB_ENV} must be a number")
+    return int(mb * 1024 * 1024)
+
+
+roster_cache = RosterCache(_max_bytes())
+# Worker processes keep their own copies so engine state (timelines, prefix sums) built there is reused
+_worker_rosters: Optional[RosterCache] = None
+
+
+def prepare_payload(
+    data: Dict[str, Any], body_key: Optional[str] = None
+) -> Tuple[Dict[str, Any], Dict[str, Any], str]:
+    """
+    Model payload, compiled roster and roster key for a frontend or raw model request.
+    On a cache hit only the per-query fields are validated and transformed; the availability
+    is neither re-validated, re-transformed nor re-compiled and its cached timelines are reused.
+    body_key is the digest of the request body that data was parsed from (codec.read_payload), when
+    data is that whole body: a repeated body then finds its roster without hashing the availability.
+    """
+    frontend = is_frontend_payload(data)
+    if not frontend:
+        if not isinstance(data, dict):
+            raise ValueError("Request body must be an object")
+        # Frontend payloads are validated while transforming them; this checks the query fields only
+        parse(ModelQuery, data)
+    found = roster_cache.lookup(body_key) if body_key is not None else None
+    if found is not None:
+        key, roster = found
+        return (transform_frontend_options(data) if frontend else data), roster, key
+
+    if frontend:
+        # Hash the raw availability: parsing it is what a cache hit skips
+        key = roster_key({k: data.get(k) for k in FRONTEND_ROSTER_KEYS})
+    else:
+        key = roster_key({k: data.get(k) for k in MODEL_ROSTER_KEYS})
+    roster = roster_cache.get(key)
+    if roster is None:
+        if frontend:
+            with stage("transform"):
+                payload = transform_frontend_to_model_payload(data)
+        else:
+            payload = data
+        with stage("compile"):
+            roster = compile_roster(payload, validated=frontend)
+        roster_cache.put(key, roster)
+    else:
+        payload = transform_frontend_options(data) if frontend else data
+    if body_key is not None:
+        roster_cache.alias(body_key, key)
+    return payload, roster, key
+
+
+def query_fields(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """A model payload without its roster fields, which jobs get from the roster instead."""
+    return {k: v for k, v in payload.items() if k not in MODEL_ROSTER_KEYS}
+
+
+def shipped_roster(roster: Dict[str, Any], day_indices: Optional[List[int]] = None) -> Dict[str, Any]:
+    """
+    A compiled roster without its engine state, for a worker that does not have the roster yet;
+    only the given days when the job is restricted to one day shard (see model.slice_roster).
+    """
+    if day_indices is not None:
+        return slice_roster(roster, day_indices)
+    return {**roster, "cache": {}}
+
+
+def worker_roster(key: str, roster: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    This worker process's copy of a roster (with the engine state it built on earlier requests),
+    adopting the roster sent along when it has none; None when it has none and none was sent.
+    """
+    global _worker_rosters
+    if _worker_rosters is None:
+        _worker_rosters = RosterCache(_max_bytes())
+    local = _worker_rosters.get(key)
+    if local is None and roster is not None:
+        _worker_rosters.put(key, roster)
+        local = roster
+    return local
+
+
+def settle_worker_roster(key: str) -> None:
+    if _worker_rosters is not None:
+        _worker_rosters.settle(key)
+
+
+def run_cached_model(
+    key: str, roster: Optional[Dict[str, Any]], payload: Dict[str, Any], day_indices: Optional[List[int]] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    model() for a worker process against its copy of the roster; None when it does not have the
+    roster and it was not sent (see run_with_roster).
+    day_indices restricts the job to one shard of the days (see batch.plan_day_shards). A worker
+    without the whole roster keeps the shard it is sent (only those days) under a key of its own.
+    """
+    if day_indices is not None and worker_roster(key, None) is None:
+        key, day_indices = f"{key}:{day_indices[0]}-{day_indices[-1]}", None
+    local = worker_roster(key, roster)
+    if local is None:
+        return None
+    result = model(payload, roster=local, day_indices=day_indices)
+    settle_worker_roster(key)
+    return result
+
+
+async def run_with_roster(
+    key: str,
+    roster: Dict[str, Any],
+    jobs: List[Tuple[Callable[..., Any], Tuple[Any, ...]]],
+    shards: Optional[List[Optional[List[int]]]] = None,
+) -> List[Any]:
+    """
+    Run jobs fn(key, roster, *args) in the worker pool (see workers.run_jobs) and return their
+    results in order. Jobs are sent the roster key only; those whose worker does not have the
+    roster yet return None and are sent again with the roster, without its engine state.
+    shards gives the days each job is restricted to, if any; only those days are sent then.
+    """
+    results = await workers.run_jobs([(fn, (key, None) + args) for fn, args in jobs])
+    missed = [i for i, result in enumerate(results) if result is None]
+    if missed:
+        retried = await workers.run_jobs([
+            (jobs[i][0], (key, shipped_roster(roster, shards[i] if shards else None)) + jobs[i][1]) for i in missed
+        ])
+        for i, result in zip(missed, retried):
+            results[i] = result
+    return results
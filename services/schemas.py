@@ -0,0 +1,281 @@
+from datetime import date, timedelta
+from typing import Annotated, Any, Dict, List, Literal, NotRequired, Optional, Tuple, Type, TypedDict, TypeVar
+
+from pydantic import (
+    AfterValidator, BaseModel, ConfigDict, Field, Strict, StrictBool, StrictInt, StringConstraints, ValidationError,
+    model_validator,
+)
+from pydantic.json_schema import models_json_schema
+
+from services.codec import JSON_CONTENT_TYPE, PACKED_CONTENT_TYPE
+
+# Typed request models, the one place request fields are validated. Frontend payloads are parsed into
+# these in one pydantic-core pass and transformed from them (see services.transformer); caller dicts are
+# never modified. Raw model payloads have their query fields checked against ModelQuery and are passed on
+# as is; their attendees are checked by model.compile_roster, as those checks depend on the day and slot
+# counts (ModelAttendee and ModelPayload only document them in the OpenAPI schema). model() itself only
+# guards the fields it cannot run without.
+
+DAY_MINUTES = 24 * 60
+# Longest date_range accepted, in days
+MAX_DATE_RANGE_DAYS = 366
+# Most windows one series request may book
+MAX_SERIES_COUNT = 50
+
+Number = Annotated[float, Strict()]  # int or float, not bool or str
+Name = Annotated[str, StringConstraints(strip_whitespace=True, min_length=1)]
+Minutes = Annotated[StrictInt, Field(gt=0, le=DAY_MINUTES)]
+# Raw model payloads accept integral numbers and numeric strings ("15", 15.0), as model() always has
+LaxPositiveInt = Annotated[int, Field(gt=0)]
+# "HH:MM"; parsed (and range-checked) by model._compile_blockers
+Clock = Annotated[str, Field(examples=["09:00"])]
+
+
+def _divides_day(minutes: int) -> int:
+    if DAY_MINUTES % minutes:
+        raise ValueError(f"slot_minutes must divide a day ({DAY_MINUTES} minutes)")
+    return minutes
+
+
+# Frontend grid resolution; finer grids suit clinical and on-call rosters
+SlotMinutes = Annotated[StrictInt, Field(gt=0, le=60), AfterValidator(_divides_day)]
+
+M = TypeVar("M", bound=BaseModel)
+
+
+class _Frozen(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
+
+# Time slots stay TypedDicts (validated in pydantic-core without a Python object per slot); ranges
+# that depend on the request (day count, slot grid) are checked while transforming them
+class TimeSlot(TypedDict):
+    day: StrictInt
+    startMinute: StrictInt
+    endMinute: StrictInt
+    availabilityType: Literal["busy", "tentative"]
+
+
+class FrontendUser(_Frozen):
+    name: Name
+    priority: Annotated[StrictInt, Field(gt=0)] = 1
+    timeSlots: Tuple[TimeSlot, ...] = ()
+
+
+class DateRange(_Frozen):
+    """Inclusive range of calendar days; TimeSlot.day then indexes its days."""
+    start: date
+    end: date
+
+    @model_validator(mode="after")
+    def _check_span(self) -> "DateRange":
+        if self.end < self.start:
+            raise ValueError("date_range.end must not be before date_range.start")
+        if (self.end - self.start).days + 1 > MAX_DATE_RANGE_DAYS:
+            raise ValueError(f"date_range cannot span more than {MAX_DATE_RANGE_DAYS} days")
+        return self
+
+    def labels(self) -> List[str]:
+        return [(self.start + timedelta(days=i)).isoformat() for i in range((self.end - self.start).days + 1)]
+
+
+class LengthRange(_Frozen):
+    min: Minutes
+    max: Minutes
+
+    @model_validator(mode="after")
+    def _check_order(self) -> "LengthRange":
+        if self.min > self.max:
+            raise ValueError("meeting_length_range.min and max must be integers with 0 < min <= max")
+        return self
+
+
+class Weights(_Frozen):
+    avail_scores: Optional[Dict[int, Number]] = None
+    unpreferred_penalty_per_person: Optional[Number] = None
+    hard_block_for_high_priority: Optional[StrictBool] = None
+    distinct_top_priority_only: Optional[StrictBool] = None
+    length_preference_per_minute: Optional[Number] = None
+
+
+class ClockRange(_Frozen):
+    start: Clock = "00:00"
+    end: Clock = "24:00"
+
+
+class GlobalBlockers(_Frozen):
+    hours: Optional[ClockRange] = None
+    lunch: Optional[ClockRange] = None
+    weekdays_disallowed: Tuple[Annotated[StrictInt, Field(ge=0, le=6)], ...] = ()
+    min_attendees: Optional[StrictInt] = None
+
+
+class Group(_Frozen):
+    name: str
+    members: Annotated[Tuple[str, ...], Field(min_length=1)]
+    min_available: Optional[Annotated[StrictInt, Field(gt=0)]] = None
+    min_percent: Optional[Annotated[Number, Field(gt=0, le=100)]] = None
+
+    @model_validator(mode="after")
+    def _check_rule(self) -> "Group":
+        if self.min_available is not None and self.min_percent is not None:
+            raise ValueError(f"constraints.groups '{self.name}' cannot set both min_available and min_percent")
+        return self
+
+
+class Constraints(_Frozen):
+    global_blockers: Optional[GlobalBlockers] = None
+    groups: Optional[Tuple[Group, ...]] = None
+
+
+class Recurrence(_Frozen):
+    frequency: Literal["weekly", "weekdays"]
+    weekday: Optional[Annotated[StrictInt, Field(ge=0, le=6)]] = None
+
+    @model_validator(mode="after")
+    def _check_weekday(self) -> "Recurrence":
+        if self.frequency == "weekly" and self.weekday is None:
+            raise ValueError("recurrence.weekday must be an integer in [0,6] (0=Mon)")
+        return self
+
+
+class Series(_Frozen):
+    count: Annotated[StrictInt, Field(ge=1, le=MAX_SERIES_COUNT)]
+    one_per_day: StrictBool = False
+    min_gap_minutes: Annotated[StrictInt, Field(ge=0)] = 0
+
+
+class _QueryOptions(_Frozen):
+    """Per-query fields shared by both payload shapes."""
+    meeting_length_range: Optional[LengthRange] = None
+    top_k: Annotated[StrictInt, Field(gt=0)] = 5
+    engine: Optional[Literal["python", "numpy", "intervals", "compressed"]] = None
+    weights: Weights = Weights()
+    constraints: Constraints = Constraints()
+    recurrence: Optional[Recurrence] = None
+    series: Optional[Series] = None
+
+    @model_validator(mode="after")
+    def _check_modes(self) -> "_QueryOptions":
+        if self.recurrence is not None and self.series is not None:
+            raise ValueError("series and recurrence cannot be combined")
+        return self
+
+
+class FrontendOptions(_QueryOptions):
+    """Frontend query fields; everything in a frontend payload except availability."""
+    date_range: Optional[DateRange] = None
+    timezone: Optional[Name] = None
+    meeting_length_minutes: Minutes = 60
+    slot_minutes: Optional[SlotMinutes] = None
+
+
+class FrontendRoster(_Frozen):
+    """The attendee side of a frontend payload (e.g. a session's roster)."""
+    availability: Annotated[Tuple[FrontendUser, ...], Field(min_length=1)]
+    date_range: Optional[DateRange] = None
+    slot_minutes: Optional[SlotMinutes] = None
+
+
+class FrontendPayload(FrontendOptions):
+    """Availability as drawn in the UI: per-user busy/tentative time slots on a slot_minutes grid (default 15)."""
+    availability: Annotated[Tuple[FrontendUser, ...], Field(min_length=1)]
+
+
+class Interval(TypedDict):
+    day: int
+    start: int
+    end: int
+    value: NotRequired[Literal[0, 1, 2]]
+
+
+class AvailabilityBits(TypedDict):
+    busy: List[int]
+    tentative: List[int]
+
+
+class ModelAttendee(_Frozen):
+    """
+    One of availability_matrix, intervals, availability_bits or (packed requests) cells.
+    Documentation only: requests are not parsed into it (model.compile_roster checks attendees).
+    """
+    name: str
+    priority: Optional[Number] = None
+    availability_matrix: Optional[List[List[int]]] = None
+    intervals: Optional[List[Interval]] = None
+    availability_bits: Optional[AvailabilityBits] = None
+    cells: Optional[str] = None
+
+
+class Schedule(_Frozen):
+    day_start: Clock = "00:00"
+    timezone: Optional[str] = None
+
+
+class ModelQuery(_QueryOptions):
+    """The per-query fields of a model payload; everything except attendees, days and slots_per_day."""
+    slot_minutes: LaxPositiveInt
+    meeting_length_minutes: Optional[LaxPositiveInt] = None
+    top_k: LaxPositiveInt = 5
+    active_attendees: Optional[List[str]] = None
+    schedule: Optional[Schedule] = None
+
+    @model_validator(mode="after")
+    def _check_length(self) -> "ModelQuery":
+        if self.meeting_length_minutes is None and self.meeting_length_range is None:
+            raise ValueError("meeting_length_minutes is required")
+        return self
+
+
+class ModelPayload(ModelQuery):
+    """
+    Scheduler input on an arbitrary slot grid (see model.model). Documentation only: raw payloads are
+    checked against ModelQuery, and their attendee fields by model.compile_roster.
+    """
+    attendees: Annotated[List[ModelAttendee], Field(min_length=1)]
+    days: Optional[List[str]] = None
+    slots_per_day: Optional[Annotated[StrictInt, Field(gt=0)]] = None
+
+
+def _location(loc: Tuple[Any, ...]) -> str:
+    path = ""
+    for part in loc:
+        path += f"[{part}]" if isinstance(part, int) else (f".{part}" if path else str(part))
+    return path
+
+
+def _error_message(error: ValidationError, ctx: str = "") -> str:
+    """First validation error as one line: messages raised by our own checks as is, else 'field: problem'."""
+    err = error.errors(include_url=False)[0]
+    if err["type"] == "value_error":
+        return str(err["ctx"]["error"])
+    loc = _location(((ctx,) if ctx else ()) + tuple(err["loc"]))
+    if err["type"] == "missing":
+        return f"{loc} is required"
+    return f"{loc}: {err['msg']}" if loc else err["msg"]
+
+
+def parse(model: Type[M], data: Any, ctx: str = "") -> M:
+    """Validate data into model, raising ValueError with a readable message (ctx prefixes field paths)."""
+    try:
+        return model.model_validate(data)
+    except ValidationError as e:
+        raise ValueError(_error_message(e, ctx)) from None
+
+
+def openapi_components() -> Dict[str, Any]:
+    """JSON schemas of the request models, for the OpenAPI components section."""
+    _, top = models_json_schema(
+        [(m, "validation") for m in (FrontendPayload, FrontendOptions, FrontendRoster, ModelPayload)],
+        ref_template="#/components/schemas/{model}",
+    )
+    return top["$defs"]
+
+
+def openapi_body(*models: Type[BaseModel], packed: bool = False) -> Dict[str, Any]:
+    """openapi_extra for a route that reads its body itself: a JSON request body of any of models."""
+    refs = [{"$ref": f"#/components/schemas/{m.__name__}"} for m in models]
+    content = {JSON_CONTENT_TYPE: {"schema": refs[0] if len(refs) == 1 else {"oneOf": refs}}}
+    if packed:
+        content[PACKED_CONTENT_TYPE] = {"schema": {"$ref": "#/components/schemas/ModelPayload"}}
+    return {"requestBody": {"required": True, "content": content}}
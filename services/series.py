@@ -0,0 +1,64 @@
+from typing import Iterable, List, Sequence
+
+import numpy as np
+
+
+def pack_series(
+    candidates: Iterable[Sequence[float]],
+    day_offsets: List[int],
+    day_start_minute: int,
+    slot_minutes: int,
+    L: int,
+    count: int,
+    one_per_day: bool,
+    min_gap_minutes: int
+) -> List[Sequence[float]]:
+    """
+    Weighted interval scheduling over scored windows (model.Candidate tuples, optionally tagged with
+    their length): the count non-overlapping windows with the highest total score, or as many as fit.
+    Windows must also be min_gap_minutes apart and, with one_per_day, on different days.
+    Returned in chronological order.
+
+    Windows are sorted by end time; prev[i] is how many of them end early enough to precede window i.
+    best_k[j], the best total of k windows among the first j, is a running maximum of
+    best_{k-1}[prev[i]] + score[i], so each k is one vectorized pass: O(count * windows).
+    """
+    windows = list(candidates)
+    if not windows:
+        return []
+    rows = np.array(windows, dtype=np.float64)
+    lengths = rows[:, 6] if rows.shape[1] > 6 else np.full(len(rows), float(L))
+    day_begin = np.asarray(day_offsets, dtype=np.float64)[rows[:, 5].astype(np.intp)] + day_start_minute
+    begin = day_begin + rows[:, 4] * slot_minutes
+    end = begin + lengths * slot_minutes
+
+    # By end, then start; lexsort is stable, so remaining ties keep the engine's day/start order
+    order = np.lexsort((begin, end))
+    begin, end, day_begin = begin[order], end[order], day_begin[order]
+    score = -rows[order, 0]
+    limit = begin - min_gap_minutes
+    if one_per_day:
+        limit = np.minimum(limit, day_begin)
+    prev = np.searchsorted(end, limit, side="right")
+
+    n = len(score)
+    index = np.arange(n)
+    best = np.zeros(n + 1)  # best total of 0 windows
+    choices = []  # per k: earliest window reaching the best total of k windows among the first i + 1
+    for _ in range(count):
+        totals = best[prev] + score
+        running = np.maximum.accumulate(totals)
+        if not np.isfinite(running[-1]):
+            break
+        improved = np.ones(n, dtype=bool)
+        improved[1:] = totals[1:] > running[:-1]
+        choices.append(np.maximum.accumulate(np.where(improved, index, 0)))
+        best = np.concatenate(([-np.inf], running))
+
+    chosen = []
+    end_at = n
+    for choice in reversed(choices):
+        i = int(choice[end_at - 1])
+        chosen.append(i)
+        end_at = int(prev[i])
+    return [windows[order[i]] for i in reversed(chosen)]
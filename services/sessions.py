@@ -0,0 +1,148 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from model import compile_roster, model, patch_roster
+from services.roster_cache import roster_key
+from services.transformer import transform_frontend_options, transform_frontend_roster, transform_frontend_users
+
+MAX_SESSIONS = 256
+SESSION_TTL_SECONDS = 60 * 60
+# Per-day rankings are kept for this many distinct queries per session
+MAX_RANKINGS_PER_SESSION = 8
+
+_sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def _expire(now: float):
+    while _sessions:
+        sid, session = next(iter(_sessions.items()))
+        if now - session["touched"] < SESSION_TTL_SECONDS and len(_sessions) <= MAX_SESSIONS:
+            break
+        del _sessions[sid]
+
+
+def create_session(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Start a session from a frontend roster ({ availability: [...], date_range?, slot_minutes? }).
+    The roster is compiled once; later edits patch it in place (see model.patch_roster).
+    """
+    payload = transform_frontend_roster(data)
+    session = {
+        "id": secrets.token_urlsafe(16),
+        "roster": compile_roster(payload, validated=True),
+        "slot_minutes": payload["slot_minutes"],
+        "users": {att["name"].lower(): user for att, user in zip(payload["attendees"], data["availability"])},
+        "rankings": OrderedDict(),
+        "lock": threading.Lock(),
+        "touched": time.monotonic(),
+    }
+    with _lock:
+        _sessions[session["id"]] = session
+        _expire(session["touched"])
+    return session
+
+
+def get_session(session_id: str) -> Optional[Dict[str, Any]]:
+    with _lock:
+        now = time.monotonic()
+        _expire(now)
+        session = _sessions.get(session_id)
+        if session is not None:
+            session["touched"] = now
+            _sessions.move_to_end(session_id)
+        return session
+
+
+def delete_session(session_id: str) -> bool:
+    with _lock:
+        return _sessions.pop(session_id, None) is not None
+
+
+def describe(session: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "session_id": session["id"],
+        "users": [att["name"] for att in session["roster"]["attendees"]],
+    }
+
+
+def query_session(session: Dict[str, Any], data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run model() for the per-query fields in data, re-scoring only days changed since the last identical query.
+    The session's days and slot grid were fixed at creation, so date_range and slot_minutes in data are ignored.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Request body must be an object")
+    options = {k: v for k, v in data.items() if k not in ("date_range", "slot_minutes")}
+    payload = transform_frontend_options({**options, "slot_minutes": session["slot_minutes"]})
+    key = roster_key(payload)
+    with session["lock"]:
+        rankings = session["rankings"]
+        day_ranking = rankings.pop(key, {})
+        result = model(payload, roster=session["roster"], day_ranking=day_ranking)
+        rankings[key] = day_ranking
+        while len(rankings) > MAX_RANKINGS_PER_SESSION:
+            rankings.popitem(last=False)
+    return result
+
+
+def _index_of(session: Dict[str, Any], name: str) -> int:
+    norm = name.strip().lower()
+    for i, att in enumerate(session["roster"]["attendees"]):
+        if att["name"].lower() == norm:
+            return i
+    raise ValueError(f"Unknown user: '{name}'")
+
+
+def _apply(session: Dict[str, Any], op: str, index: int, user: Optional[Dict[str, Any]]) -> List[str]:
+    num_days = len(session["roster"]["days"])
+    attendee = transform_frontend_users([user], num_days, session["slot_minutes"])[0] if user is not None else None
+    affected = patch_roster(session["roster"], op, index, attendee, validated=True)
+    for day_ranking in session["rankings"].values():
+        for d_idx in affected:
+            day_ranking.pop(d_idx, None)
+    return [session["roster"]["days"][d] for d in affected]
+
+
+def update_user(session: Dict[str, Any], name: str, changes: Dict[str, Any]) -> List[str]:
+    """Replace one user's timeSlots and/or priority; returns the days that will be re-ranked."""
+    if not isinstance(changes, dict):
+        raise ValueError("Request body must be an object")
+    with session["lock"]:
+        index = _index_of(session, name)
+        key = session["roster"]["attendees"][index]["name"].lower()
+        old = session["users"][key]
+        user = {
+            "name": old["name"],
+            "priority": changes.get("priority", old.get("priority", 1)),
+            "timeSlots": changes.get("timeSlots", old.get("timeSlots", [])),
+        }
+        affected = _apply(session, "update", index, user)
+        session["users"][key] = user
+    return affected
+
+
+def add_user(session: Dict[str, Any], user: Dict[str, Any]) -> List[str]:
+    if not isinstance(user, dict):
+        raise ValueError("Request body must be an object")
+    with session["lock"]:
+        name = user.get("name")
+        if isinstance(name, str) and name.strip().lower() in session["users"]:
+            raise ValueError(f"Duplicate user name detected: '{name.strip()}'")
+        affected = _apply(session, "add", 0, user)
+        session["users"][session["roster"]["attendees"][-1]["name"].lower()] = user
+    return affected
+
+
+def remove_user(session: Dict[str, Any], name: str) -> List[str]:
+    with session["lock"]:
+        index = _index_of(session, name)
+        if len(session["roster"]["attendees"]) == 1:
+            raise ValueError("A session must keep at least one user")
+        removed = session["roster"]["attendees"][index]["name"]
+        affected = _apply(session, "remove", index, None)
+        del session["users"][removed.lower()]
+    return affected
@@ -0,0 +1,201 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from model import Candidate, _compile_blockers, _day_blocker_mask, _window_candidate
+from services.metrics import count, stage
+from services.bitsets import attendee_bits
+
+
+def _unpack_bits(bits: int, num_slots: int) -> np.ndarray:
+    raw = np.frombuffer(bits.to_bytes((num_slots + 7) // 8, "little"), dtype=np.uint8)
+    return np.unpackbits(raw, bitorder="little")[:num_slots].astype(bool)
+
+
+def pack_availability(attendees: List[Dict[str, Any]], day_slot_counts: List[int]) -> np.ndarray:
+    """
+    Pack every attendee's availability into one attendee x day x slot int8 array.
+    Days shorter than the longest day are padded with -1; padded cells never fall inside a window.
+    """
+    cube = np.full((len(attendees), len(day_slot_counts), max(day_slot_counts)), -1, dtype=np.int8)
+    try:
+        for a, att in enumerate(attendees):
+            if "availability_matrix" in att:
+                for d, row in enumerate(att["availability_matrix"]):
+                    cube[a, d, :len(row)] = row
+                continue
+            for d, (busy, tentative, _) in enumerate(attendee_bits(att, len(day_slot_counts))):
+                row = cube[a, d, :day_slot_counts[d]]
+                row[:] = 2
+                row[_unpack_bits(tentative, day_slot_counts[d])] = 1
+                row[_unpack_bits(busy, day_slot_counts[d])] = 0
+    except (OverflowError, TypeError, ValueError):
+        raise ValueError("availability_matrix cells must be small integers (0, 1, 2) for the numpy engine")
+    return cube
+
+
+def _cumulative_counts(mask: np.ndarray) -> np.ndarray:
+    """Running count of True cells along the slot axis (last axis), with a leading zero column."""
+    counts = np.zeros(mask.shape[:-1] + (mask.shape[-1] + 1,), dtype=np.int32)
+    np.cumsum(mask, axis=-1, out=counts[..., 1:])
+    return counts
+
+
+def _window_counts(counts: np.ndarray, L: int) -> np.ndarray:
+    """Count True cells in every length-L window from _cumulative_counts output."""
+    return counts[..., L:] - counts[..., :-L]
+
+
+def _compile_state(
+    attendees: List[Dict[str, Any]],
+    day_slot_counts: List[int],
+    avail_scores: Dict[int, float]
+) -> Dict[str, Any]:
+    """Everything that does not depend on the meeting length: packed cube, prefix sums, running counts."""
+    cube = pack_availability(attendees, day_slot_counts)
+    weights = np.array([float(att["priority"]) for att in attendees], dtype=np.float64)
+
+    # Weighted timeline; attendees are accumulated in order so floats match the Python engine exactly
+    cell_scores = np.zeros(cube.shape, dtype=np.float64)
+    for value, score in avail_scores.items():
+        cell_scores[cube == value] = float(score)
+    timeline = np.zeros(cube.shape[1:], dtype=np.float64)
+    for a in range(len(attendees)):
+        timeline += weights[a] * cell_scores[a]
+    ps = np.zeros((cube.shape[1], cube.shape[2] + 1), dtype=np.float64)
+    np.cumsum(timeline, axis=1, out=ps[:, 1:])
+
+    return {
+        "weights": weights,
+        "ps": ps,
+        "counts": tuple(_cumulative_counts(cube == v) for v in (0, 1, 2)),
+    }
+
+
+def patch_vectorized_state(
+    state: Dict[str, Any],
+    op: str,
+    pos: int,
+    old: Optional[Dict[str, Any]],
+    new: Optional[Dict[str, Any]],
+    day_slot_counts: List[int],
+    avail_scores: Dict[int, float]
+):
+    """Patch cached prefix sums and running counts for one attendee edit (see model.patch_roster)."""
+    delta = np.zeros((len(day_slot_counts), max(day_slot_counts)), dtype=np.float64)
+    rows = {}
+    for att, sign in ((old, -1.0), (new, 1.0)):
+        if att is None:
+            continue
+        cube = pack_availability([att], day_slot_counts)[0]
+        for value, score in avail_scores.items():
+            delta[cube == value] += sign * float(att["priority"]) * float(score)
+        rows[sign] = cube
+    state["ps"][:, 1:] += np.cumsum(delta, axis=1)
+
+    if op == "remove":
+        state["weights"] = np.delete(state["weights"], pos)
+        state["counts"] = tuple(np.delete(counts, pos, axis=0) for counts in state["counts"])
+        return
+    new_counts = [_cumulative_counts(rows[1.0] == v) for v in (0, 1, 2)]
+    if op == "update":
+        state["weights"][pos] = float(new["priority"])
+        for counts, row in zip(state["counts"], new_counts):
+            counts[pos] = row
+    else:
+        state["weights"] = np.insert(state["weights"], pos, float(new["priority"]))
+        state["counts"] = tuple(np.insert(counts, pos, row, axis=0) for counts, row in zip(state["counts"], new_counts))
+
+
+def score_windows_vectorized(
+    attendees: List[Dict[str, Any]],
+    days: List[str],
+    day_slot_counts: List[int],
+    L: int,
+    slot_minutes: int,
+    day_start: str,
+    blockers: Dict[str, Any],
+    avail_scores: Dict[int, float],
+    top_priority: float,
+    hard_block: bool,
+    require_distinct_top: bool,
+    unpref_penalty: float,
+    cache: Optional[Dict[str, Any]] = None,
+    day_indices: Optional[Iterable[int]] = None
+) -> Tuple[Iterable[Candidate], Callable[[int, int], List[str]]]:
+    """
+    NumPy engine: same contract and byte-identical output as model._score_windows,
+    but every window of every day is scored at once from cumulative sums.
+    The length-independent arrays are kept in cache (see model.compile_roster).
+    """
+    max_slots = max(day_slot_counts)
+    if max_slots < L:
+        return iter(()), lambda d_idx, start: []
+
+    state = cache.get("numpy") if cache is not None else None
+    if state is None:
+        with stage("timeline"):
+            state = _compile_state(attendees, day_slot_counts, avail_scores)
+        if cache is not None:
+            cache["numpy"] = state
+    weights = state["weights"]
+    ps = state["ps"]
+
+    # Per attendee/day/window cell counts: shape (attendees, days, windows), for the requested days only
+    # (one day shard, or the days an incremental re-rank still has to score)
+    day_list = range(len(days)) if day_indices is None else list(day_indices)
+    rows = slice(None) if day_indices is None else day_list
+    zeros, ones, twos = (_window_counts(counts[:, rows], L) for counts in state["counts"])
+
+    has_zero = zeros > 0
+    unpreferred_cells = ones.sum(axis=0)
+    fully_available = ((ones == 0) & ~has_zero).sum(axis=0)
+    total_full_avails = twos.sum(axis=0)
+
+    priority_blocked = np.zeros(unpreferred_cells.shape, dtype=bool)
+    top_mask = weights == top_priority
+    distinct_top_ok = not require_distinct_top or int(top_mask.sum()) == 1
+    if hard_block and distinct_top_ok:
+        priority_blocked = has_zero[top_mask].any(axis=0)
+
+    min_att = blockers.get("min_attendees")
+    blocked = priority_blocked
+    if isinstance(min_att, int):
+        blocked = priority_blocked | (fully_available < min_att)
+
+    conflict_counts = has_zero.sum(axis=0)
+    names = [att["name"] for att in attendees]
+    total_cells = len(attendees) * L if attendees else 1
+    compiled_blockers = _compile_blockers(blockers)
+
+    def candidates():
+        for row, d_idx in enumerate(day_list):
+            day_label = days[d_idx]
+            num_starts = day_slot_counts[d_idx] - L + 1
+            if num_starts <= 0:
+                continue
+            allowed = np.array(
+                _day_blocker_mask(day_label, num_starts, L, slot_minutes, day_start, compiled_blockers), dtype=bool
+            )
+            starts = np.flatnonzero(allowed & ~blocked[row, :num_starts])
+            by_priority = int(np.count_nonzero(allowed & priority_blocked[row, :num_starts]))
+            count("windows_blocked_priority", by_priority)
+            count("windows_blocked_min_attendees", int(np.count_nonzero(allowed)) - by_priority - len(starts))
+            raw = ps[d_idx, starts + L] - ps[d_idx, starts]
+            unpref = unpreferred_cells[row, starts]
+            for start, raw_sum, unpref_cells, full, n_conflicts, fully in zip(
+                starts.tolist(), raw.tolist(), unpref.tolist(), total_full_avails[row, starts].tolist(),
+                conflict_counts[row, starts].tolist(), fully_available[row, starts].tolist()
+            ):
+                score = raw_sum - unpref_penalty * unpref_cells
+                coverage = full / total_cells if total_cells else 0.0
+                yield _window_candidate(d_idx, start, score, coverage, n_conflicts, fully)
+
+    busy_counts = state["counts"][0]
+
+    def conflicts_for(d_idx: int, start: int) -> List[str]:
+        # From the running counts rather than has_zero, which holds the requested days only
+        busy = busy_counts[:, d_idx, start + L] - busy_counts[:, d_idx, start]
+        return [names[a] for a in np.flatnonzero(busy)]
+
+    return candidates(), conflicts_for
@@ -0,0 +1,323 @@
+import asyncio
+import contextvars
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from services import metrics
+
+# Number of scoring worker processes; defaults to one per CPU
+WORKERS_ENV = "MEETSYNC_WORKERS"
+# Jobs allowed to wait for a free worker before new requests are rejected; defaults to 4 per worker
+QUEUE_SIZE_ENV = "MEETSYNC_QUEUE_SIZE"
+# Seconds a request may spend queued plus running before it is abandoned
+JOB_TIMEOUT_ENV = "MEETSYNC_JOB_TIMEOUT"
+DEFAULT_JOB_TIMEOUT = 30.0
+# Seconds between admission attempts while streamed jobs have nothing running (see stream_jobs)
+ADMIT_RETRY_SECONDS = 0.25
+
+Job = Tuple[Callable[..., Any], Tuple[Any, ...]]
+
+
+class Overloaded(Exception):
+    """The admission queue is full; retry_after is a suggested wait in seconds."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Scheduler is busy, retry later")
+        self.retry_after = retry_after
+
+
+class JobTimeout(Exception):
+    pass
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+# Threads for jobs whose state lives in this process (sessions, rankings); see run_local
+_threads: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+_in_flight = 0
+_avg_seconds = 0.0  # moving average of job duration, for Retry-After
+_counters = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0, "timed_out": 0, "cancelled": 0}
+
+
+def _env_number(name: str, default: float, cast: Callable[[str], float]) -> float:
+    raw = os.environ.get(name)
+    if not raw:
+        return default
+    try:
+        return cast(raw)
+    except ValueError:
+        raise ValueError(f"{name} must be a number")
+
+
+def worker_count() -> int:
+    return max(1, int(_env_number(WORKERS_ENV, os.cpu_count() or 1, int)))
+
+
+def queue_size() -> int:
+    return max(0, int(_env_number(QUEUE_SIZE_ENV, 4 * worker_count(), int)))
+
+
+def job_timeout() -> float:
+    return _env_number(JOB_TIMEOUT_ENV, DEFAULT_JOB_TIMEOUT, float)
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Process pool shared by every request, created on first use."""
+    global _pool
+    if _pool is None:
+        # spawn: forking a process that runs an event loop and threads is not safe
+        _pool = ProcessPoolExecutor(max_workers=worker_count(), mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def _warm() -> int:
+    import model  # noqa: F401  (pays the import cost before the first real job)
+    return os.getpid()
+
+
+def start_pool() -> None:
+    """Create the pool and start its processes so the first request does not pay for spawning them."""
+    pool = get_pool()
+    for _ in range(worker_count()):
+        pool.submit(_warm)
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+def _retry_after() -> int:
+    waiting = max(0, _in_flight - worker_count())
+    return min(60, max(1, math.ceil(_avg_seconds * (waiting + 1) / worker_count())))
+
+
+def _admit(count: int, record: bool = True):
+    # record=False for attempts that wait and retry rather than turn a request away
+    global _in_flight
+    with _lock:
+        if _in_flight + count > worker_count() + queue_size():
+            if record:
+                _counters["rejected"] += 1
+            raise Overloaded(_retry_after())
+        _in_flight += count
+        _counters["submitted"] += count
+
+
+def _release(count: int):
+    global _in_flight
+    with _lock:
+        _in_flight -= count
+
+
+def _timed_call(
+    fn: Callable[..., Any], args: Tuple[Any, ...], profile: bool
+) -> Tuple[float, Any, Dict[str, Any], Optional[str]]:
+    """
+    Runs in the worker: how long the job actually ran (excluding queueing), its result, the stage
+    timings/counters it recorded and, when profiled, the name of the saved collapsed-stack file.
+    The job is sampled when the request asked for a profile or when MEETSYNC_PROFILE_SLOW_MS is set
+    (profiling must be enabled with MEETSYNC_PROFILE_DIR); slow-only samples are kept past the threshold.
+    """
+    trace = metrics.start_trace()
+    slow = metrics.slow_threshold() if metrics.profiling_enabled() else None
+    sampler = metrics.StackSampler().start() if profile or slow is not None else None
+    started = time.perf_counter()
+    try:
+        result = fn(*args)
+    finally:
+        elapsed = time.perf_counter() - started
+        folded = sampler.stop() if sampler is not None else ""
+    profile_name = None
+    if folded and (profile or elapsed >= slow):
+        profile_name = metrics.save_profile(folded, getattr(fn, "__name__", "job"))
+    return elapsed, result, trace.export(), profile_name
+
+
+def _on_done(future: Future):
+    # Runs when the process finishes (or the queued job is cancelled), not when the request gives up,
+    # so an abandoned job keeps its admission slot until it really stops using a worker.
+    global _avg_seconds
+    _release(1)
+    with _lock:
+        if future.cancelled():
+            _counters["cancelled"] += 1
+        elif future.exception() is not None:
+            _counters["failed"] += 1
+        else:
+            _counters["completed"] += 1
+            elapsed = future.result()[0]
+            _avg_seconds = elapsed if _avg_seconds == 0.0 else 0.8 * _avg_seconds + 0.2 * elapsed
+
+
+def start_jobs(jobs: List[Job], profile: bool = False, record: bool = True) -> List[Future]:
+    """
+    Submit jobs to the worker pool, admitted together or not at all (Overloaded when the admission
+    queue is full). The futures resolve to _timed_call results.
+    """
+    _admit(len(jobs), record)
+    pool = get_pool()
+    futures = []
+    try:
+        for fn, args in jobs:
+            future = pool.submit(_timed_call, fn, args, profile)
+            future.add_done_callback(_on_done)
+            futures.append(future)
+    except Exception:
+        _release(len(jobs) - len(futures))
+        for future in futures:
+            future.cancel()
+        raise
+    return futures
+
+
+def _pool_broke(pool: ProcessPoolExecutor):
+    # A worker died (e.g. killed for memory); start a fresh pool for later requests
+    if _pool is pool:
+        shutdown_pool()
+
+
+async def run_jobs(jobs: List[Job]) -> List[Any]:
+    """
+    Run jobs in the worker pool and return their results in order.
+
+    The jobs are admitted together or not at all (Overloaded when the admission queue is full).
+    They share one deadline (JobTimeout); on timeout or cancellation of the awaiting request,
+    jobs that have not started yet are cancelled.
+    """
+    trace = metrics.current_trace()
+    profile = bool(trace is not None and trace.profile and metrics.profiling_enabled())
+    submitted = time.perf_counter()
+    futures = start_jobs(jobs, profile)
+    pool = get_pool()
+
+    try:
+        results = await asyncio.wait_for(
+            asyncio.gather(*(asyncio.wrap_future(f) for f in futures)), timeout=job_timeout()
+        )
+        if trace is not None:
+            # Worker stages are summed across jobs; "queue" is the wall time not spent running any job
+            waited = time.perf_counter() - submitted
+            trace.stages["queue"] = trace.stages.get("queue", 0.0) + max(0.0, waited - max(r[0] for r in results))
+            for _, _, job_trace, profile_name in results:
+                trace.merge(job_trace)
+                if profile_name:
+                    trace.profiles.append(profile_name)
+        return [result for _, result, _, _ in results]
+    except asyncio.TimeoutError:
+        with _lock:
+            _counters["timed_out"] += 1
+        raise JobTimeout(f"Scheduling did not finish within {job_timeout():g} seconds")
+    except BrokenProcessPool:
+        _pool_broke(pool)
+        raise
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+async def run_job(fn: Callable[..., Any], *args: Any) -> Any:
+    return (await run_jobs([(fn, args)]))[0]
+
+
+def _local_call(context: contextvars.Context, fn: Callable[..., Any], args: Tuple[Any, ...]) -> Tuple[float, Any]:
+    started = time.perf_counter()
+    result = context.run(fn, *args)
+    return time.perf_counter() - started, result
+
+
+async def run_local(fn: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run a job in a thread of this process, for jobs that use state kept here (sessions, rankings).
+    It takes an admission slot like a pool job (Overloaded when the queue is full) and has the same
+    deadline (JobTimeout). A running thread cannot be stopped, so it keeps its slot until it finishes.
+    """
+    global _threads
+    _admit(1)
+    try:
+        if _threads is None:
+            _threads = ThreadPoolExecutor(max_workers=worker_count(), thread_name_prefix="meetsync-local")
+        # The copied context carries the request's trace, so stages timed in the thread are recorded
+        future = _threads.submit(_local_call, contextvars.copy_context(), fn, args)
+    except Exception:
+        _release(1)
+        raise
+    future.add_done_callback(_on_done)
+    try:
+        return (await asyncio.wait_for(asyncio.wrap_future(future), timeout=job_timeout()))[1]
+    except asyncio.TimeoutError:
+        with _lock:
+            _counters["timed_out"] += 1
+        raise JobTimeout(f"Scheduling did not finish within {job_timeout():g} seconds")
+    finally:
+        future.cancel()
+
+
+async def stream_jobs(
+    jobs: List[Job], timeout: float, started: Optional[List[Future]] = None
+) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    (index, result) of jobs in the order they finish, within one deadline (JobTimeout).
+
+    Jobs are admitted one at a time as admission slots free up, with at most one per worker running
+    or queued at once, so a long series of jobs shares the queue with other requests instead of
+    claiming it up front. started holds the start_jobs futures of the first jobs, if they were
+    submitted already. The consumer may append jobs to the list while iterating.
+    When the consumer stops early (or is cancelled), jobs that have not started yet are cancelled.
+    """
+    pool = get_pool()
+    running = {asyncio.wrap_future(f): (i, f) for i, f in enumerate(started or [])}
+    submitted = len(running)
+    deadline = time.monotonic() + timeout
+    try:
+        while submitted < len(jobs) or running:
+            while submitted < len(jobs) and len(running) < worker_count():
+                try:
+                    future = start_jobs([jobs[submitted]], record=False)[0]
+                except Overloaded:
+                    break
+                running[asyncio.wrap_future(future)] = (submitted, future)
+                submitted += 1
+            remaining = deadline - time.monotonic()
+            done = set()
+            if remaining > 0 and running:
+                done, _ = await asyncio.wait(running, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            elif remaining > 0:
+                # Nothing of ours is running and the queue is full: wait for other requests to drain it
+                await asyncio.sleep(min(ADMIT_RETRY_SECONDS, remaining))
+                continue
+            if not done:
+                with _lock:
+                    _counters["timed_out"] += 1
+                raise JobTimeout(f"Scheduling did not finish within {timeout:g} seconds")
+            for waiter in sorted(done, key=lambda w: running[w][0]):
+                index, _ = running.pop(waiter)
+                yield index, waiter.result()[1]
+    except BrokenProcessPool:
+        _pool_broke(pool)
+        raise
+    finally:
+        for _, future in running.values():
+            future.cancel()
+        for future in started or []:
+            future.cancel()
+
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        running = min(_in_flight, worker_count())
+        return {
+            "workers": worker_count(),
+            "queue_size": queue_size(),
+            "running": running,
+            "queue_depth": _in_flight - running,
+            **_counters,
+        }
@@ -13,7 +13,7 @@ function flashMessage(msg = "No details", type = "success", status = "", errType
   const alert = template.content.cloneNode(true).querySelector(".alert");
 
   alert.className = `alert alert-${type}`;
-  alert.querySelector(".alert-icon").src = `/static/styles/images/${type}.png`;
+  alert.querySelector(".alert-icon").src = new URL(`../styles/images/${type}.png`, import.meta.url).href;
   alert.querySelector("strong").textContent = `${type.toUpperCase()} ${status} ${errType}`;
   alert.querySelector("span").textContent = msg;
   alert.querySelector(".alert-close").addEventListener("click", () => {
@@ -1,3 +1,31 @@
+import os
+
+import jinja2
 from fastapi.templating import Jinja2Templates
 
-templates = Jinja2Templates(directory="templates", trim_blocks=True, lstrip_blocks=True)
+from services.assets import asset_url, jinja_cache_dir
+
+
+class _BytecodeCache(jinja2.FileSystemBytecodeCache):
+    """
+    Compiled templates persist across restarts (and come with a build), so a cold start skips parsing them.
+    The directory is created when the first template is written to it, not when this module is imported.
+    """
+
+    def dump_bytecode(self, bucket: jinja2.bccache.Bucket) -> None:
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            super().dump_bytecode(bucket)
+        except OSError:  # read-only deployment without a build: compile in memory
+            pass
+
+
+environment = jinja2.Environment(
+    loader=jinja2.FileSystemLoader("templates"),
+    autoescape=True,
+    trim_blocks=True,
+    lstrip_blocks=True,
+    bytecode_cache=_BytecodeCache(jinja_cache_dir()),
+)
+environment.globals["asset"] = asset_url
+templates = Jinja2Templates(env=environment)
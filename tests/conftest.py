@@ -0,0 +1,22 @@
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """
+    The app with empty caches and, unless a fixture requested before this one set MEETSYNC_WORKERS,
+    a two-process worker pool.
+    """
+    if "MEETSYNC_WORKERS" not in os.environ:
+        monkeypatch.setenv("MEETSYNC_WORKERS", "2")
+    import main
+    from services.result_cache import result_cache
+    from services.roster_cache import roster_cache
+
+    result_cache.clear()
+    roster_cache.clear()
+    with TestClient(main.app) as test_client:
+        yield test_client
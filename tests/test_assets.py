@@ -0,0 +1,55 @@
+import gzip
+import json
+from pathlib import Path
+
+import pytest
+from starlette.routing import Mount
+
+from services import assets
+
+
+@pytest.fixture
+def built(tmp_path, monkeypatch):
+    """A fresh asset build in tmp_path, picked up by the app's /static mount."""
+    monkeypatch.setenv(assets.BUILD_DIR_ENV, str(tmp_path))
+    monkeypatch.setenv(assets.JINJA_CACHE_DIR_ENV, str(tmp_path / "jinja"))
+    result = assets.build(str(tmp_path))
+    import main
+    static = next(route.app for route in main.app.routes if isinstance(route, Mount) and route.path == "/static")
+    # The mount sets up its routes on first use; drop them so they are set up for this build
+    monkeypatch.setattr(static, "router", None)
+    yield result
+    assets.manifest.cache_clear()
+    assets.version.cache_clear()
+    assets._page_bodies.cache_clear()
+
+
+def test_build_writes_a_versioned_manifest(built, tmp_path):
+    manifest = json.loads((tmp_path / assets.MANIFEST).read_text())
+    assert manifest == built
+    assert manifest["version"] == assets.tree_version() == assets.version()
+    assert set(manifest["files"]) == set(assets._static_files(assets.STATIC_DIR))
+    main_js = Path(assets.STATIC_DIR, "scripts", "main.js").read_bytes()
+    assert (tmp_path / "static" / "scripts" / "main.js").read_bytes() == main_js
+    assert gzip.decompress((tmp_path / "static" / "scripts" / "main.js.gz").read_bytes()) == main_js
+    assert set(manifest["pages"]) == set(assets.PAGES)
+
+
+def test_versioned_assets_are_precompressed_and_immutable(built, client):
+    url = f"/static/{built['version']}/scripts/main.js"
+    main_js = Path(assets.STATIC_DIR, "scripts", "main.js").read_bytes()
+
+    response = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["cache-control"] == assets.IMMUTABLE
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.content == main_js  # decoded by the client
+
+    identity = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+    assert identity.content == main_js
+
+    # Plain paths still work, but are revalidated
+    plain = client.get("/static/scripts/main.js")
+    assert plain.status_code == 200 and plain.headers["cache-control"] == assets.REVALIDATE
@@ -0,0 +1,58 @@
+import copy
+
+from benchmarks.roster_gen import frontend_payload, model_payload
+
+SCENARIOS = [
+    {},
+    {"meeting_length_minutes": 30, "top_k": 3},
+    {"weights": {"hard_block_for_high_priority": False, "unpreferred_penalty_per_person": 0.25}},
+    {"active_attendees": ["User 0", "User 2", "User 4"]},
+    {"meeting_length_range": {"min": 30, "max": 90}, "weights": {"length_preference_per_minute": 0.01}},
+    {"constraints": {"global_blockers": {"hours": {"start": "09:00", "end": "17:00"}}}},
+    {"recurrence": {"frequency": "weekdays"}},
+    {"series": {"count": 2, "one_per_day": True}},
+]
+# Scenarios override the transformed model payload, so against a frontend roster only the fields that
+# mean the same in both shapes are compared (weights replace the frontend's default weights as a whole)
+FRONTEND_SCENARIOS = [SCENARIOS[i] for i in (0, 1, 5, 6, 7)]
+
+
+def _check_batch(client, roster, scenarios):
+    response = client.post("/call-model/batch", json={"roster": roster, "scenarios": scenarios})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert len(results) == len(scenarios)
+    for scenario, result in zip(scenarios, results):
+        alone = client.post("/call-model", json={**copy.deepcopy(roster), **scenario})
+        assert alone.status_code == 200
+        assert result == alone.json()
+
+
+def test_batch_results_match_individual_requests(client):
+    _check_batch(client, model_payload(seed=7, attendees=6, days=5), SCENARIOS)
+
+
+def test_batch_results_match_individual_frontend_requests(client):
+    _check_batch(client, frontend_payload(seed=7, attendees=6, days=5), FRONTEND_SCENARIOS)
+
+
+def test_scenario_errors_are_reported_with_their_index(client):
+    roster = frontend_payload(seed=7, attendees=6, days=5)
+    scenarios = [
+        {"top_k": 2},
+        {"top_k": 0},
+        {"meeting_length_minutes": 30},
+        {"constraints": {"groups": [{"name": "leads", "members": ["Nobody"]}]}},
+    ]
+    results = client.post("/call-model/batch", json={"roster": roster, "scenarios": scenarios}).json()["results"]
+    assert len(results[0]["suggestions"]) == 2
+    assert results[1] == {"error": "scenarios[1]: top_k: Input should be greater than 0"}
+    assert "suggestions" in results[2]
+    assert results[3] == {"error": "scenarios[3]: constraints.groups[0].members: unknown attendee 'Nobody'"}
+
+
+def test_roster_overrides_are_rejected(client):
+    roster = frontend_payload(seed=7, attendees=3, days=2)
+    response = client.post("/call-model/batch", json={"roster": roster, "scenarios": [{}, {"date_range": None}]})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "scenarios[1] cannot override roster field 'date_range'"
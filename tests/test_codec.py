@@ -0,0 +1,74 @@
+import base64
+import gzip
+import random
+
+import pytest
+
+from services.codec import _gunzip, accepts_encoding, pack_cells, pack_rows, unpack_cells, unpack_rows
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_cells_round_trip(seed):
+    rng = random.Random(seed)
+    slots = rng.randint(1, 40)
+    rows = [[rng.choice([0, 1, 2]) for _ in range(slots)] for _ in range(rng.randint(1, 5))]
+    bits = unpack_cells(pack_cells(rows), [slots] * len(rows), "a")
+    for d, row in enumerate(rows):
+        assert [(bits["busy"][d] >> t) & 1 for t in range(slots)] == [int(v == 0) for v in row]
+        assert [(bits["tentative"][d] >> t) & 1 for t in range(slots)] == [int(v == 1) for v in row]
+
+
+def test_cells_reject_nonzero_padding():
+    with pytest.raises(ValueError, match="padding"):
+        unpack_cells(base64.b64encode(b"\xfc").decode(), [1], "a")
+
+
+def test_rows_round_trip():
+    result = {
+        "results": [
+            {"suggestions": [{"day": "Mon", "score": 1.0, "conflicts": ["a"]}, {"day": "Tue", "score": 0.5, "conflicts": []}]},
+            {"error": "bad"},
+            {"suggestions": []},
+        ]
+    }
+    packed = pack_rows(result)
+    assert packed["results"][0]["suggestions"]["columns"] == ["day", "score", "conflicts"]
+    assert unpack_rows(packed) == result
+
+
+@pytest.mark.parametrize(
+    "header, accepted",
+    [
+        ("gzip", True),
+        ("br, GZIP;q=0.5", True),
+        ("*", True),
+        ("gzip;q=0", False),
+        ("gzip;q=0, *", False),
+        ("x-gzip", False),
+        ("", False),
+        (None, False),
+    ],
+)
+def test_accepts_gzip(header, accepted):
+    assert accepts_encoding(header, "gzip") is accepted
+
+
+def test_gunzip_round_trip():
+    body = b'{"top_k": 3}' * 100
+    assert _gunzip(gzip.compress(body)) == body
+
+
+@pytest.mark.parametrize(
+    "mangle",
+    [
+        lambda data: data[:-4],
+        lambda data: data[:len(data) // 2],
+        lambda data: data + b"trailing garbage",
+        lambda data: data + gzip.compress(b"{}"),
+        lambda data: b"not gzip",
+    ],
+    ids=["truncated-trailer", "truncated-stream", "trailing-garbage", "second-member", "not-gzip"],
+)
+def test_gunzip_rejects_incomplete_or_padded_bodies(mangle):
+    with pytest.raises(ValueError, match="Invalid gzip body"):
+        _gunzip(mangle(gzip.compress(b'{"top_k": 3}' * 100)))
@@ -0,0 +1,130 @@
+import copy
+import json
+import random
+from pathlib import Path
+
+import pytest
+
+from benchmarks.roster_gen import model_payload
+from model import ENGINES, compile_roster, model
+
+
+# Outputs of the original single-engine model (baseline commit 0477f60) for small seeded payloads
+GOLDEN = json.loads((Path(__file__).parent / "baseline_golden.json").read_text())
+
+
+def _normalized(result):
+    return json.dumps(result, sort_keys=True)
+
+
+def _payload(seed: int):
+    """Seeded payload covering both attendee forms, fine and coarse grids and every query mode."""
+    rng = random.Random(seed)
+    slot = rng.choice([5, 15, 30, 60])
+    payload = model_payload(
+        seed=seed,
+        attendees=rng.randint(1, 10),
+        days=rng.randint(1, 6),
+        slot_minutes=slot,
+        form=rng.choice(["availability_matrix", "intervals"]),
+        blockers=rng.choice(["none", "office", "strict"]),
+        busy_density=rng.choice([0.0, 0.3, 0.8]),
+        meeting_length_minutes=rng.choice([slot, 30, 60, 95]),
+        top_k=rng.choice([1, 5, 40]),
+    )
+    for att in payload["attendees"]:
+        att["priority"] = rng.choice([1, 1, 2, 3])
+    payload["weights"] = {
+        "hard_block_for_high_priority": rng.random() < 0.5,
+        "distinct_top_priority_only": rng.random() < 0.7,
+        "unpreferred_penalty_per_person": rng.choice([0.0, 0.1, 0.25]),
+    }
+    if rng.random() < 0.3:
+        payload["weights"]["avail_scores"] = {"0": -1.0, "1": 0.3, "2": 1.1}
+    if rng.random() < 0.2:
+        payload["active_attendees"] = [att["name"] for att in payload["attendees"][::2]]
+
+    mode = rng.choice(["plain", "plain", "range", "recurrence", "series", "groups"])
+    if mode == "range":
+        del payload["meeting_length_minutes"]
+        payload["meeting_length_range"] = {"min": 30, "max": 90}
+        payload["weights"]["length_preference_per_minute"] = 0.01
+    elif mode == "recurrence":
+        payload["recurrence"] = {"frequency": "weekdays"}
+    elif mode == "series":
+        payload["series"] = {"count": rng.randint(1, 3), "one_per_day": rng.random() < 0.5}
+    elif mode == "groups":
+        members = [att["name"] for att in payload["attendees"][:3]]
+        payload["constraints"]["groups"] = [{"name": "core", "members": members, "min_available": 1}]
+    return payload
+
+
+def _run(payload):
+    try:
+        return _normalized(model(copy.deepcopy(payload)))
+    except ValueError as ve:
+        return f"ValueError: {ve}"
+
+
+@pytest.mark.parametrize("engine", [engine for engine in ENGINES if engine != "python"])
+@pytest.mark.parametrize("seed", range(60))
+def test_engine_matches_python_reference(engine, seed):
+    payload = _payload(seed)
+    assert _run({**payload, "engine": engine}) == _run({**payload, "engine": "python"})
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("case", range(len(GOLDEN)))
+def test_engine_matches_baseline_golden(engine, case):
+    golden = GOLDEN[case]
+    assert _run({**golden["payload"], "engine": engine}) == _normalized(golden["expected"])
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("seed", range(10))
+def test_compiled_roster_matches_one_shot(engine, seed):
+    payload = {**_payload(seed), "engine": engine}
+    roster = compile_roster(copy.deepcopy(payload))
+    expected = _run(payload)
+    # Twice: the second query reuses the engine state cached in the roster
+    for _ in range(2):
+        assert _normalized(model(copy.deepcopy(payload), roster=roster)) == expected
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_zero_scores_are_unsigned(engine):
+    # Window sums that cancel out exactly in one engine come out as a tiny negative in another
+    payload = {
+        "slot_minutes": 60,
+        "meeting_length_minutes": 60,
+        "top_k": 6,
+        "days": ["d1"],
+        "attendees": [
+            {"name": "u0", "priority": 1.5, "availability_matrix": [[1, 0, 1, 2, 1, 1]]},
+            {"name": "u1", "priority": 1.5, "availability_matrix": [[1, 1, 2, 0, 2, 0]]},
+            {"name": "u2", "priority": 1.5, "availability_matrix": [[0, 0, 2, 1, 2, 2]]},
+        ],
+        "weights": {"hard_block_for_high_priority": False, "avail_scores": {"0": -0.2, "1": 0.1, "2": 0.3}},
+    }
+    result = _run({**payload, "engine": engine})
+    assert "-0.0" not in result
+    assert result == _run({**payload, "engine": "python"})
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("seed", range(5))
+def test_codes_outside_0_1_2_match_python_reference(engine, seed):
+    # Such cells are neither busy nor tentative: they only change the score (via avail_scores) and coverage
+    rng = random.Random(seed)
+    payload = {
+        "slot_minutes": 60,
+        "meeting_length_minutes": rng.choice([60, 120, 180]),
+        "top_k": 20,
+        "days": ["d1", "d2"],
+        "attendees": [
+            {"name": f"u{a}", "availability_matrix": [[rng.choice([0, 1, 2, 2, 3, -1]) for _ in range(8)] for _ in range(2)]}
+            for a in range(4)
+        ],
+        "weights": {"hard_block_for_high_priority": False, "avail_scores": {"0": 0, "1": 0.5, "2": 1, "3": 0.8}},
+    }
+    assert _run({**payload, "engine": engine}) == _run({**payload, "engine": "python"})
@@ -0,0 +1,72 @@
+import random
+
+import pytest
+
+from services.groups import compile_groups, quorum_filter
+
+NAMES = ["Ana", "Raj", "Li", "Sam", "Kim"]
+
+
+def test_min_available_is_kept():
+    rules = compile_groups([{"name": "eng", "members": ["Ana", "Raj", "Li"], "min_available": 2}], NAMES, range(5))
+    assert rules == [((0, 1, 2), 2)]
+
+
+def test_without_minimum_every_member_is_required():
+    rules = compile_groups([{"name": "leads", "members": ["Raj", "Ana"]}], NAMES, range(5))
+    assert rules == [((0, 1), 2)]
+
+
+@pytest.mark.parametrize("percent, need", [(1, 1), (33, 1), (34, 2), (50, 2), (67, 3), (100, 3)])
+def test_min_percent_rounds_up(percent, need):
+    rules = compile_groups([{"name": "eng", "members": ["Ana", "Raj", "Li"], "min_percent": percent}], NAMES, range(5))
+    assert rules == [((0, 1, 2), need)]
+
+
+def test_members_outside_active_attendees_are_left_out():
+    # Active attendees Raj, Sam and Kim sit at positions 0, 1 and 2
+    subset = [1, 3, 4]
+    rules = compile_groups([{"name": "eng", "members": ["Ana", "Raj", "Kim"], "min_percent": 50}], NAMES, subset)
+    assert rules == [((0, 2), 1)]
+    # No active member and no minimum: nothing to require
+    assert compile_groups([{"name": "leads", "members": ["Ana", "Li"]}], NAMES, subset) == []
+
+
+def test_min_available_above_active_members_is_rejected():
+    group = {"name": "eng", "members": ["Ana", "Raj", "Li"], "min_available": 2}
+    with pytest.raises(ValueError, match=r"constraints.groups\[0\]: min_available exceeds its 1 active members"):
+        compile_groups([group], NAMES, [1, 3])
+    with pytest.raises(ValueError, match="exceeds its 0 active members"):
+        compile_groups([group], NAMES, [3, 4])
+
+
+@pytest.mark.parametrize("member", ["Bob", "ana"])
+def test_unknown_member_is_rejected(member):
+    with pytest.raises(ValueError, match=rf"constraints.groups\[1\].members: unknown attendee '{member}'"):
+        compile_groups([{"name": "leads", "members": ["Ana"]}, {"name": "eng", "members": [member]}], NAMES, range(5))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_quorum_filter_matches_brute_force(seed):
+    rng = random.Random(seed)
+    num_slots = rng.randint(4, 12)
+    attendees = [
+        {"name": name, "availability_matrix": [[rng.choice([0, 1, 2, 2]) for _ in range(num_slots)] for _ in range(2)]}
+        for name in NAMES
+    ]
+    groups = [
+        {"name": "a", "members": rng.sample(NAMES, 3), "min_available": rng.randint(1, 3)},
+        {"name": "b", "members": rng.sample(NAMES, 4), "min_percent": rng.choice([25, 50, 75])},
+    ]
+    rules = compile_groups(groups, NAMES, range(len(NAMES)))
+    ok = quorum_filter(rules, attendees, [num_slots, num_slots], {})
+    for d_idx in range(2):
+        for L in range(1, num_slots + 1):
+            expected = [
+                all(
+                    sum(0 not in attendees[pos]["availability_matrix"][d_idx][start:start + L] for pos in members) >= need
+                    for members, need in rules
+                )
+                for start in range(num_slots - L + 1)
+            ]
+            assert ok(d_idx, L) == expected
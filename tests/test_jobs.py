@@ -0,0 +1,75 @@
+import json
+import time
+from collections import OrderedDict
+
+import pytest
+
+from benchmarks.roster_gen import frontend_payload
+from services import jobs, workers
+
+
+def _events(client, job_id):
+    """(event name, data) of a job's Server-Sent Events stream, read to its end."""
+    events, name = [], None
+    with client.stream("GET", f"/jobs/{job_id}/events") as stream:
+        assert stream.headers["content-type"].startswith("text/event-stream")
+        for line in stream.iter_lines():
+            if line.startswith("event: "):
+                name = line[len("event: "):]
+            elif line.startswith("data: "):
+                events.append((name, json.loads(line[len("data: "):])))
+    return events
+
+
+def test_job_streams_progress_then_the_full_result(client):
+    payload = frontend_payload(seed=4, attendees=20, days=30)
+    submitted = client.post("/jobs", json=payload)
+    assert submitted.status_code == 202
+    job_id = submitted.json()["job_id"]
+    assert submitted.headers["location"] == f"/jobs/{job_id}"
+
+    events = _events(client, job_id)
+    names = [name for name, _ in events]
+    assert names[-1] == "done" and set(names[:-1]) == {"progress"}
+    progress = [data["progress"] for _, data in events]
+    assert progress == sorted(progress) and progress[-1] == 100.0
+    final = events[-1][1]
+    assert final["status"] == "done"
+    assert final["result"] == client.post("/call-model", json=payload).json()
+    assert client.get(f"/jobs/{job_id}").json() == final
+
+
+def test_finished_jobs_expire_after_their_ttl(client, monkeypatch):
+    monkeypatch.setenv("MEETSYNC_JOB_RESULT_TTL", "1")
+    job_id = client.post("/jobs", json=frontend_payload(seed=1, attendees=3, days=2)).json()["job_id"]
+    assert _events(client, job_id)[-1][0] == "done"
+    assert client.get(f"/jobs/{job_id}").status_code == 200
+    time.sleep(1.1)
+    assert client.get(f"/jobs/{job_id}").status_code == 404
+    assert client.get(f"/jobs/{job_id}/events").status_code == 404
+
+
+def test_only_max_jobs_finished_jobs_are_kept(client, monkeypatch):
+    monkeypatch.setattr(jobs, "MAX_JOBS", 2)
+    monkeypatch.setattr(jobs, "_jobs", OrderedDict())
+    job_ids = []
+    for top_k in (1, 2, 3):
+        job_id = client.post("/jobs", json=frontend_payload(seed=1, attendees=3, days=2, top_k=top_k)).json()["job_id"]
+        assert _events(client, job_id)[-1][0] == "done"
+        job_ids.append(job_id)
+    # The third job went over the limit, so the oldest finished one was dropped
+    assert [client.get(f"/jobs/{job_id}").status_code for job_id in job_ids] == [404, 200, 200]
+
+
+@pytest.fixture
+def one_worker(monkeypatch):
+    monkeypatch.setenv("MEETSYNC_WORKERS", "1")
+    monkeypatch.setenv("MEETSYNC_QUEUE_SIZE", "0")
+
+
+def test_job_is_rejected_when_the_pool_is_full(one_worker, client):
+    blocker = workers.start_jobs([(time.sleep, (0.5,))])[0]
+    response = client.post("/jobs", json=frontend_payload(seed=1, attendees=3, days=2))
+    assert response.status_code == 503
+    assert int(response.headers["retry-after"]) >= 1
+    blocker.result()
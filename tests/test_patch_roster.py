@@ -0,0 +1,92 @@
+import copy
+import json
+import random
+
+import pytest
+
+from model import ENGINES, compile_roster, model, patch_roster
+
+
+def _normalized(result):
+    return json.dumps(result, sort_keys=True)
+
+
+def _attendee(rng: random.Random, name: str, num_days: int, num_slots: int):
+    """Random attendee as availability bits or, sometimes, intervals."""
+    if rng.random() < 0.3:
+        intervals = []
+        for day in range(num_days):
+            start = rng.randrange(num_slots)
+            intervals.append({"day": day, "start": start, "end": min(num_slots, start + 3), "value": rng.choice([0, 1, 2])})
+        return {"name": name, "priority": rng.randint(1, 3), "intervals": intervals}
+    bits = {"busy": [], "tentative": []}
+    for _ in range(num_days):
+        busy = tentative = 0
+        for _ in range(rng.randint(0, 4)):
+            start = rng.randrange(num_slots)
+            end = min(num_slots, start + rng.randint(1, 8))
+            mask = ((1 << (end - start)) - 1) << start
+            if rng.random() < 0.5:
+                busy, tentative = busy | mask, tentative & ~mask
+            else:
+                busy, tentative = busy & ~mask, tentative | mask
+        bits["busy"].append(busy)
+        bits["tentative"].append(tentative)
+    return {"name": name, "priority": rng.randint(1, 3), "availability_bits": bits}
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_patched_roster_matches_compiled(seed):
+    """Queries against a roster edited with patch_roster (and their per-day rankings) match a fresh compile."""
+    rng = random.Random(seed)
+    num_days, num_slots = rng.randint(1, 4), rng.randint(8, 30)
+    attendees = [_attendee(rng, f"a{i}", num_days, num_slots) for i in range(rng.randint(1, 6))]
+    base = {"slot_minutes": 15, "days": [f"2025-01-0{d + 1}" for d in range(num_days)], "slots_per_day": num_slots}
+    roster = compile_roster({**base, "attendees": copy.deepcopy(attendees)})
+
+    queries = []
+    for engine in ENGINES:
+        query = {
+            "meeting_length_minutes": 15 * rng.randint(1, 4),
+            "top_k": rng.randint(1, 6),
+            "engine": engine,
+            "weights": {
+                "hard_block_for_high_priority": rng.random() < 0.5,
+                "unpreferred_penalty_per_person": 0.1,
+                "avail_scores": rng.choice([{"0": 0, "1": 0.5, "2": 1}, {"0": 0, "1": 0.25, "2": 1}]),
+            },
+        }
+        if rng.random() < 0.3:
+            query["active_attendees"] = [rng.choice(attendees)["name"]]
+        queries.append(query)
+    day_rankings = [{} for _ in queries]
+
+    added = 0
+    for _ in range(8):
+        for query, day_ranking in zip(queries, day_rankings):
+            got = model({**base, **query}, roster, day_ranking=day_ranking)
+            expected = model({**base, **query, "attendees": copy.deepcopy(attendees)})
+            assert _normalized(got) == _normalized(expected)
+
+        op = rng.choice(["update", "add", "remove"])
+        if op == "remove" and len(attendees) == 1:
+            op = "add"
+        if op == "update":
+            i = rng.randrange(len(attendees))
+            attendee = _attendee(rng, attendees[i]["name"], num_days, num_slots)
+            if rng.random() < 0.5:
+                attendee["priority"] = attendees[i]["priority"]
+            affected = patch_roster(roster, "update", i, copy.deepcopy(attendee))
+            attendees[i] = attendee
+        elif op == "add":
+            added += 1
+            attendee = _attendee(rng, f"new{added}", num_days, num_slots)
+            affected = patch_roster(roster, "add", 0, copy.deepcopy(attendee))
+            attendees.append(attendee)
+        else:
+            i = rng.randrange(len(attendees))
+            affected = patch_roster(roster, "remove", i)
+            del attendees[i]
+        for day_ranking in day_rankings:
+            for day in affected:
+                day_ranking.pop(day, None)
@@ -0,0 +1,57 @@
+import copy
+import json
+import time
+
+from benchmarks.roster_gen import model_payload
+from model import model
+
+
+def _payload():
+    return model_payload(seed=3, attendees=6, days=3, meeting_length_minutes=60, top_k=7)
+
+
+def test_pages_read_through_the_cursor_match_the_full_ranking(client):
+    payload = _payload()
+    expected = model({**copy.deepcopy(payload), "top_k": 10 ** 6})["suggestions"]
+
+    created = client.post("/rankings", json=payload)
+    assert created.status_code == 201
+    first = created.json()
+    ranking_id = first["ranking_id"]
+    assert created.headers["location"] == f"/rankings/{ranking_id}"
+    assert first["total"] == len(expected)
+
+    suggestions, page = list(first["suggestions"]), first
+    while page["next_cursor"] is not None:
+        page = client.get(f"/rankings/{ranking_id}", params={"cursor": page["next_cursor"]}).json()
+        assert 0 < len(page["suggestions"]) <= 7
+        suggestions += page["suggestions"]
+    assert suggestions == expected
+
+    # A limit changes the page size only; the stream returns the rest from a cursor
+    assert client.get(f"/rankings/{ranking_id}", params={"cursor": "5", "limit": 3}).json()["suggestions"] == expected[5:8]
+    streamed = client.get(f"/rankings/{ranking_id}/stream", params={"cursor": "4"})
+    assert streamed.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in streamed.text.splitlines()] == expected[4:]
+
+
+def test_unknown_and_invalid_cursors(client):
+    ranking = client.post("/rankings", json=_payload()).json()
+    ranking_id, total = ranking["ranking_id"], ranking["total"]
+    for cursor in ("abc", "-1", str(total + 1)):
+        response = client.get(f"/rankings/{ranking_id}", params={"cursor": cursor})
+        assert response.status_code == 400 and response.json()["detail"] == "Invalid cursor"
+    assert client.get(f"/rankings/{ranking_id}", params={"cursor": str(total)}).json()["suggestions"] == []
+    assert client.get("/rankings/not-a-ranking").status_code == 404
+    assert client.get("/rankings/not-a-ranking/stream").status_code == 404
+
+
+def test_ranking_expires_after_its_ttl(client, monkeypatch):
+    ranking_id = client.post("/rankings", json=_payload()).json()["ranking_id"]
+    assert client.get(f"/rankings/{ranking_id}", params={"cursor": "7"}).status_code == 200
+    # The TTL is read on every access, so shortening it expires the ranking
+    monkeypatch.setenv("MEETSYNC_RANKING_TTL", "0.2")
+    time.sleep(0.3)
+    response = client.get(f"/rankings/{ranking_id}", params={"cursor": "7"})
+    assert response.status_code == 404 and response.json()["detail"] == "Unknown or expired ranking"
+    assert client.delete(f"/rankings/{ranking_id}").status_code == 404
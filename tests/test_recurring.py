@@ -0,0 +1,92 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from model import ENGINES, model
+
+
+def _one_day(payload, d_idx):
+    """The payload narrowed to one of its days, ranking every window."""
+    return {
+        **payload,
+        "days": [payload["days"][d_idx]],
+        "attendees": [{**att, "availability_matrix": [att["availability_matrix"][d_idx]]} for att in payload["attendees"]],
+        "top_k": 10 ** 6,
+    }
+
+
+def _brute_force(payload, occurrences, top_k):
+    """Score each occurrence on its own, keep the windows allowed on all of them and rank the aggregates."""
+    per_day = []
+    for d_idx in occurrences:
+        suggestions = model(_one_day(payload, d_idx))["suggestions"]
+        per_day.append({(s["start_slot_index"], s["meeting_length_minutes"]): s for s in suggestions})
+    ranked = []
+    for key in set(per_day[0]).intersection(*per_day[1:]):
+        windows = [day[key] for day in per_day]
+        mean = round(sum(s["score"] for s in windows) / len(windows), 4)
+        conflicts = sum(len(s["conflicts"]) for s in windows)
+        fully = min(s["fully_available_attendees"] for s in windows)
+        coverage = min(s["coverage"] for s in windows)
+        ranked.append(((-mean, conflicts, -fully, -coverage) + key, (mean, conflicts, fully, coverage)))
+    ranked.sort()
+    return [order[4:] + summary for order, summary in ranked[:top_k]]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("seed", range(20))
+def test_recurring_matches_brute_force(engine, seed):
+    rng = random.Random(seed)
+    # Ranges start and end mid-week, so the recurrence runs past them on either side
+    first_day = date(2025, 3, 3) + timedelta(days=rng.randrange(7))
+    days = [(first_day + timedelta(days=i)).isoformat() for i in range(rng.randint(3, 12))]
+    if rng.random() < 0.5:
+        recurrence = {"frequency": "weekdays"}
+        on_days = range(5)
+    else:
+        weekday = date.fromisoformat(rng.choice(days)).weekday()
+        recurrence = {"frequency": "weekly", "weekday": weekday}
+        on_days = (weekday,)
+    occurrences = [d for d, day in enumerate(days) if date.fromisoformat(day).weekday() in on_days]
+    if not occurrences:
+        recurrence, on_days = {"frequency": "weekly", "weekday": first_day.weekday()}, (first_day.weekday(),)
+        occurrences = [d for d, day in enumerate(days) if date.fromisoformat(day).weekday() in on_days]
+
+    num_slots = rng.choice([6, 10])
+    payload = {
+        "slot_minutes": 60,
+        "top_k": rng.choice([1, 3, 8]),
+        "days": days,
+        "attendees": [
+            {
+                "name": f"u{a}",
+                "priority": rng.choice([1, 1, 2]),
+                "availability_matrix": [
+                    [rng.choice([0, 1, 2, 2, 2]) for _ in range(num_slots)] for _ in days
+                ],
+            }
+            for a in range(rng.randint(1, 4))
+        ],
+        # Half-point cell scores keep every sum exact, so the means round the same way both ways
+        "weights": {
+            "hard_block_for_high_priority": rng.random() < 0.5,
+            "avail_scores": {"0": 0, "1": 0.5, "2": 1},
+        },
+    }
+    if rng.random() < 0.3:
+        payload["meeting_length_range"] = {"min": 60, "max": 180}
+    else:
+        payload["meeting_length_minutes"] = rng.choice([60, 120, 180])
+
+    suggestions = model({**payload, "engine": engine, "recurrence": recurrence})["suggestions"]
+    got = [
+        (
+            s["start_slot_index"], s["meeting_length_minutes"], s["score"],
+            s["total_conflicts"], s["fully_available_attendees"], s["worst_case_coverage"],
+        )
+        for s in suggestions
+    ]
+    assert got == _brute_force(payload, occurrences, payload["top_k"])
+    for s in suggestions:
+        assert [o["day"] for o in s["occurrences"]] == [days[d] for d in occurrences]
@@ -0,0 +1,37 @@
+import copy
+
+from benchmarks.roster_gen import frontend_payload
+from services.result_cache import etag_for, etag_matches
+
+
+def test_etag_matches_only_listed_tags():
+    etag = etag_for("abc")
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'W/"other", {etag}', etag)
+    assert not etag_matches('W/"other"', etag)
+    assert not etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+
+
+def test_call_model_revalidates_until_the_roster_changes(client):
+    payload = frontend_payload(seed=1, attendees=4, days=2)
+    first = client.post("/call-model", json=payload)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    # The same query, with its keys in another order, is still current
+    reordered = dict(reversed(list(payload.items())))
+    unchanged = client.post("/call-model", json=reordered, headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304
+    assert unchanged.headers["etag"] == etag
+    assert unchanged.content == b""
+
+    changed = copy.deepcopy(payload)
+    # Busy all week (Monday to Friday by default)
+    changed["availability"][0]["timeSlots"] = [
+        {"day": day, "startMinute": 0, "endMinute": 1440, "availabilityType": "busy"} for day in range(5)
+    ]
+    refreshed = client.post("/call-model", json=changed, headers={"If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert refreshed.headers["etag"] != etag
+    assert refreshed.json() != first.json()
@@ -0,0 +1,74 @@
+import copy
+
+import pytest
+
+from benchmarks.roster_gen import frontend_payload, model_payload
+from model import compile_roster, model
+from services import roster_cache as roster_cache_module
+from services.roster_cache import RosterCache, prepare_payload
+from services.transformer import transform_frontend_to_model_payload
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = RosterCache(64 * 1024 * 1024)
+    monkeypatch.setattr(roster_cache_module, "roster_cache", cache)
+    return cache
+
+
+@pytest.mark.parametrize("make_payload", [frontend_payload, model_payload], ids=["frontend", "model"])
+def test_cache_hits_match_a_cold_compile(cache, make_payload):
+    data = make_payload(seed=5, attendees=8, days=3)
+    cold = model(transform_frontend_to_model_payload(data) if make_payload is frontend_payload else copy.deepcopy(data))
+
+    payload, roster, key = prepare_payload(data, body_key="body-1")
+    assert cache.stats()["misses"] == 1
+    assert model(payload, roster=roster) == cold
+
+    # The same roster with its keys in another order: a hit on the content key
+    reordered = dict(reversed(list(copy.deepcopy(data).items())))
+    payload, hit, hit_key = prepare_payload(reordered)
+    assert (hit, hit_key) == (roster, key) and cache.stats()["hits"] == 1
+    assert model(payload, roster=hit) == cold
+
+    # The same body again: a hit on its digest, without hashing the availability
+    payload, hit, hit_key = prepare_payload(data, body_key="body-1")
+    assert (hit, hit_key) == (roster, key) and cache.stats()["hits"] == 2
+    # Twice, so the second query reuses the engine state the first one left in the cached roster
+    assert model(payload, roster=hit) == cold
+    assert model(payload, roster=hit) == cold
+
+
+def _roster(seed):
+    return compile_roster(model_payload(seed=seed, attendees=10, days=2))
+
+
+def test_eviction_keeps_the_cache_within_its_byte_bound():
+    rosters = {seed: _roster(seed) for seed in range(4)}
+    size = RosterCache(10 ** 9)
+    size.put("probe", rosters[0])
+    one = size.stats()["bytes"]
+
+    cache = RosterCache(int(2.5 * one))
+    for seed in (0, 1):
+        cache.put(f"r{seed}", rosters[seed])
+    cache.get("r0")  # now the most recently used
+    cache.put("r2", rosters[2])
+    assert cache.get("r1") is None
+    assert cache.get("r0") is rosters[0] and cache.get("r2") is rosters[2]
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+    # Engine state that model() adds to a cached roster counts once it is settled
+    model({"slot_minutes": 15, "meeting_length_minutes": 60, "engine": "numpy"}, roster=rosters[2])
+    cache.settle("r2")
+    assert cache.stats()["bytes"] <= cache.max_bytes
+    assert cache.get("r2") is rosters[2]
+
+
+def test_an_entry_larger_than_the_bound_is_kept_alone():
+    cache = RosterCache(1)
+    cache.put("r0", _roster(0))
+    cache.put("r1", _roster(1))
+    assert cache.get("r0") is None and cache.get("r1") is not None
+    assert cache.stats()["entries"] == 1
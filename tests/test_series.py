@@ -0,0 +1,85 @@
+import itertools
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from model import ENGINES, model
+
+FIRST_DAY = date(2025, 3, 3)
+
+
+def _span(suggestion, days):
+    """(day begin, start, end) of a suggestion in minutes from the first day."""
+    if suggestion["day"][:4].isdigit():
+        day_begin = (date.fromisoformat(suggestion["day"]) - FIRST_DAY).days * 1440
+    else:
+        day_begin = days.index(suggestion["day"]) * 1440
+    start = day_begin + suggestion["start_slot_index"] * suggestion["slot_minutes"]
+    return day_begin, start, start + suggestion["meeting_length_minutes"]
+
+
+def _compatible(combo, days, one_per_day: bool, min_gap: int) -> bool:
+    spans = sorted(_span(s, days) for s in combo)
+    for (day1, _, end1), (day2, start2, _) in zip(spans, spans[1:]):
+        if end1 + min_gap > start2:
+            return False
+        if one_per_day and (day1 == day2 or end1 > day2):
+            return False
+    return True
+
+
+def _best_total(windows, days, count: int, one_per_day: bool, min_gap: int):
+    """(k, best total score) over every compatible combination of the largest size that has one."""
+    for k in range(count, 0, -1):
+        totals = [
+            round(sum(s["score"] for s in combo), 4)
+            for combo in itertools.combinations(windows, k)
+            if _compatible(combo, days, one_per_day, min_gap)
+        ]
+        if totals:
+            return k, max(totals)
+    return 0, None
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("seed", range(40))
+def test_series_matches_brute_force(engine, seed):
+    rng = random.Random(seed)
+    num_days = rng.choice([2, 3])
+    if rng.random() < 0.5:
+        # Every other day, so one_per_day and gaps cross real calendar distance
+        days = [(FIRST_DAY + timedelta(days=2 * d)).isoformat() for d in range(num_days)]
+    else:
+        days = [f"day-{d}" for d in range(num_days)]
+    attendees = [
+        {
+            "name": f"u{a}",
+            "priority": rng.choice([1, 1, 2]),
+            "availability_matrix": [[rng.choice([0, 1, 2, 2]) for _ in range(12)] for _ in days],
+        }
+        for a in range(4)
+    ]
+    payload = {
+        "slot_minutes": 60,
+        "meeting_length_minutes": rng.choice([60, 120]),
+        "attendees": attendees,
+        "days": days,
+        "engine": engine,
+        "weights": {"unpreferred_penalty_per_person": 0.3, "hard_block_for_high_priority": False},
+    }
+    if rng.random() < 0.3:
+        del payload["meeting_length_minutes"]
+        payload["meeting_length_range"] = {"min": 60, "max": 180}
+    options = {"count": rng.choice([1, 2, 3]), "one_per_day": rng.random() < 0.4, "min_gap_minutes": rng.choice([0, 60, 180])}
+
+    windows = model({**payload, "top_k": 10**6})["suggestions"]
+    result = model({**payload, "series": options})
+    k, best = _best_total(windows, days, options["count"], options["one_per_day"], options["min_gap_minutes"])
+
+    booked = result["suggestions"]
+    assert len(booked) == k
+    if booked:
+        assert _compatible(booked, days, options["one_per_day"], options["min_gap_minutes"])
+        assert result["total_score"] == pytest.approx(best, abs=1e-6)
+        assert [_span(s, days) for s in booked] == sorted(_span(s, days) for s in booked)
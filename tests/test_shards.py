@@ -0,0 +1,56 @@
+import json
+import random
+
+import pytest
+
+from benchmarks.roster_gen import model_payload
+from model import ENGINES, compile_roster, merge_day_shards, model, slice_roster
+from services import batch
+from services.bitsets import row_to_bits
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("seed", range(30))
+def test_merged_day_shards_match_full_run(engine, seed, monkeypatch):
+    rng = random.Random(seed)
+    payload = model_payload(
+        seed=seed,
+        attendees=rng.randint(1, 12),
+        days=rng.randint(2, 20),
+        slot_minutes=rng.choice([15, 30]),
+        form=rng.choice(["availability_matrix", "intervals"]),
+        blockers=rng.choice(["none", "office", "strict"]),
+        busy_density=rng.choice([0.0, 0.3, 0.9]),
+        meeting_length_minutes=rng.choice([15, 60, 240]),
+        top_k=rng.choice([1, 5, 50]),
+    )
+    if rng.random() < 0.3:
+        # Equal priorities make ties across days common
+        for att in payload["attendees"]:
+            att["priority"] = 1
+    query = {**payload, "engine": engine}
+    roster = compile_roster(query)
+    monkeypatch.setattr(batch, "MIN_SHARD_CELLS", 1)
+    shards = batch.plan_day_shards(roster, rng.randint(2, 8))
+    assert len(shards) > 1
+    assert [day for shard in shards for day in shard] == list(range(len(roster["days"])))
+
+    merged = merge_day_shards(query, [model(query, roster=roster, day_indices=shard) for shard in shards])
+    assert json.dumps(merged) == json.dumps(model(query))
+
+
+@pytest.mark.parametrize("form", ["availability_matrix", "intervals", "availability_bits"])
+@pytest.mark.parametrize("seed", range(10))
+def test_sliced_roster_matches_day_indices(form, seed):
+    rng = random.Random(seed)
+    dense = "intervals" if form == "intervals" else "availability_matrix"
+    payload = model_payload(seed=seed, attendees=rng.randint(1, 8), days=rng.randint(2, 12), form=dense, top_k=20)
+    if form == "availability_bits":
+        for att in payload["attendees"]:
+            day_bits = [row_to_bits(row) for row in att.pop("availability_matrix")]
+            att["availability_bits"] = {"busy": [b for b, _, _ in day_bits], "tentative": [t for _, t, _ in day_bits]}
+    roster = compile_roster(payload)
+    first = rng.randrange(len(roster["days"]))
+    shard = list(range(first, rng.randint(first + 1, len(roster["days"]))))
+    expected = model(payload, roster=roster, day_indices=shard)
+    assert json.dumps(model(payload, roster=slice_roster(roster, shard))) == json.dumps(expected)
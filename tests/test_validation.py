@@ -0,0 +1,44 @@
+import pytest
+
+from model import model
+from services.schemas import ModelQuery, parse
+
+ATTENDEES = [{"name": "a", "availability_matrix": [[2, 2, 1, 0]]}]
+
+
+@pytest.mark.parametrize("slot_minutes", [15, "15", 15.0])
+def test_model_query_accepts_integral_numbers(slot_minutes):
+    query = parse(ModelQuery, {"slot_minutes": slot_minutes, "meeting_length_minutes": "30", "top_k": 2.0})
+    assert (query.slot_minutes, query.meeting_length_minutes, query.top_k) == (15, 30, 2)
+
+
+@pytest.mark.parametrize("slot_minutes, message", [
+    (15.5, "slot_minutes: Input should be a valid integer"),
+    ("x", "slot_minutes: Input should be a valid integer"),
+    (0, "slot_minutes: Input should be greater than 0"),
+])
+def test_model_query_rejects_bad_slot_minutes(slot_minutes, message):
+    with pytest.raises(ValueError, match=message):
+        parse(ModelQuery, {"slot_minutes": slot_minutes, "meeting_length_minutes": 30})
+
+
+def test_model_matches_for_coerced_fields():
+    payload = {"slot_minutes": 60, "meeting_length_minutes": 120, "top_k": 3, "attendees": ATTENDEES}
+    assert model({**payload, "slot_minutes": "60", "top_k": 3.0}) == model(payload)
+
+
+@pytest.mark.parametrize("field, value, message", [
+    ("slot_minutes", 0, "slot_minutes must be > 0"),
+    ("slot_minutes", -15, "slot_minutes must be > 0"),
+    ("meeting_length_minutes", 0, "meeting_length_minutes must be > 0"),
+])
+def test_model_guards_direct_callers(field, value, message):
+    payload = {"slot_minutes": 60, "meeting_length_minutes": 60, "attendees": ATTENDEES, field: value}
+    with pytest.raises(ValueError, match=message):
+        model(payload)
+
+
+def test_model_checks_day_counts():
+    payload = {"slot_minutes": 60, "meeting_length_minutes": 60, "days": ["d1", "d2"], "attendees": ATTENDEES}
+    with pytest.raises(ValueError, match=r"attendees\[0\].availability_matrix must have 2 rows"):
+        model(payload)
@@ -0,0 +1,74 @@
+import asyncio
+import copy
+import pickle
+
+import pytest
+
+from benchmarks.roster_gen import model_payload
+from model import compile_roster, merge_day_shards, model
+from services import roster_cache as roster_cache_module
+from services import workers
+from services.roster_cache import query_fields, run_cached_model, run_with_roster
+
+
+@pytest.fixture
+def in_process(monkeypatch):
+    """
+    Run pool jobs in this process, recording the roster each job was sent (None: the key only).
+    Arguments are pickled on the way, as for a worker process, so jobs cannot share state with the caller.
+    """
+    sent = []
+
+    async def run_jobs(jobs):
+        jobs = pickle.loads(pickle.dumps(jobs))
+        sent.append([copy.deepcopy(args[1]) for _, args in jobs])
+        return [fn(*args) for fn, args in jobs]
+
+    monkeypatch.setattr(workers, "run_jobs", run_jobs)
+    monkeypatch.setattr(roster_cache_module, "_worker_rosters", None)
+    return sent
+
+
+def _run(payload, roster, shards):
+    jobs = [(run_cached_model, (query_fields(payload), shard)) for shard in shards]
+    results = asyncio.run(run_with_roster("key", roster, jobs, shards))
+    return results[0] if len(shards) == 1 else merge_day_shards(payload, results)
+
+
+@pytest.mark.parametrize("shards", [[None], [[0, 1], [2, 3, 4]]], ids=["whole", "day-shards"])
+def test_workers_missing_the_roster_get_it_on_retry(in_process, shards):
+    payload = model_payload(seed=2, attendees=8, days=5, top_k=10)
+    roster = compile_roster(copy.deepcopy(payload))
+    expected = model(copy.deepcopy(payload))
+
+    # Cold workers: the key-only jobs miss and are resent with the roster (only their shard's days)
+    assert _run(payload, roster, shards) == expected
+    assert [job is None for job in in_process[0]] == [True] * len(shards)
+    shipped = in_process[1]
+    assert len(shipped) == len(shards)
+    for job_roster, shard in zip(shipped, shards):
+        assert job_roster["cache"] == {}
+        assert job_roster["days"] == ([roster["days"][d] for d in shard] if shard else roster["days"])
+
+    # Warm workers answer from their own copy
+    del in_process[:]
+    assert _run(payload, roster, shards) == expected
+    assert len(in_process) == 1
+
+    # A worker that lost its copy (a restarted process, or an eviction) misses again
+    roster_cache_module._worker_rosters = None
+    del in_process[:]
+    assert _run(payload, roster, shards) == expected
+    assert len(in_process) == 2
+
+
+def test_a_shard_worker_adopts_only_its_days(in_process):
+    payload = model_payload(seed=2, attendees=8, days=5, top_k=10)
+    roster = compile_roster(copy.deepcopy(payload))
+    _run(payload, roster, [[0, 1], [2, 3, 4]])
+    # Kept under per-shard keys, so a later whole-roster job still misses rather than using a slice
+    assert roster_cache_module._worker_rosters.get("key") is None
+    assert roster_cache_module._worker_rosters.get("key:0-1")["days"] == roster["days"][:2]
+    del in_process[:]
+    assert _run(payload, roster, [None]) == model(copy.deepcopy(payload))
+    assert len(in_process) == 2
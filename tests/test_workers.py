@@ -0,0 +1,49 @@
+import time
+
+import pytest
+
+from benchmarks.roster_gen import frontend_payload
+from services import workers
+
+
+@pytest.fixture
+def one_worker(monkeypatch):
+    monkeypatch.setenv("MEETSYNC_WORKERS", "1")
+    monkeypatch.setenv("MEETSYNC_QUEUE_SIZE", "1")
+
+
+def _occupy(count: int, seconds: float):
+    """Fill count admission slots with jobs that sleep in the pool."""
+    return workers.start_jobs([(time.sleep, (seconds,))] * count)
+
+
+def test_full_queue_gets_503_with_retry_after(one_worker, client):
+    rejected = workers.stats()["rejected"]
+    # One job running on the only worker and one waiting for it fill the queue
+    blockers = _occupy(2, 1.0)
+    response = client.post("/call-model", json=frontend_payload(seed=1, attendees=3, days=2))
+    assert response.status_code == 503
+    assert int(response.headers["retry-after"]) >= 1
+    assert workers.stats()["rejected"] == rejected + 1
+
+    for future in blockers:
+        future.result()
+    assert client.post("/call-model", json=frontend_payload(seed=1, attendees=3, days=2)).status_code == 200
+
+
+def test_request_past_the_deadline_gets_504(one_worker, monkeypatch, client):
+    monkeypatch.setenv("MEETSYNC_JOB_TIMEOUT", "0.3")
+    timed_out = workers.stats()["timed_out"]
+    # The worker is busy for longer than the deadline, so the request times out in the queue
+    blocker = _occupy(1, 1.5)[0]
+    response = client.post("/call-model", json=frontend_payload(seed=1, attendees=3, days=2))
+    assert response.status_code == 504
+    assert "did not finish within 0.3 seconds" in response.json()["detail"]
+    assert workers.stats()["timed_out"] == timed_out + 1
+
+    blocker.result()
+    # The abandoned job keeps its admission slot until it is cancelled or stops using the worker
+    deadline = time.monotonic() + 10
+    while workers.stats()["running"] and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert workers.stats()["running"] == 0 and workers.stats()["queue_depth"] == 0